@@ -0,0 +1,111 @@
+"""
+Codec Benchmarks: JSON vs Binary Result Files
+
+Stores and reloads a directory of pipeline results, as a batch job that
+keeps thousands of generated applications does:
+
+- json:   json.dump(result.to_dict(), indent=2) / PipelineResult.from_dict
+- binary: core.codec.dump / core.codec.load(lazy=False)
+- lazy:   core.codec.load, reading one file of each result
+
+Binary headers are MessagePack when the msgpack package is installed and
+JSON otherwise; the output says which one was measured.
+
+Run from WORLD/engine:
+    python -m benchmarks.bench_codec
+    python -m benchmarks.bench_codec --results 2000 --size 20 --file-kb 8
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from core import codec
+from core.models import (
+    Statement, Conversation, Requirements, Architecture, GeneratedCode, PipelineResult
+)
+from benchmarks import synthetic
+
+
+def result(size: int, file_kb: int) -> PipelineResult:
+    names = [f"Entity{i}Service" for i in range(size)]
+    code = synthetic.code(names)
+    body = "    # padding\n" * (file_kb * 1024 // 14)
+    files = {path: content + body for path, content in code["files"].items()}
+    return PipelineResult(
+        conversation=Conversation(statements=[Statement("Build a service")]),
+        requirements=Requirements.from_dict(synthetic.requirements(size)),
+        architecture=Architecture.from_dict(synthetic.architecture(size)),
+        code={"python": GeneratedCode(
+            language="python", framework="fastapi", files=files,
+            entry_point=code["entry_point"], run_command=code["run_command"],
+            dependencies=code["dependencies"],
+        )},
+    )
+
+
+def timed(call: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark result storage formats")
+    parser.add_argument("--results", type=int, default=500, help="Results to store and reload")
+    parser.add_argument("--size", type=int, default=10, help="Components (and files) per result")
+    parser.add_argument("--file-kb", type=int, default=4, help="Approximate size of each file")
+    args = parser.parse_args(argv)
+
+    sample = result(args.size, args.file_kb)
+    first = next(iter(sample.code["python"].files))
+    root = tempfile.mkdtemp(prefix="bench_codec_")
+    paths = [os.path.join(root, str(i)) for i in range(args.results)]
+
+    def dump_json():
+        for path in paths:
+            with open(path + ".json", "w", encoding="utf-8") as f:
+                json.dump(sample.to_dict(), f, indent=2)
+
+    def load_json():
+        for path in paths:
+            with open(path + ".json", encoding="utf-8") as f:
+                PipelineResult.from_dict(json.load(f)).code["python"].files[first]
+
+    def dump_binary():
+        for path in paths:
+            codec.dump(sample, path + codec.SUFFIX)
+
+    def load_binary(lazy: bool):
+        for path in paths:
+            codec.load(path + codec.SUFFIX, lazy=lazy).code["python"].files[first]
+
+    try:
+        rows = [
+            ("json", timed(dump_json), timed(load_json), os.path.getsize(paths[0] + ".json")),
+            ("binary", timed(dump_binary), timed(lambda: load_binary(False)),
+             os.path.getsize(paths[0] + codec.SUFFIX)),
+            ("lazy", None, timed(lambda: load_binary(True)), None),
+        ]
+    finally:
+        shutil.rmtree(root)
+
+    header = f"{'format':<8} {'dump ms/result':>15} {'load ms/result':>15} {'bytes/result':>13}"
+    encoding = "msgpack" if codec.msgpack is not None else "json (msgpack not installed)"
+    print(f"{args.results} results, {args.size} files of ~{args.file_kb} KB each, binary header: {encoding}")
+    print(header)
+    print("-" * len(header))
+    for name, dump_s, load_s, size in rows:
+        dump_text = f"{dump_s * 1e3 / args.results:15.3f}" if dump_s is not None else f"{'-':>15}"
+        size_text = f"{size:13d}" if size is not None else f"{'-':>13}"
+        print(f"{name:<8} {dump_text} {load_s * 1e3 / args.results:15.3f} {size_text}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Model Benchmarks: Per-Object Memory and Codec Speed
+
+Compares the slotted models in core.models with plain-dataclass twins
+(same fields, per-instance __dict__, no interning) - what the models were
+before they were slotted:
+
+- Retained bytes per object, measured with tracemalloc. Objects are built
+  from freshly parsed JSON, as when loading checkpoints, so interning of
+  repeated type strings shows up.
+- Statement construction time (eager ISO timestamp vs lazy)
+- to_dict() vs dataclasses.asdict() on an architecture
+
+Run from WORLD/engine:
+    python -m benchmarks.bench_models
+    python -m benchmarks.bench_models --count 50000 --size 50
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import MISSING, asdict, dataclass, field, fields, make_dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from core.models import (
+    Statement, StatementType, Requirements, Component, Architecture, GeneratedCode
+)
+from benchmarks import synthetic
+
+
+def plain(cls):
+    """Plain-dataclass twin of a model: same fields and defaults, per-instance __dict__."""
+    specs = []
+    for f in fields(cls):
+        if f.default is not MISSING:
+            spec = field(default=f.default)
+        elif f.default_factory is not MISSING:
+            spec = field(default_factory=f.default_factory)
+        else:
+            spec = field()
+        specs.append((f.name, f.type, spec))
+    return make_dataclass(f"Plain{cls.__name__}", specs)
+
+
+@dataclass
+class PlainStatement:
+    """Statement as it was: eager timestamp, per-instance __dict__."""
+    content: str
+    speaker: str = "human"
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    statement_type: Optional[StatementType] = None
+    context: Dict[str, Any] = field(default_factory=dict)
+
+
+PlainRequirements = plain(Requirements)
+PlainComponent = plain(Component)
+PlainGeneratedCode = plain(GeneratedCode)
+
+
+# =============================================================================
+# Measurement
+# =============================================================================
+
+def retained_bytes(build: Callable[[], Any], count: int) -> float:
+    """Bytes still allocated per object after building `count` of them."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    per_object = (after - before - sys.getsizeof(objects)) / count
+    del objects
+    return per_object
+
+
+def seconds_per_call(call: Callable[[], Any], count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        call()
+    return (time.perf_counter() - start) / count
+
+
+def memory_cases(size: int) -> List[tuple]:
+    """(model, build slotted, build plain) from freshly parsed JSON."""
+    statement = json.dumps({"content": "Users can create and share todo lists", "speaker": "human"})
+    requirements = json.dumps(synthetic.requirements(size))
+    component = json.dumps(synthetic.architecture(size)["components"][min(1, size - 1)])
+    code = json.dumps(dict(synthetic.code(["Entity0Service"]), language="python", framework="fastapi"))
+    return [
+        ("Statement", lambda: Statement.from_dict(json.loads(statement)),
+         lambda: PlainStatement(**json.loads(statement))),
+        ("Requirements", lambda: Requirements.from_dict(json.loads(requirements)),
+         lambda: PlainRequirements(**json.loads(requirements))),
+        ("Component", lambda: Component.from_dict(json.loads(component)),
+         lambda: PlainComponent(**json.loads(component))),
+        ("GeneratedCode", lambda: GeneratedCode.from_dict(json.loads(code)),
+         lambda: PlainGeneratedCode(**json.loads(code))),
+    ]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark model memory and codecs")
+    parser.add_argument("--count", type=int, default=20000, help="Objects per memory case")
+    parser.add_argument("--size", type=int, default=20, help="Components/requirements per object")
+    args = parser.parse_args(argv)
+
+    header = f"{'model':<14} {'plain B/obj':>12} {'slotted B/obj':>14} {'saved':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, build, build_plain in memory_cases(args.size):
+        slotted = retained_bytes(build, args.count)
+        baseline = retained_bytes(build_plain, args.count)
+        print(f"{name:<14} {baseline:>12.0f} {slotted:>14.0f} {1 - slotted / baseline:>7.1%}")
+
+    print()
+    eager = seconds_per_call(lambda: PlainStatement("Create a todo app"), args.count)
+    lazy = seconds_per_call(lambda: Statement("Create a todo app"), args.count)
+    print(f"Statement()           eager {eager * 1e6:7.2f} us   lazy    {lazy * 1e6:7.2f} us")
+
+    architecture = Architecture.from_dict(synthetic.architecture(args.size))
+    runs = max(1, args.count // 100)
+    deep = seconds_per_call(lambda: asdict(architecture), runs)
+    shallow = seconds_per_call(architecture.to_dict, runs)
+    print(f"Architecture({args.size:>3})    asdict {deep * 1e6:7.2f} us   to_dict {shallow * 1e6:7.2f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+Pipeline Benchmarks: Orchestration Overhead Without Provider Variance
+
+Drives the pipeline against a ReplayProvider with synthetic responses and
+reports throughput, p50/p99 latency per run and peak RSS for each workload
+and architecture size. Each (workload, size) runs in its own process so
+peak RSS is not inherited from earlier cases.
+
+Workloads:
+    process      - sequential StatementToRealityPipeline.process()
+    fan_out      - sequential process() with generation="fan_out"
+    speculative  - sequential process() with speculative architecture inference,
+                   on purely functional requirements so it is accepted
+                   (differs from process only with --latency/--rate)
+    speculative_realistic
+                 - the same on realistic requirements (with non-functional
+                   requirements, constraints and business rules), where the
+                   speculation is discarded and its call is wasted
+    batch        - process_batch() with a shared, de-duplicating interface
+    external     - external mode: process(), then provide_response() + resume()
+                   per step, with checkpoints
+
+Run from WORLD/engine:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --sizes 5 50 --runs 50 --save baseline.json
+    python -m benchmarks.bench_pipeline --compare baseline.json   # exit 1 on regression
+
+By default the replay is instant, so the numbers are pure orchestration
+cost. --latency/--rate add simulated provider timing.
+
+Speculative workloads also report the share of runs whose speculation was
+discarded and the LLM calls and tokens the discarded speculation wasted.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from core.llm_interface import LLMInterface, ExternalProvider
+from core.cache import ResponseCache
+from core.checkpoint import CheckpointStore
+from core.instrumentation import LLM_CALL, Instrumentation, StepRecord
+from core.replay import ReplayProvider
+from pipeline import StatementToRealityPipeline, process_batch
+from benchmarks import synthetic
+
+
+WORKLOADS = ["process", "fan_out", "speculative", "speculative_realistic", "batch", "external"]
+
+
+class SpeculationStats:
+    """Instrumentation sink counting accepted and discarded speculations and their calls."""
+
+    def __init__(self):
+        self.accepted = 0
+        self.discarded = 0
+        self.calls: Dict[str, int] = {}  # run_id -> speculative LLM calls
+        self.tokens: Dict[str, int] = {}  # run_id -> their prompt + completion tokens
+        self.discarded_runs = set()
+
+    def __call__(self, record: StepRecord):
+        if record.kind == LLM_CALL and record.name == "speculative":
+            self.calls[record.run_id] = self.calls.get(record.run_id, 0) + 1
+            self.tokens[record.run_id] = (self.tokens.get(record.run_id, 0)
+                                          + record.prompt_tokens + record.completion_tokens)
+        elif record.name == "speculation":
+            if record.success:
+                self.accepted += 1
+            else:
+                self.discarded += 1
+                self.discarded_runs.add(record.run_id)
+
+    def summary(self, runs: int) -> Dict[str, float]:
+        total = self.accepted + self.discarded
+        return {
+            "discard_rate": self.discarded / total if total else 0.0,
+            "wasted_calls": sum(self.calls.get(run, 0) for run in self.discarded_runs) / runs,
+            "wasted_tokens": sum(self.tokens.get(run, 0) for run in self.discarded_runs) / runs,
+        }
+
+
+# =============================================================================
+# Workloads (each returns per-run latencies in seconds)
+# =============================================================================
+
+def _replay(size: int, args, functional_only: bool = False) -> ReplayProvider:
+    return ReplayProvider(
+        responder=synthetic.Responder(size, functional_only),
+        first_token_latency=(args.latency, args.sigma),
+        tokens_per_second=(args.rate, args.sigma),
+        seed=args.seed,
+    )
+
+
+def run_process(size: int, runs: int, args, generation: str = "single",
+                speculative: bool = False, functional_only: bool = False,
+                stats: Optional[SpeculationStats] = None) -> List[float]:
+    llm = LLMInterface(provider=_replay(size, args, functional_only=functional_only))
+    instrumentation = Instrumentation([stats]) if stats is not None else None
+    latencies = []
+    for statement in synthetic.statements(runs):
+        start = time.perf_counter()
+        pipeline = StatementToRealityPipeline(llm=llm, generation=generation, speculative=speculative,
+                                              instrumentation=instrumentation)
+        result = pipeline.process(statement)
+        latencies.append(time.perf_counter() - start)
+        assert result.success, result.errors
+    return latencies
+
+
+def run_fan_out(size: int, runs: int, args, stats=None) -> List[float]:
+    return run_process(size, runs, args, generation="fan_out")
+
+
+def run_speculative(size: int, runs: int, args, stats=None) -> List[float]:
+    return run_process(size, runs, args, speculative=True, functional_only=True, stats=stats)
+
+
+def run_speculative_realistic(size: int, runs: int, args, stats=None) -> List[float]:
+    return run_process(size, runs, args, speculative=True, stats=stats)
+
+
+def run_batch(size: int, runs: int, args, stats=None) -> List[float]:
+    llm = LLMInterface(provider=_replay(size, args),
+                       cache=ResponseCache(max_memory_entries=3 * runs), dedupe=True)
+    latencies = []
+    start = time.perf_counter()
+    for _, result in process_batch(synthetic.statements(runs), concurrency=args.concurrency, llm=llm):
+        latencies.append(time.perf_counter() - start)
+        assert result.success, result.errors
+    return latencies
+
+
+def run_external(size: int, runs: int, args, stats=None) -> List[float]:
+    responder = synthetic.Responder(size)
+    latencies = []
+    with tempfile.TemporaryDirectory() as root:
+        store = CheckpointStore(root)
+        for statement in synthetic.statements(runs):
+            start = time.perf_counter()
+            pipeline = StatementToRealityPipeline(llm=LLMInterface(provider=ExternalProvider()),
+                                                  checkpoints=store)
+            result = pipeline.process(statement)
+            while pipeline.pending_request is not None:
+                assert pipeline.provide_response(responder(pipeline.pending_request)), pipeline.last_error
+                result = pipeline.resume(pipeline.run_id)
+            latencies.append(time.perf_counter() - start)
+            assert result.success, result.errors
+    return latencies
+
+
+RUNNERS = {
+    "process": run_process,
+    "fan_out": run_fan_out,
+    "speculative": run_speculative,
+    "speculative_realistic": run_speculative_realistic,
+    "batch": run_batch,
+    "external": run_external,
+}
+
+
+# =============================================================================
+# Measurement
+# =============================================================================
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(1, int(round(p / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(workload: str, size: int, runs: int, args) -> Dict[str, float]:
+    """Run one case in this process and summarize it."""
+    RUNNERS[workload](size, min(runs, 3), args)  # Warm up imports and caches
+    stats = SpeculationStats()
+    start = time.perf_counter()
+    latencies = RUNNERS[workload](size, runs, args, stats=stats)
+    elapsed = time.perf_counter() - start
+    time.sleep(0.05)  # Let discarded speculative calls still in flight record themselves
+    return {
+        "workload": workload,
+        "size": size,
+        "runs": runs,
+        "throughput": runs / elapsed if elapsed else float("inf"),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+        **(stats.summary(runs) if workload.startswith("speculative") else {}),
+    }
+
+
+def measure_in_subprocess(workload: str, size: int, args) -> Dict[str, float]:
+    command = [
+        sys.executable, "-m", "benchmarks.bench_pipeline", "--child", workload, str(size),
+        "--runs", str(args.runs), "--concurrency", str(args.concurrency),
+        "--latency", str(args.latency), "--rate", str(args.rate),
+        "--sigma", str(args.sigma), "--seed", str(args.seed),
+    ]
+    engine_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(command, cwd=engine_dir, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+# =============================================================================
+# Reporting
+# =============================================================================
+
+def print_table(results: List[Dict[str, float]]):
+    header = f"{'workload':<22} {'size':>5} {'runs':>5} {'runs/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'peak RSS MB':>12}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['workload']:<22} {r['size']:>5} {r['runs']:>5} {r['throughput']:>10.1f} "
+              f"{r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f} {r['peak_rss_mb']:>12.1f}")
+    speculative = [r for r in results if "discard_rate" in r]
+    if speculative:
+        print()
+        header = f"{'workload':<22} {'size':>5} {'discarded':>10} {'wasted calls/run':>17} {'wasted tokens/run':>18}"
+        print(header)
+        print("-" * len(header))
+        for r in speculative:
+            print(f"{r['workload']:<22} {r['size']:>5} {r['discard_rate']:>9.0%} "
+                  f"{r['wasted_calls']:>17.2f} {r['wasted_tokens']:>18.0f}")
+
+
+def compare(results: List[Dict[str, float]], baseline_path: str, tolerance: float) -> List[str]:
+    """Cases whose p50 or throughput regressed by more than `tolerance`."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["workload"], r["size"]): r for r in json.load(f)}
+    regressions = []
+    for r in results:
+        base = baseline.get((r["workload"], r["size"]))
+        if base is None:
+            continue
+        if r["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{r['workload']}/{r['size']}: p50 {base['p50_ms']:.2f} -> {r['p50_ms']:.2f} ms")
+        if r["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{r['workload']}/{r['size']}: throughput "
+                               f"{base['throughput']:.1f} -> {r['throughput']:.1f} runs/s")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline orchestration overhead")
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=WORKLOADS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[3, 20, 100],
+                        help="Architecture sizes (components)")
+    parser.add_argument("--runs", type=int, default=30, help="Pipeline runs per case")
+    parser.add_argument("--concurrency", type=int, default=8, help="process_batch concurrency")
+    parser.add_argument("--latency", type=float, default=0.0, help="Median first-token latency (s)")
+    parser.add_argument("--rate", type=float, default=0.0, help="Median output tokens/s (0: instant)")
+    parser.add_argument("--sigma", type=float, default=0.0, help="Lognormal sigma of latency and rate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression (fraction)")
+    parser.add_argument("--child", nargs=2, metavar=("WORKLOAD", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(args.child[0], int(args.child[1]), args.runs, args)))
+        return 0
+
+    results = [measure_in_subprocess(workload, size, args)
+               for workload in args.workloads for size in args.sizes]
+    print_table(results)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
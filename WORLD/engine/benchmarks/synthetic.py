@@ -0,0 +1,82 @@
+"""
+Synthetic responses for benchmarks.
+
+A responder for ReplayProvider that answers every pipeline prompt with
+well-formed JSON sized by the number of components, so orchestration cost
+can be measured at different architecture sizes without a provider.
+"""
+
+import json
+
+from core.models import LLMRequest
+
+
+FILE_BYTES = 2048
+
+
+def statements(count: int):
+    return [f"Create service number {i} that manages records with authentication" for i in range(count)]
+
+
+def requirements(size: int, functional_only: bool = False) -> dict:
+    """`functional_only` leaves the trailing lists empty, so speculative inference is accepted."""
+    return {
+        "functional": [f"Manage entity {i}: create, read, update and delete" for i in range(size)],
+        "entities": [f"Entity{i}" for i in range(size)],
+        "non_functional": [] if functional_only else ["p99 latency under 200ms", "99.9% availability"],
+        "constraints": [] if functional_only else ["Use PostgreSQL"],
+        "business_rules": [] if functional_only else [f"Entity {i} names are unique" for i in range(size)],
+    }
+
+
+def architecture(size: int) -> dict:
+    components = []
+    for i in range(size):
+        components.append({
+            "name": f"Entity{i}Service",
+            "type": "service",
+            "responsibilities": [f"Entity{i} CRUD", f"Entity{i} validation", "Audit logging"],
+            "interfaces": ["create", "get", "update", "delete", "list"],
+            "dependencies": [f"Entity{i - 1}Service"] if i else [],
+        })
+    return {
+        "components": components,
+        "patterns": ["Layered", "Repository"],
+        "relationships": {c["name"]: c["dependencies"] for c in components if c["dependencies"]},
+        "tech_stack": {"backend": ["Python", "FastAPI"], "database": ["PostgreSQL"]},
+        "quality_attributes": {"scalability": "horizontal"},
+    }
+
+
+def code(names) -> dict:
+    body = "# generated\n" + "x = 1\n" * (FILE_BYTES // 6)
+    return {
+        "files": {f"services/{name.lower()}.py": body for name in names},
+        "entry_point": "main.py",
+        "run_command": "uvicorn main:app",
+        "dependencies": ["fastapi", "uvicorn"],
+    }
+
+
+class Responder:
+    """Answers pipeline prompts for an architecture of `size` components."""
+
+    def __init__(self, size: int, functional_only: bool = False):
+        self.size = size
+        self._requirements = "```json\n" + json.dumps(requirements(size, functional_only)) + "\n```"
+        self._architecture = "```json\n" + json.dumps(architecture(size)) + "\n```"
+        names = [f"Entity{i}Service" for i in range(size)]
+        self._code = "```json\n" + json.dumps(code(names)) + "\n```"
+
+    def __call__(self, request: LLMRequest) -> str:
+        instructions = request.cache_prefix or request.prompt
+        if instructions.startswith("Analyze the conversation"):
+            return self._requirements
+        if instructions.startswith("Design a system architecture"):
+            return self._architecture
+        if instructions.startswith("Generate the complete code for the component"):
+            name = request.prompt[len(request.cache_prefix):].split("\n", 1)[0].split(": ", 1)[-1]
+            return json.dumps(code([name]))
+        if instructions.startswith("Generate API endpoints"):
+            return json.dumps(code(["api"]))
+        return self._code
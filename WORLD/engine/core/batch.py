@@ -0,0 +1,79 @@
+"""
+Batch Files: Local Stand-In for Provider Batch APIs
+
+Non-interactive regenerations do not need answers in real time. Provider
+batch APIs (OpenAI /v1/batches, Anthropic message batches) accept one JSONL
+file of requests and return one JSONL file of results, at lower cost and
+without per-request round trips.
+
+BatchProvider (core.llm_interface) writes the request file and ingests the
+results. This module reads request files back and answers them locally
+with any LLMProvider, writing results in the OpenAI batch output format -
+the same file a real batch job would produce.
+"""
+
+import json
+from typing import Iterator, Tuple
+
+from core.models import LLMRequest, LLMResponse
+
+
+def read_batch(path: str) -> Iterator[Tuple[str, LLMRequest]]:
+    """Yield (custom_id, request) for each line of a batch request file."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            body = item["body"]
+            system_prompt = ""
+            prompt = ""
+            for message in body.get("messages", []):
+                if message["role"] == "system":
+                    system_prompt = message["content"]
+                else:
+                    prompt = message["content"]
+            yield item["custom_id"], LLMRequest(
+                prompt=prompt,
+                system_prompt=body.get("system", system_prompt),
+                temperature=body.get("temperature", 0.7),
+                max_tokens=body.get("max_tokens", 4000),
+            )
+
+
+def result_line(custom_id: str, response: LLMResponse) -> dict:
+    """One line of OpenAI batch output for a response."""
+    if response.success:
+        return {
+            "custom_id": custom_id,
+            "response": {
+                "status_code": 200,
+                "body": {"choices": [{"message": {"role": "assistant", "content": response.content}}]},
+            },
+            "error": None,
+        }
+    return {
+        "custom_id": custom_id,
+        "response": None,
+        "error": {"message": response.error or "Request failed"},
+    }
+
+
+def run_local_batch(requests_path: str, results_path: str, provider) -> int:
+    """
+    Answer a batch request file with `provider` and write the results file.
+
+    Returns the number of requests processed.
+
+    Usage:
+        count = batch_llm.provider.write_batch("batch.jsonl")
+        run_local_batch("batch.jsonl", "results.jsonl", AnthropicProvider(key))
+        batch_llm.provider.ingest_results("results.jsonl")
+    """
+    count = 0
+    with open(results_path, "w", encoding="utf-8") as out:
+        for custom_id, request in read_batch(requests_path):
+            out.write(json.dumps(result_line(custom_id, provider.complete(request)), ensure_ascii=False))
+            out.write("\n")
+            count += 1
+    return count
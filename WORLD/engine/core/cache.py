@@ -0,0 +1,278 @@
+"""
+Response Cache: Content-Addressed Memoization for LLM Calls
+
+The same conversation produces the same prompts. When nothing upstream
+changed, asking the LLM again only costs latency and money.
+
+The cache has two tiers:
+
+1. MEMORY: A small LRU of recent responses (per process)
+2. DISK: A SQLite file that survives restarts and is shared between runs
+
+Entries are keyed by a hash of everything that shapes a completion:
+provider, model, system prompt, prompt, temperature and max_tokens.
+Only successful responses are stored.
+
+The disk tier keeps running totals of its rows and bytes, so a write costs
+O(log n) rather than a scan of the table. Other processes sharing the file
+are accounted for by re-reading the totals every RESYNC_PUTS writes.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from core.models import LLMRequest
+
+
+RESYNC_PUTS = 1000  # Writes between recounts of the disk tier's totals
+
+
+def cache_key(provider: str, model: str, request: LLMRequest) -> str:
+    """Content hash identifying a completion."""
+    payload = json.dumps(
+        [
+            provider,
+            model,
+            request.system_prompt,
+            request.prompt,
+            request.temperature,
+            request.max_tokens,
+        ],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a ResponseCache."""
+    hits: int = 0
+    misses: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    writes: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResponseCache:
+    """
+    Two-tier (memory LRU + SQLite) response cache.
+
+    Usage:
+        cache = ResponseCache(".s2r_cache/responses.sqlite", ttl=7 * 24 * 3600)
+        llm = LLMInterface(mode="auto", cache=cache)
+        pipeline = StatementToRealityPipeline(llm=llm)
+
+    Without a path the cache is memory-only.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_memory_entries: int = 256,
+        max_disk_entries: int = 10_000,
+        max_disk_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file for the disk tier (None -> memory only)
+            max_memory_entries: LRU capacity of the memory tier
+            max_disk_entries: Maximum number of rows kept on disk
+            max_disk_bytes: Maximum total content size kept on disk
+            ttl: Seconds an entry stays valid (None -> never expires)
+        """
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_rows = 0
+        self._disk_bytes = 0
+        self._puts_since_resync = 0
+        if path:
+            self._db = self._open(path)
+            self._resync()
+
+    def _open(self, path: str) -> sqlite3.Connection:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " content TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        db.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses(created)")
+        return db
+
+    def _resync(self):
+        """Recount the disk tier's rows and bytes."""
+        self._disk_rows, self._disk_bytes = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        self._puts_since_resync = 0
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    # =========================================================================
+    # Public API
+    # =========================================================================
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a cached response. Returns None on miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                content, created = entry
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    self.stats.hits += 1
+                    self.stats.memory_hits += 1
+                    return content
+                del self._memory[key]
+                self.stats.expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT content, created, size FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    content, created, size = row
+                    if not self._expired(created, now):
+                        self._db.execute(
+                            "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+                        )
+                        self._remember(key, content, created)
+                        self.stats.hits += 1
+                        self.stats.disk_hits += 1
+                        return content
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._disk_rows -= 1
+                    self._disk_bytes -= size
+                    self.stats.expirations += 1
+
+            self.stats.misses += 1
+            return None
+
+    def put(self, key: str, content: str):
+        """Store a response."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, content, now)
+            self.stats.writes += 1
+            if self._db is not None:
+                previous = self._db.execute(
+                    "SELECT size FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, content, size, created, accessed)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, content, len(content), now, now),
+                )
+                if previous is None:
+                    self._disk_rows += 1
+                    self._disk_bytes += len(content)
+                else:
+                    self._disk_bytes += len(content) - previous[0]
+                self._puts_since_resync += 1
+                if self._puts_since_resync >= RESYNC_PUTS:
+                    self._resync()
+                self._evict_disk(now)
+
+    def clear(self):
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._disk_rows = self._disk_bytes = 0
+
+    def close(self):
+        """Close the disk tier."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._db is not None:
+                return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return len(self._memory)
+
+    # =========================================================================
+    # Eviction
+    # =========================================================================
+
+    def _remember(self, key: str, content: str, created: float):
+        self._memory[key] = (content, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _evict_disk(self, now: float):
+        if self.ttl is not None:
+            # responses_created makes both queries proportional to the expired rows
+            rows, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE created < ?",
+                (now - self.ttl,),
+            ).fetchone()
+            if rows:
+                self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+                self._disk_rows -= rows
+                self._disk_bytes -= size
+                self.stats.expirations += rows
+
+        over_rows = self._disk_rows > self.max_disk_entries
+        over_bytes = self.max_disk_bytes is not None and self._disk_bytes > self.max_disk_bytes
+        if not (over_rows or over_bytes):
+            return
+        # Walk the least recently used rows only as far as needed
+        victims = []
+        rows, total = self._disk_rows, self._disk_bytes
+        cursor = self._db.execute("SELECT key, size FROM responses ORDER BY accessed")
+        try:
+            for key, size in cursor:
+                if rows <= self.max_disk_entries and (self.max_disk_bytes is None or total <= self.max_disk_bytes):
+                    break
+                victims.append(key)
+                rows -= 1
+                total -= size
+        finally:
+            cursor.close()
+        if victims:
+            self._db.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key in victims])
+            self.stats.evictions += len(victims)
+        self._disk_rows, self._disk_bytes = rows, total
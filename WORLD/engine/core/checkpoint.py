@@ -0,0 +1,199 @@
+"""
+Checkpoints: Pipeline State That Survives Restarts
+
+Every completed LLM step is expensive. If a worker dies after the
+architecture step, the requirements and architecture should not be paid
+for again.
+
+A CheckpointStore keeps one compact JSON document per run id. The layout
+follows the game save format (CHEST/saves/template.json): `meta`, `context`
+and `handoff` sections, plus a `pipeline` section holding the step outputs.
+
+Writes are atomic (temp file + rename), so a crash mid-write leaves the
+previous checkpoint intact.
+
+With binary=True, checkpoints use the binary format of core.codec instead
+(<run_id>.s2rb): generated files are stored as raw blobs and read lazily
+on resume. Either store reads checkpoints written in the other format.
+"""
+
+import json
+import os
+import re
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from core import codec
+from core.models import Conversation, Requirements, Architecture, GeneratedCode, LLMRequest
+
+
+SAVE_VERSION = "2.0"
+PIPELINE_STEPS = ["parse_requirements", "infer_architecture", "generate_code"]
+
+_RUN_ID = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class CheckpointStore:
+    """
+    Directory of run checkpoints, one file per run id.
+
+    Usage:
+        store = CheckpointStore(".s2r_checkpoints")
+        pipeline = StatementToRealityPipeline(checkpoints=store)
+        result = pipeline.process("Create a todo app")   # result.run_id
+        ...
+        # After a restart:
+        result = StatementToRealityPipeline(checkpoints=store).resume(run_id)
+    """
+
+    def __init__(self, root: str = ".s2r_checkpoints", binary: bool = False):
+        self.root = root
+        self.binary = binary
+        self.suffix = codec.SUFFIX if binary else ".json"
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, run_id: str, suffix: Optional[str] = None) -> str:
+        if not _RUN_ID.match(run_id):
+            raise ValueError(f"Invalid run id: {run_id!r}")
+        return os.path.join(self.root, f"{run_id}{suffix or self.suffix}")
+
+    def save(self, run_id: str, state: Dict[str, Any]):
+        """Atomically write a checkpoint."""
+        path = self.path(run_id)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=f".{run_id}.", suffix=".tmp")
+        try:
+            if self.binary:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(codec.dumps(state))
+            else:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(state, f, ensure_ascii=False, separators=(",", ":"), default=_plain)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        # A run saved in one format must not resume from a stale file in the other
+        self._unlink(self.path(run_id, _other(self.suffix)))
+
+    def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Read a checkpoint, or None if the run is unknown."""
+        for suffix in (self.suffix, _other(self.suffix)):
+            try:
+                if suffix == codec.SUFFIX:
+                    return codec.load(self.path(run_id, suffix))
+                with open(self.path(run_id, suffix), encoding="utf-8") as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                continue
+        return None
+
+    def delete(self, run_id: str):
+        for suffix in (".json", codec.SUFFIX):
+            self._unlink(self.path(run_id, suffix))
+
+    def list_runs(self) -> List[str]:
+        return sorted({
+            os.path.splitext(name)[0] for name in os.listdir(self.root)
+            if name.endswith((".json", codec.SUFFIX)) and not name.startswith(".")
+        })
+
+    @staticmethod
+    def _unlink(path: str):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _other(suffix: str) -> str:
+    return ".json" if suffix == codec.SUFFIX else codec.SUFFIX
+
+
+def _plain(value: Any) -> Any:
+    # Lazily read files of a binary checkpoint, saved again as JSON
+    if isinstance(value, codec.LazyFiles):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# =============================================================================
+# State <-> save document
+# =============================================================================
+
+def build_save(
+    run_id: str,
+    previous: Optional[Dict[str, Any]],
+    conversation: Optional[Conversation],
+    requirements: Optional[Requirements],
+    architecture: Optional[Architecture],
+    code: Dict[str, GeneratedCode],
+    language: str,
+    framework: str,
+    completed_steps: List[str],
+    pending_step: Optional[str] = None,
+    pending_request: Optional[LLMRequest] = None,
+    errors: Optional[List[str]] = None,
+    new_session: bool = False,
+    targets: Optional[List[Tuple[str, str]]] = None,
+    pending_target: Optional[Tuple[str, str]] = None,
+) -> Dict[str, Any]:
+    """Assemble a save document from pipeline state."""
+    now = datetime.now().isoformat()
+    meta = (previous or {}).get("meta", {})
+    remaining = [step for step in PIPELINE_STEPS if step not in completed_steps]
+
+    return {
+        "meta": {
+            "save_name": run_id,
+            "version": SAVE_VERSION,
+            "created": meta.get("created", now),
+            "last_updated": now,
+            "session_count": meta.get("session_count", 0) + (1 if new_session else 0),
+        },
+        "context": {
+            "working_on": conversation.as_text() if conversation else None,
+            "last_action": completed_steps[-1] if completed_steps else None,
+            "next_action": pending_step or (remaining[0] if remaining else None),
+            "blockers": errors or [],
+            "decisions_made": [],
+        },
+        "pipeline": {
+            "language": language,
+            "framework": framework,
+            "targets": [list(target) for target in targets or [(language, framework)]],
+            "completed_steps": completed_steps,
+            "conversation": conversation.to_dict() if conversation else None,
+            "requirements": requirements.to_dict() if requirements else None,
+            "architecture": architecture.to_dict() if architecture else None,
+            "code": {lang: generated.to_dict() for lang, generated in code.items()},
+            "pending_step": pending_step,
+            "pending_request": pending_request.to_dict() if pending_request else None,
+            "pending_target": list(pending_target) if pending_target else None,
+        },
+        "handoff": {
+            "instruction": "Resume with StatementToRealityPipeline.resume(run_id).",
+            "notes": None,
+        },
+    }
+
+
+def decode_conversation(data: Dict[str, Any]) -> Conversation:
+    return Conversation.from_dict(data)
+
+
+def decode_requirements(data: Dict[str, Any]) -> Requirements:
+    return Requirements.from_dict(data)
+
+
+def decode_architecture(data: Dict[str, Any]) -> Architecture:
+    return Architecture.from_dict(data)
+
+
+def decode_code(data: Dict[str, Any]) -> GeneratedCode:
+    return GeneratedCode.from_dict(data)
+
+
+def decode_request(data: Dict[str, Any]) -> LLMRequest:
+    return LLMRequest.from_dict(data)  # Drops `deadline`: monotonic time from a previous process
@@ -0,0 +1,411 @@
+"""
+Codec: Compact Binary Format for Results and Checkpoints
+
+JSON spends most of its time escaping and unescaping the generated code
+strings, and a reader has to decode every file to get at one field. The
+binary format splits a document in two:
+
+1. HEADER: Everything except file contents, with a schema version and the
+   kind of document. MessagePack when the `msgpack` package is installed,
+   compact JSON otherwise
+2. BLOBS: Each generated file's contents as a length-prefixed UTF-8 blob.
+   The header stores each file's blob offset instead of its text.
+
+Layout:
+    magic | schema (uint16) | header length (uint32) | header | blobs
+    magic = b"S2RB" (MessagePack header) or b"S2RJ" (JSON header)
+    blob = length (uint32) | bytes
+
+Loading a file memory-maps it and decodes only the header. Generated files
+come back as a LazyFiles mapping that reads a blob when it is accessed,
+so listing, diffing or resuming a run does not read code it never looks at.
+
+Documents: Requirements, Architecture, GeneratedCode and PipelineResult
+(through their to_dict/from_dict), plus checkpoint save documents (plain
+dicts, see core.checkpoint).
+
+Install `msgpack` for the speed: a pure-Python MessagePack encoder is
+slower than the json module's C code and would make loading no faster than
+plain JSON. Without it, headers are written as JSON, so the binary format
+still skips escaping the code and still loads lazily. Either kind of file
+is read with or without msgpack (the built-in decoder below reads
+MessagePack headers).
+
+Usage:
+    codec.dump(result, "todo.s2rb")
+    result = codec.load("todo.s2rb")          # Files are read on access
+    print(result.code["python"].files["main.py"])
+
+    data = codec.dumps(architecture)          # bytes
+    architecture = codec.loads(data)
+"""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Mapping
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Union
+
+from core.models import Requirements, Architecture, GeneratedCode, PipelineResult
+
+try:
+    import msgpack
+except ImportError:  # Optional: headers are written as JSON without it
+    msgpack = None
+
+
+MAGIC = b"S2RB"  # MessagePack header
+JSON_MAGIC = b"S2RJ"  # JSON header
+SCHEMA_VERSION = 1
+SUFFIX = ".s2rb"
+
+CHECKPOINT = "checkpoint"  # Kind of a checkpoint save document
+KINDS = {
+    "Requirements": Requirements,
+    "Architecture": Architecture,
+    "GeneratedCode": GeneratedCode,
+    "PipelineResult": PipelineResult,
+}
+
+_PREFIX = struct.Struct(">4sHI")  # Magic, schema version, header length
+_LENGTH = struct.Struct(">I")
+
+Document = Union[Requirements, Architecture, GeneratedCode, PipelineResult, Dict[str, Any]]
+
+
+class CodecError(ValueError):
+    """Not a binary document, or one written by a newer schema."""
+
+
+class LazyFiles(Mapping):
+    """
+    Generated file contents, read from the blob section on access.
+
+    Behaves like the `files` dict of GeneratedCode (path -> content).
+    Contents are not cached: keep the strings you need, or dict() it.
+    """
+
+    def __init__(self, buffer, base: int, offsets: Dict[str, int]):
+        self._buffer = buffer  # mmap or bytes holding the whole document
+        self._base = base
+        self._offsets = offsets
+
+    def __getitem__(self, path: str) -> str:
+        start = self._base + self._offsets[path]
+        (length,) = _LENGTH.unpack_from(self._buffer, start)
+        start += _LENGTH.size
+        return str(self._buffer[start:start + length], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __contains__(self, path) -> bool:
+        return path in self._offsets
+
+    def size(self, path: str) -> int:
+        """Encoded size of one file in bytes, without reading it."""
+        (length,) = _LENGTH.unpack_from(self._buffer, self._base + self._offsets[path])
+        return length
+
+    def __repr__(self) -> str:
+        return f"LazyFiles({list(self._offsets)!r})"
+
+
+# =============================================================================
+# Documents
+# =============================================================================
+
+def dumps(document: Document) -> bytes:
+    """Encode a model (or a checkpoint save document) to bytes."""
+    if isinstance(document, dict):
+        kind, data = CHECKPOINT, _copy_code_maps(document)
+    else:
+        kind = type(document).__name__
+        if kind not in KINDS:
+            raise TypeError(f"Cannot encode {kind}")
+        data = document.to_dict()
+
+    blobs: List[bytes] = []
+    offset = 0
+    for code in _code_maps(kind, data):
+        offsets = {}
+        for path, content in code["files"].items():
+            blob = content.encode("utf-8")
+            blobs.append(_LENGTH.pack(len(blob)))
+            blobs.append(blob)
+            offsets[path] = offset
+            offset += _LENGTH.size + len(blob)
+        code["files"] = offsets
+
+    header = {"schema": SCHEMA_VERSION, "kind": kind, "data": data}
+    if msgpack is not None:
+        magic, encoded = MAGIC, pack(header)
+    else:
+        magic = JSON_MAGIC
+        encoded = json.dumps(header, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+    return b"".join([_PREFIX.pack(magic, SCHEMA_VERSION, len(encoded)), encoded] + blobs)
+
+
+def loads(data: bytes, lazy: bool = False) -> Document:
+    """
+    Decode bytes from dumps().
+
+    With lazy=True, generated files are LazyFiles views into `data` instead
+    of dicts of strings.
+    """
+    if len(data) < _PREFIX.size:
+        raise CodecError("Truncated document")
+    magic, schema, length = _PREFIX.unpack_from(data, 0)
+    if magic != MAGIC and magic != JSON_MAGIC:
+        raise CodecError("Not a binary pipeline document")
+    if schema > SCHEMA_VERSION:
+        raise CodecError(f"Schema version {schema} is newer than supported ({SCHEMA_VERSION})")
+
+    base = _PREFIX.size + length
+    if magic == JSON_MAGIC:
+        if base > len(data):
+            raise CodecError("Truncated document")
+        try:
+            header = json.loads(str(data[_PREFIX.size:base], "utf-8"))
+        except ValueError:
+            raise CodecError("Corrupt document header") from None
+    else:
+        header = unpack(data[_PREFIX.size:base])
+    kind, document = header["kind"], header["data"]
+    for code in _code_maps(kind, document):
+        files = LazyFiles(data, base, code["files"])
+        code["files"] = files if lazy else dict(files.items())
+
+    if kind == CHECKPOINT:
+        return document
+    if kind not in KINDS:
+        raise CodecError(f"Unknown document kind: {kind!r}")
+    return KINDS[kind].from_dict(document)
+
+
+def dump(document: Document, path: str):
+    """Atomically write a document to `path` (temp file + rename)."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(dumps(document))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def load(path: str, lazy: bool = True) -> Document:
+    """
+    Read a document written by dump().
+
+    With lazy=True (the default) the file is memory-mapped and generated
+    files are read when accessed. The mapping stays open as long as any
+    LazyFiles refers to it, and sees the old contents if the file is
+    replaced in the meantime.
+    """
+    with open(path, "rb") as f:
+        if not lazy:
+            return loads(f.read())
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            raise CodecError("Truncated document") from None
+    return loads(buffer, lazy=True)
+
+
+def _code_maps(kind: str, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The GeneratedCode dicts inside a document's data."""
+    if kind == "GeneratedCode":
+        return [data]
+    if kind == "PipelineResult":
+        return list(data.get("code", {}).values())
+    if kind == CHECKPOINT:
+        return list(((data.get("pipeline") or {}).get("code") or {}).values())
+    return []
+
+
+def _copy_code_maps(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy the parts of a caller's save document that dumps() rewrites."""
+    if not (document.get("pipeline") or {}).get("code"):
+        return document
+    pipeline = dict(document["pipeline"])
+    pipeline["code"] = {lang: dict(code) for lang, code in pipeline["code"].items()}
+    return dict(document, pipeline=pipeline)
+
+
+# =============================================================================
+# MessagePack
+# =============================================================================
+
+def pack(value: Any) -> bytes:
+    """Encode plain data (dict, list, str, int, float, bool, None, bytes) as MessagePack."""
+    if msgpack is not None:
+        return msgpack.packb(value, use_bin_type=True, default=_default)
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+def unpack(data: bytes) -> Any:
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    try:
+        return _Unpacker(data).read()
+    except (IndexError, struct.error):
+        raise CodecError("Truncated document") from None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def _pack(value: Any, out: bytearray):
+    if value is None:
+        out.append(0xc0)
+    elif value is True:
+        out.append(0xc3)
+    elif value is False:
+        out.append(0xc2)
+    elif isinstance(value, int):
+        if 0 <= value < 0x80 or -32 <= value < 0:
+            out += struct.pack(">b", value) if value < 0 else bytes((value,))
+        elif 0 <= value <= 0xffffffffffffffff:
+            out += b"\xcf" + struct.pack(">Q", value)
+        else:
+            out += b"\xd3" + struct.pack(">q", value)
+    elif isinstance(value, float):
+        out += b"\xcb" + struct.pack(">d", value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        n = len(data)
+        if n < 32:
+            out.append(0xa0 | n)
+        elif n < 0x100:
+            out += bytes((0xd9, n))
+        elif n < 0x10000:
+            out += b"\xda" + struct.pack(">H", n)
+        else:
+            out += b"\xdb" + struct.pack(">I", n)
+        out += data
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        n = len(value)
+        if n < 0x100:
+            out += bytes((0xc4, n))
+        elif n < 0x10000:
+            out += b"\xc5" + struct.pack(">H", n)
+        else:
+            out += b"\xc6" + struct.pack(">I", n)
+        out += value
+    elif isinstance(value, (list, tuple)):
+        n = len(value)
+        if n < 16:
+            out.append(0x90 | n)
+        elif n < 0x10000:
+            out += b"\xdc" + struct.pack(">H", n)
+        else:
+            out += b"\xdd" + struct.pack(">I", n)
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, Mapping):
+        n = len(value)
+        if n < 16:
+            out.append(0x80 | n)
+        elif n < 0x10000:
+            out += b"\xde" + struct.pack(">H", n)
+        else:
+            out += b"\xdf" + struct.pack(">I", n)
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        _pack(_default(value), out)
+
+
+class _Unpacker:
+    """Reads every MessagePack type except extensions. Short strings take the fast path."""
+
+    _FIXED = {
+        0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q",
+        0xd0: ">b", 0xd1: ">h", 0xd2: ">i", 0xd3: ">q",
+        0xca: ">f", 0xcb: ">d",
+    }
+    _LENGTHS = {
+        0xc4: ">B", 0xc5: ">H", 0xc6: ">I",  # bin
+        0xd9: ">B", 0xda: ">H", 0xdb: ">I",  # str
+        0xdc: ">H", 0xdd: ">I",  # array
+        0xde: ">H", 0xdf: ">I",  # map
+    }
+
+    def __init__(self, data: bytes):
+        self.data = bytes(data)
+        self.size = len(self.data)
+        self.pos = 0
+
+    def read(self) -> Any:
+        data = self.data
+        pos = self.pos
+        code = data[pos]
+        pos += 1
+        if 0xa0 <= code <= 0xbf:
+            self.pos = pos + (code & 0x1f)
+            return self._text(pos, self.pos)
+        self.pos = pos
+        if code < 0x80:
+            return code
+        if code <= 0x8f:
+            return self._map(code & 0x0f)
+        if code <= 0x9f:
+            return self._array(code & 0x0f)
+        if code >= 0xe0:
+            return code - 0x100
+        if code == 0xc0:
+            return None
+        if code == 0xc2 or code == 0xc3:
+            return code == 0xc3
+        if code in self._FIXED:
+            return self._number(self._FIXED[code])
+        if code in self._LENGTHS:
+            n = self._number(self._LENGTHS[code])
+            if code >= 0xde:
+                return self._map(n)
+            if code >= 0xdc:
+                return self._array(n)
+            start = self.pos
+            self.pos += n
+            if code >= 0xd9:
+                return self._text(start, self.pos)
+            if self.pos > self.size:
+                raise CodecError("Truncated document")
+            return data[start:self.pos]
+        raise CodecError(f"Unsupported MessagePack type 0x{code:02x}")
+
+    def _number(self, fmt: str):
+        (value,) = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return value
+
+    def _text(self, start: int, end: int) -> str:
+        if end > self.size:
+            raise CodecError("Truncated document")
+        return self.data[start:end].decode("utf-8")
+
+    def _array(self, n: int) -> List[Any]:
+        read = self.read
+        return [read() for _ in range(n)]
+
+    def _map(self, n: int) -> Dict[Any, Any]:
+        read = self.read
+        return {read(): read() for _ in range(n)}
@@ -0,0 +1,330 @@
+"""
+Instrumentation: Where Does a Pipeline Run Spend Its Time?
+
+A slow run can be the provider, the rate limiter, JSON parsing or code
+assembly. The pipeline records every LLM call and every local stage as a
+StepRecord and hands it to an Instrumentation hook, which fans it out to
+sinks:
+
+1. MetricsRegistry: In-process counters and histograms, with Prometheus
+   text exposition
+2. JSONLTrace: One JSON line per record, appended to a file
+3. Any callable taking a StepRecord
+
+Usage:
+    metrics = MetricsRegistry()
+    hooks = Instrumentation([metrics, JSONLTrace("trace.jsonl")])
+    pipeline = StatementToRealityPipeline(instrumentation=hooks)
+    result = pipeline.process("Create a todo app")
+    result.timings                 # per-step summary
+    print(metrics.prometheus_text())
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from core.models import LLMRequest, LLMResponse
+
+
+LLM_CALL = "llm"
+STAGE = "stage"
+STEP = "step"
+
+# Histogram buckets in seconds: sub-millisecond parsing up to long generations
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+@dataclass
+class StepRecord:
+    """One timed unit of work inside a pipeline step."""
+    step: str  # parse_requirements, infer_architecture, generate_code
+    kind: str  # "llm", "stage", or "step" (the whole step)
+    name: str  # "complete", "stream", "parse", "assemble", "step", or a fan-out part
+    wall_time: float = 0.0
+    queue_time: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    response_bytes: int = 0
+    cache_hit: bool = False
+    retries: int = 0
+    success: bool = True
+    run_id: Optional[str] = None
+    started: float = 0.0  # time.time() at start
+
+
+def llm_record(step: str, name: str, request: LLMRequest, response: LLMResponse,
+               wall_time: float, started: float, run_id: Optional[str] = None) -> StepRecord:
+    """Build the record of one LLM call from its request and response."""
+    usage = response.usage
+    return StepRecord(
+        step=step,
+        kind=LLM_CALL,
+        name=name,
+        wall_time=wall_time,
+        queue_time=response.queue_time,
+        # Providers that report no usage (external, cached) get estimates
+        prompt_tokens=usage.get("input_tokens", (len(request.system_prompt) + len(request.prompt)) // 4),
+        completion_tokens=usage.get("output_tokens", len(response.content) // 4),
+        cached_tokens=usage.get("cached_input_tokens", 0),
+        response_bytes=len(response.content.encode("utf-8")),
+        cache_hit=response.cached,
+        retries=response.retries,
+        success=response.success,
+        run_id=run_id,
+        started=started,
+    )
+
+
+class Instrumentation:
+    """
+    Pipeline hook: receives every StepRecord and forwards it to the sinks.
+
+    A sink is any callable taking a StepRecord, or an object with a
+    record(StepRecord) method.
+    """
+
+    def __init__(self, sinks: Optional[List[Any]] = None):
+        self.sinks = list(sinks or [])
+
+    def add(self, sink: Any):
+        self.sinks.append(sink)
+
+    def record(self, record: StepRecord):
+        for sink in self.sinks:
+            if hasattr(sink, "record"):
+                sink.record(record)
+            else:
+                sink(record)
+
+    def llm_call(self, step: str, name: str, request: LLMRequest,
+                 call: Callable[[], LLMResponse], run_id: Optional[str] = None) -> LLMResponse:
+        """Run one LLM call and record it."""
+        started = time.time()
+        start = time.perf_counter()
+        response = call()
+        self.record(llm_record(step, name, request, response,
+                               time.perf_counter() - start, started, run_id))
+        return response
+
+    @contextmanager
+    def stage(self, step: str, name: str, run_id: Optional[str] = None,
+              kind: str = STAGE) -> Iterator[StepRecord]:
+        """Time a local stage (parsing, assembly). Set record.success = False on failure."""
+        record = StepRecord(step=step, kind=kind, name=name, run_id=run_id, started=time.time())
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record.success = False
+            raise
+        finally:
+            record.wall_time = time.perf_counter() - start
+            self.record(record)
+
+    def step(self, step: str, run_id: Optional[str] = None):
+        """Time a whole pipeline step, LLM calls and stages included."""
+        return self.stage(step, "step", run_id, kind=STEP)
+
+
+class InstrumentedLLM:
+    """
+    LLMInterface wrapper that records each complete()/acomplete() call.
+
+    Used where calls are made by other modules, e.g. fan-out generation,
+    so every part shows up as its own record.
+    """
+
+    def __init__(self, llm, instrumentation: Instrumentation, step: str,
+                 run_id: Optional[str] = None, name: Callable[[LLMRequest], str] = lambda r: "complete"):
+        self.llm = llm
+        self.instrumentation = instrumentation
+        self.step = step
+        self.run_id = run_id
+        self.name = name
+
+    def complete(self, request: LLMRequest) -> LLMResponse:
+        return self.instrumentation.llm_call(
+            self.step, self.name(request), request, lambda: self.llm.complete(request), self.run_id
+        )
+
+    async def acomplete(self, request: LLMRequest) -> LLMResponse:
+        started = time.time()
+        start = time.perf_counter()
+        response = await self.llm.acomplete(request)
+        self.instrumentation.record(llm_record(
+            self.step, self.name(request), request, response,
+            time.perf_counter() - start, started, self.run_id
+        ))
+        return response
+
+    def __getattr__(self, attr):
+        return getattr(self.llm, attr)
+
+
+# =============================================================================
+# Per-run summary
+# =============================================================================
+
+def summarize(records: List[StepRecord]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-step timing summary for PipelineResult.timings.
+
+    llm_time and stage_time are summed over calls, so with concurrent
+    fan-out calls llm_time can exceed the step's elapsed time.
+    """
+    summary: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        step = summary.setdefault(record.step, {
+            "wall_time": 0.0, "llm_calls": 0, "llm_time": 0.0, "queue_time": 0.0, "stage_time": 0.0,
+            "stages": {}, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+            "response_bytes": 0, "cache_hits": 0, "retries": 0,
+        })
+        if record.kind == LLM_CALL:
+            step["llm_calls"] += 1
+            step["llm_time"] += record.wall_time
+            step["queue_time"] += record.queue_time
+            step["prompt_tokens"] += record.prompt_tokens
+            step["completion_tokens"] += record.completion_tokens
+            step["cached_tokens"] += record.cached_tokens
+            step["response_bytes"] += record.response_bytes
+            step["cache_hits"] += int(record.cache_hit)
+            step["retries"] += record.retries
+        elif record.kind == STEP:
+            step["wall_time"] += record.wall_time
+        else:
+            step["stage_time"] += record.wall_time
+            step["stages"][record.name] = step["stages"].get(record.name, 0.0) + record.wall_time
+    return summary
+
+
+# =============================================================================
+# Sinks
+# =============================================================================
+
+class JSONLTrace:
+    """Appends each record as one JSON line. Safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def record(self, record: StepRecord):
+        line = json.dumps(asdict(record), separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms, exportable as Prometheus text.
+
+    Records are aggregated by step (and by stage name for stages); run ids
+    are not used as labels to keep cardinality bounded.
+    """
+
+    def __init__(self, prefix: str = "s2r", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[_Labels, float]] = {}
+        self._histograms: Dict[str, Dict[_Labels, List[float]]] = {}  # bucket counts + [sum, count]
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, help: str = "", **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+            if help:
+                self._help.setdefault(name, help)
+
+    def observe(self, name: str, value: float, help: str = "", **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            counts = series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += value
+            counts[-1] += 1
+            if help:
+                self._help.setdefault(name, help)
+
+    def counter(self, name: str, **labels: str) -> float:
+        return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0.0)
+
+    def record(self, record: StepRecord):
+        if record.kind == STEP:
+            self.observe("step_seconds", record.wall_time, "Pipeline step wall time", step=record.step)
+            return
+        if record.kind == STAGE:
+            self.observe("stage_seconds", record.wall_time, "Local stage wall time",
+                         step=record.step, stage=record.name)
+            return
+
+        outcome = "success" if record.success else "failure"
+        self.inc("llm_calls_total", 1, "LLM calls", step=record.step, outcome=outcome)
+        self.observe("llm_call_seconds", record.wall_time, "LLM call wall time", step=record.step)
+        self.observe("llm_queue_seconds", record.queue_time,
+                     "Time waiting for rate-limit or concurrency capacity", step=record.step)
+        self.inc("tokens_total", record.prompt_tokens, "Tokens by kind", step=record.step, kind="prompt")
+        self.inc("tokens_total", record.completion_tokens, step=record.step, kind="completion")
+        self.inc("tokens_total", record.cached_tokens, step=record.step, kind="cached_prompt")
+        self.inc("response_bytes_total", record.response_bytes, "Response bytes", step=record.step)
+        self.inc("cache_hits_total", int(record.cache_hit), "Responses served from the cache",
+                 step=record.step)
+        self.inc("retries_total", record.retries, "Provider retries", step=record.step)
+
+    def prometheus_text(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {metric} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {metric} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+
+            for name, series in sorted(self._histograms.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {metric} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, counts in sorted(series.items()):
+                    for bound, count in zip(self.buckets, counts):
+                        bucket = labels + (("le", _format_value(bound)),)
+                        lines.append(f"{metric}_bucket{_format_labels(bucket)} {_format_value(count)}")
+                    lines.append(f"{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} "
+                                 f"{_format_value(counts[-1])}")
+                    lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(counts[-2])}")
+                    lines.append(f"{metric}_count{_format_labels(labels)} {_format_value(counts[-1])}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: _Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
@@ -0,0 +1,109 @@
+"""
+JSON Extraction: Finding the Answer Inside an LLM Response
+
+LLMs wrap JSON in prose and ```json fences, and generated code inside the
+JSON may itself contain triple backticks. Splitting on fences breaks on
+exactly the responses that matter most - large code generations.
+
+This module scans the response once:
+
+1. Start at the ```json fence if there is one
+2. Find the next '{' and decode the object in place (no intermediate copies)
+3. If that '{' was prose, skip its balanced region with a bracket-depth
+   scanner that understands strings and escapes, and try the next one
+
+Failures come back as a JSONExtraction with an error message and the offset
+where things went wrong, instead of an empty dict.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+_DECODER = json.JSONDecoder()
+_STRUCTURE = re.compile(r'[{}"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+@dataclass
+class JSONExtraction:
+    """Result of extracting a JSON object from text."""
+    data: Any = None
+    error: Optional[str] = None
+    offset: int = -1  # Start of the object, or where extraction failed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def find_object_end(text: str, start: int) -> int:
+    """
+    Return the index just past the object opening at text[start].
+
+    Braces inside JSON strings (including escaped quotes) are ignored.
+    Returns -1 if the object never closes, e.g. a truncated response.
+    """
+    depth = 0
+    pos = start
+    while True:
+        match = _STRUCTURE.search(text, pos)
+        if match is None:
+            return -1
+        char = match.group()
+        if char == '"':
+            pos = _string_end(text, match.end())
+            if pos < 0:
+                return -1
+            continue
+        depth += 1 if char == "{" else -1
+        pos = match.end()
+        if depth == 0:
+            return pos
+
+
+def _string_end(text: str, pos: int) -> int:
+    """Index just past the closing quote of a string whose body starts at pos."""
+    while True:
+        match = _STRING_SPECIAL.search(text, pos)
+        if match is None:
+            return -1
+        if match.group() == '"':
+            return match.end()
+        pos = match.end() + 1
+
+
+def extract_json(text: str) -> JSONExtraction:
+    """Extract the first JSON object from an LLM response."""
+    if not text:
+        return JSONExtraction(error="Empty response", offset=0)
+
+    fence = text.find("```json")
+    starts = [fence + 7, 0] if fence >= 0 else [0]
+
+    first_error: Optional[JSONExtraction] = None
+    for pos in starts:
+        while True:
+            start = text.find("{", pos)
+            if start < 0:
+                break
+            try:
+                data, _ = _DECODER.raw_decode(text, start)
+                return JSONExtraction(data=data, offset=start)
+            except json.JSONDecodeError as e:
+                end = find_object_end(text, start)
+                if end < 0:
+                    return first_error or JSONExtraction(
+                        error=f"Unterminated JSON object starting at offset {start} (truncated response?)",
+                        offset=start,
+                    )
+                if first_error is None:
+                    first_error = JSONExtraction(
+                        error=f"Invalid JSON at offset {e.pos}: {e.msg}",
+                        offset=e.pos,
+                    )
+                pos = end
+
+    return first_error or JSONExtraction(error="No JSON object found in response", offset=len(text))
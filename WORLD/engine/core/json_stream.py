@@ -0,0 +1,209 @@
+"""
+Incremental JSON Parser: Values as Soon as They Close
+
+A streamed completion is incomplete JSON until the last token arrives.
+This parser is fed chunks as they come in and reports every value at a
+watched path the moment that value is closed - so a generated file can be
+shown while the rest of the application is still being written.
+
+Paths are tuples of object keys / array indexes. "*" matches anything:
+
+    parser = IncrementalJSONParser(
+        watch=[("files", "*")],
+        on_value=lambda path, value: print("file ready:", path[1]),
+    )
+    for chunk in chunks:
+        parser.feed(chunk)
+
+Leading prose or a ```json fence before the first { or [ is skipped.
+"""
+
+import json
+import re
+from typing import Any, Callable, Iterable, List, Tuple
+
+
+Path = Tuple[Any, ...]
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[\s,\]}]')
+_WHITESPACE = " \t\r\n"
+
+
+class _Frame:
+    """An open object or array."""
+    __slots__ = ("is_object", "key", "state")
+
+    def __init__(self, is_object: bool):
+        self.is_object = is_object
+        # Objects: current key; arrays: current index
+        self.key: Any = None if is_object else 0
+        # Objects: key -> colon -> value -> after; arrays: value -> after
+        self.state = "key" if is_object else "value"
+
+
+class IncrementalJSONParser:
+    """Streaming scanner that emits completed values at watched paths."""
+
+    def __init__(self, watch: Iterable[Path], on_value: Callable[[Path, Any], None]):
+        self.watch: List[Path] = [tuple(path) for path in watch]
+        self.on_value = on_value
+        self.done = False
+
+        self._text = ""
+        self._pos = 0
+        self._frames: List[_Frame] = []
+        self._captures: List[Tuple[Path, int, int]] = []  # (path, start, depth)
+        self._in_string = False
+        self._string_is_key = False
+        self._string_start = 0
+        self._in_scalar = False
+
+    def feed(self, chunk: str):
+        """Consume the next piece of streamed text."""
+        if self.done or not chunk:
+            return
+        self._text += chunk
+        self._scan()
+        self._compact()
+
+    # =========================================================================
+    # Scanner
+    # =========================================================================
+
+    def _scan(self):
+        text = self._text
+        end = len(text)
+        pos = self._pos
+        frames = self._frames
+
+        while pos < end and not self.done:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(text, pos)
+                if match is None:
+                    pos = end
+                    break
+                if match.group() == "\\":
+                    if match.end() >= end:
+                        # Escape split across chunks - wait for the next one
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                pos = match.end()
+                self._in_string = False
+                self._string_closed(pos)
+                continue
+
+            if self._in_scalar:
+                match = _SCALAR_END.search(text, pos)
+                if match is None:
+                    pos = end
+                    break
+                pos = match.start()
+                self._in_scalar = False
+                self._value_closed(pos)
+                continue
+
+            char = text[pos]
+            if char in _WHITESPACE:
+                pos += 1
+                continue
+
+            if not frames:
+                if char in "{[":
+                    self._start_value(char, pos, ())
+                pos += 1
+                continue
+
+            frame = frames[-1]
+            if frame.is_object:
+                if frame.state == "key":
+                    if char == '"':
+                        self._in_string = True
+                        self._string_is_key = True
+                        self._string_start = pos
+                    elif char == "}":
+                        self._close_container(pos + 1)
+                elif frame.state == "colon":
+                    if char == ":":
+                        frame.state = "value"
+                elif frame.state == "value":
+                    self._start_value(char, pos, self._path())
+                else:
+                    if char == ",":
+                        frame.state = "key"
+                    elif char == "}":
+                        self._close_container(pos + 1)
+            else:
+                if frame.state == "value":
+                    if char == "]":
+                        self._close_container(pos + 1)
+                    else:
+                        self._start_value(char, pos, self._path())
+                else:
+                    if char == ",":
+                        frame.key += 1
+                        frame.state = "value"
+                    elif char == "]":
+                        self._close_container(pos + 1)
+            pos += 1
+
+        self._pos = pos
+
+    def _path(self) -> Path:
+        return tuple(frame.key for frame in self._frames)
+
+    def _start_value(self, char: str, pos: int, path: Path):
+        if path and self._watched(path):
+            self._captures.append((path, pos, len(self._frames)))
+
+        if char == '"':
+            self._in_string = True
+            self._string_is_key = False
+        elif char in "{[":
+            self._frames.append(_Frame(char == "{"))
+        else:
+            # The scalar's first character is consumed by the caller
+            self._in_scalar = True
+
+    def _string_closed(self, end: int):
+        if self._string_is_key:
+            frame = self._frames[-1]
+            frame.key = json.loads(self._text[self._string_start:end])
+            frame.state = "colon"
+        else:
+            self._value_closed(end)
+
+    def _close_container(self, end: int):
+        self._frames.pop()
+        if not self._frames:
+            self.done = True
+            return
+        self._value_closed(end)
+
+    def _value_closed(self, end: int):
+        depth = len(self._frames)
+        if self._captures and self._captures[-1][2] == depth:
+            path, start, _ = self._captures.pop()
+            self.on_value(path, json.loads(self._text[start:end]))
+        if self._frames:
+            self._frames[-1].state = "after"
+
+    def _watched(self, path: Path) -> bool:
+        for pattern in self.watch:
+            if len(pattern) == len(path) and all(
+                expected == "*" or expected == actual
+                for expected, actual in zip(pattern, path)
+            ):
+                return True
+        return False
+
+    def _compact(self):
+        """Drop text no open value or key can refer back to."""
+        if self._captures or (self._in_string and self._string_is_key):
+            return
+        if self._pos == 0:
+            return
+        self._text = self._text[self._pos:]
+        self._pos = 0
@@ -13,34 +13,132 @@ Without it, you just have scaffolding. With it, you have real inference.
 
 import os
 import json
+import time
+import asyncio
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
 from abc import ABC, abstractmethod
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Callable, Union
 from dataclasses import dataclass
 
 from core.models import LLMRequest, LLMResponse
+from core.cache import ResponseCache, cache_key
+from core.scheduler import RequestScheduler
+from core.spool import Spool
+
+
+class StreamError(Exception):
+    """Raised by LLMProvider.stream() when the provider cannot stream a completion."""
+    
+    def __init__(self, response: LLMResponse):
+        super().__init__(response.error)
+        self.response = response
 
 
 class LLMProvider(ABC):
     """Abstract LLM provider."""
     
+    name: str = "unknown"
+    model: str = ""
+    
     @abstractmethod
     def complete(self, request: LLMRequest) -> LLMResponse:
         """Process a request and return a response."""
         pass
     
+    async def acomplete(self, request: LLMRequest) -> LLMResponse:
+        """
+        Process a request without blocking the event loop.
+        
+        Providers with a native async client override this. The default
+        runs the blocking call in a worker thread.
+        """
+        return await asyncio.to_thread(self.complete, request)
+    
+    def stream(self, request: LLMRequest) -> Iterator[str]:
+        """
+        Yield the completion in chunks as it is produced.
+        
+        Providers with a streaming API override this. The default yields the
+        whole completion as one chunk. Failures raise StreamError. The
+        generator's return value is the usage dict, when the provider reports one.
+        """
+        response = self.complete(request)
+        if not response.success:
+            raise StreamError(response)
+        yield response.content
+        return response.usage
+    
+    async def aclose(self):
+        """Release long-lived async resources (connection pools)."""
+        pass
+    
     @abstractmethod
     def is_available(self) -> bool:
         """Check if this provider is available (has API key, etc.)."""
         pass
 
 
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+def _error_response(error: Exception) -> LLMResponse:
+    """Failed response, flagged retryable for rate limits, timeouts and overloads."""
+    status = getattr(error, "status_code", None)
+    kind = type(error).__name__
+    retryable = (
+        status in _RETRYABLE_STATUS
+        or isinstance(error, (TimeoutError, ConnectionError))
+        or any(marker in kind for marker in ("Timeout", "Connection", "RateLimit", "Overloaded"))
+    )
+    return LLMResponse(content="", success=False, error=str(error), retryable=retryable)
+
+
+def _request_timeout(request: LLMRequest, default: float) -> float:
+    """Per-call timeout: whatever is left before the request's deadline."""
+    if request.deadline is None:
+        return default
+    return max(0.001, min(default, request.deadline - time.monotonic()))
+
+
+def _pooled_http_client(max_connections: int, timeout: float):
+    """Shared httpx.AsyncClient with a bounded keep-alive connection pool."""
+    import httpx
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+        timeout=timeout,
+    )
+
+
 class OpenAIProvider(LLMProvider):
     """OpenAI API provider."""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4-turbo-preview"):
+    name = "openai"
+    
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4-turbo-preview",
+                 base_url: Optional[str] = None, max_connections: int = 100,
+                 timeout: float = 600.0):
+        """
+        Args:
+            api_key: API key (defaults to OPENAI_API_KEY)
+            model: Model name
+            base_url: Alternative endpoint, e.g. a local fake server in tests
+                      (defaults to OPENAI_BASE_URL)
+            max_connections: Size of the async connection pool
+            timeout: Per-request timeout in seconds
+        """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.model = model
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self.max_connections = max_connections
+        self.timeout = timeout
         self._client = None
+        self._async_client = None
     
     def is_available(self) -> bool:
         return bool(self.api_key)
@@ -52,30 +150,109 @@ class OpenAIProvider(LLMProvider):
         try:
             import openai
             if not self._client:
-                self._client = openai.OpenAI(api_key=self.api_key)
+                self._client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                             timeout=self.timeout)
+            
+            response = self._client.chat.completions.create(**self._params(request))
+            return self._to_response(response)
+        except Exception as e:
+            return _error_response(e)
+    
+    def stream(self, request: LLMRequest) -> Iterator[str]:
+        if not self.is_available():
+            raise StreamError(LLMResponse(content="", success=False, error="No API key"))
+        
+        import openai
+        if not self._client:
+            self._client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                         timeout=self.timeout)
+        
+        usage = {}
+        for chunk in self._client.chat.completions.create(**self._params(request), stream=True,
+                                                           stream_options={"include_usage": True}):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if getattr(chunk, "usage", None):
+                usage = self._usage(chunk.usage)
+        return usage
+    
+    async def acomplete(self, request: LLMRequest) -> LLMResponse:
+        if not self.is_available():
+            return LLMResponse(content="", success=False, error="No API key")
+        
+        try:
+            import openai
+            if not self._async_client:
+                self._async_client = openai.AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    http_client=_pooled_http_client(self.max_connections, self.timeout)
+                )
             
-            response = self._client.chat.completions.create(
-                model=self.model,
-                messages=request.as_messages(),
-                max_tokens=request.max_tokens,
-                temperature=request.temperature
-            )
-            return LLMResponse(
-                content=response.choices[0].message.content,
-                raw=response,
-                success=True
-            )
+            response = await self._async_client.chat.completions.create(**self._params(request))
+            return self._to_response(response)
         except Exception as e:
-            return LLMResponse(content="", success=False, error=str(e))
+            return _error_response(e)
+    
+    async def aclose(self):
+        if self._async_client:
+            await self._async_client.close()
+            self._async_client = None
+    
+    def _params(self, request: LLMRequest) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": request.as_messages(),
+            "max_tokens": request.max_tokens,
+            "temperature": request.temperature,
+            "timeout": _request_timeout(request, self.timeout)
+        }
+    
+    def _to_response(self, response) -> LLMResponse:
+        return LLMResponse(
+            content=response.choices[0].message.content,
+            raw=response,
+            success=True,
+            usage=self._usage(getattr(response, "usage", None))
+        )
+    
+    @staticmethod
+    def _usage(usage) -> Dict[str, int]:
+        # Prefix caching is automatic; the static-first prompt layout makes it hit
+        if usage is None:
+            return {}
+        details = getattr(usage, "prompt_tokens_details", None)
+        return {
+            "input_tokens": usage.prompt_tokens or 0,
+            "output_tokens": usage.completion_tokens or 0,
+            "cached_input_tokens": (getattr(details, "cached_tokens", 0) or 0) if details else 0,
+        }
 
 
 class AnthropicProvider(LLMProvider):
     """Anthropic Claude API provider."""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "claude-sonnet-4-20250514"):
+    name = "anthropic"
+    
+    def __init__(self, api_key: Optional[str] = None, model: str = "claude-sonnet-4-20250514",
+                 base_url: Optional[str] = None, max_connections: int = 100,
+                 timeout: float = 600.0):
+        """
+        Args:
+            api_key: API key (defaults to ANTHROPIC_API_KEY)
+            model: Model name
+            base_url: Alternative endpoint, e.g. a local fake server in tests
+                      (defaults to ANTHROPIC_BASE_URL)
+            max_connections: Size of the async connection pool
+            timeout: Per-request timeout in seconds
+        """
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
         self.model = model
+        self.base_url = base_url or os.getenv("ANTHROPIC_BASE_URL")
+        self.max_connections = max_connections
+        self.timeout = timeout
         self._client = None
+        self._async_client = None
     
     def is_available(self) -> bool:
         return bool(self.api_key)
@@ -87,21 +264,91 @@ class AnthropicProvider(LLMProvider):
         try:
             from anthropic import Anthropic
             if not self._client:
-                self._client = Anthropic(api_key=self.api_key)
+                self._client = Anthropic(api_key=self.api_key, base_url=self.base_url,
+                                         timeout=self.timeout)
             
-            response = self._client.messages.create(
-                model=self.model,
-                max_tokens=request.max_tokens,
-                system=request.system_prompt if request.system_prompt else "You are an expert software architect.",
-                messages=[{"role": "user", "content": request.prompt}]
-            )
-            return LLMResponse(
-                content=response.content[0].text,
-                raw=response,
-                success=True
-            )
+            response = self._client.messages.create(**self._params(request))
+            return self._to_response(response)
         except Exception as e:
-            return LLMResponse(content="", success=False, error=str(e))
+            return _error_response(e)
+    
+    def stream(self, request: LLMRequest) -> Iterator[str]:
+        if not self.is_available():
+            raise StreamError(LLMResponse(content="", success=False, error="No API key"))
+        
+        from anthropic import Anthropic
+        if not self._client:
+            self._client = Anthropic(api_key=self.api_key, base_url=self.base_url,
+                                     timeout=self.timeout)
+        
+        with self._client.messages.stream(**self._params(request)) as stream:
+            for text in stream.text_stream:
+                yield text
+            return self._usage(stream.get_final_message().usage)
+    
+    async def acomplete(self, request: LLMRequest) -> LLMResponse:
+        if not self.is_available():
+            return LLMResponse(content="", success=False, error="No API key")
+        
+        try:
+            from anthropic import AsyncAnthropic
+            if not self._async_client:
+                self._async_client = AsyncAnthropic(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    http_client=_pooled_http_client(self.max_connections, self.timeout)
+                )
+            
+            response = await self._async_client.messages.create(**self._params(request))
+            return self._to_response(response)
+        except Exception as e:
+            return _error_response(e)
+    
+    async def aclose(self):
+        if self._async_client:
+            await self._async_client.close()
+            self._async_client = None
+    
+    def _params(self, request: LLMRequest) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "max_tokens": request.max_tokens,
+            "system": request.system_prompt if request.system_prompt else "You are an expert software architect.",
+            "messages": [{"role": "user", "content": self._content(request)}],
+            "timeout": _request_timeout(request, self.timeout)
+        }
+    
+    @staticmethod
+    def _content(request: LLMRequest):
+        """User content with a cache breakpoint after the static prefix (covers the system prompt too)."""
+        prefix, suffix = request.split_prompt()
+        if not prefix:
+            return request.prompt
+        blocks = [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+        if suffix:
+            blocks.append({"type": "text", "text": suffix})
+        return blocks
+    
+    def _to_response(self, response) -> LLMResponse:
+        return LLMResponse(
+            content=response.content[0].text,
+            raw=response,
+            success=True,
+            usage=self._usage(getattr(response, "usage", None))
+        )
+    
+    @staticmethod
+    def _usage(usage) -> Dict[str, int]:
+        # input_tokens excludes cache reads and writes; report the total input
+        if usage is None:
+            return {}
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        return {
+            "input_tokens": (usage.input_tokens or 0) + cache_read + cache_write,
+            "output_tokens": usage.output_tokens or 0,
+            "cached_input_tokens": cache_read,
+        }
 
 
 class ExternalProvider(LLMProvider):
@@ -110,11 +357,39 @@ class ExternalProvider(LLMProvider):
     
     Instead of calling an API, this collects prompts for external processing.
     Use this when the IDE (Claude, Cursor, etc.) IS your LLM.
+    
+    Pending prompts form a bounded queue keyed by content hash:
+    - Asking for the same prompt again returns the existing index instead of
+      queueing a duplicate
+    - Answered prompts leave the queue; the answer is handed out once, to
+      the next complete() of that prompt
+    - At `max_pending` unanswered prompts, new ones are refused with a
+      retryable "queue full" response, after waiting up to `put_timeout`
+      seconds for room
     """
     
-    def __init__(self):
-        self.pending_requests: List[LLMRequest] = []
-        self.responses: Dict[int, str] = {}  # request_index -> response
+    name = "external"
+    
+    def __init__(self, max_pending: int = 1000, put_timeout: Optional[float] = None):
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self.responses: Dict[int, str] = {}  # request_index -> response provided ahead of the request
+        self._pending: "OrderedDict[int, LLMRequest]" = OrderedDict()  # Unanswered, oldest first
+        self._index_by_key: Dict[str, int] = {}  # content hash -> index of unanswered prompt
+        self._key_by_index: Dict[int, str] = {}
+        self._answers: "OrderedDict[str, str]" = OrderedDict()  # content hash -> unclaimed answer
+        self._next_index = 0
+        self._room = threading.Condition()
+    
+    @property
+    def pending_requests(self) -> List[LLMRequest]:
+        """Unanswered requests, oldest first."""
+        with self._room:
+            return list(self._pending.values())
+    
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
     
     def is_available(self) -> bool:
         return True  # Always available - the IDE is the LLM
@@ -124,12 +399,33 @@ class ExternalProvider(LLMProvider):
         In external mode, we don't complete - we collect.
         The actual completion happens when a human/IDE processes the prompt.
         """
-        idx = len(self.pending_requests)
-        self.pending_requests.append(request)
-        
-        # Check if we have a pre-provided response
-        if idx in self.responses:
-            return LLMResponse(content=self.responses[idx], success=True)
+        key = self._key(request)
+        with self._room:
+            # Answered already: hand the answer out once
+            answer = self._answers.pop(key, None)
+            if answer is not None:
+                return LLMResponse(content=answer, success=True)
+            
+            idx = self._index_by_key.get(key)
+            if idx is None:
+                # Check if we have a pre-provided response
+                if self._next_index in self.responses:
+                    self._next_index += 1
+                    return LLMResponse(content=self.responses.pop(self._next_index - 1), success=True)
+                
+                if not self._room.wait_for(lambda: len(self._pending) < self.max_pending,
+                                           timeout=self.put_timeout or 0):
+                    return LLMResponse(
+                        content="",
+                        success=False,
+                        retryable=True,
+                        error=f"External queue full ({self.max_pending} prompts pending)"
+                    )
+                idx = self._next_index
+                self._next_index += 1
+                self._pending[idx] = request
+                self._index_by_key[key] = idx
+                self._key_by_index[idx] = key
         
         # Return a placeholder indicating this needs external processing
         return LLMResponse(
@@ -138,12 +434,43 @@ class ExternalProvider(LLMProvider):
             error=f"EXTERNAL_PROCESSING_REQUIRED::{idx}"
         )
     
+    async def acomplete(self, request: LLMRequest) -> LLMResponse:
+        """Collecting a prompt never blocks - no worker thread needed."""
+        if self.put_timeout:
+            return await asyncio.to_thread(self.complete, request)
+        return self.complete(request)
+    
     def provide_response(self, request_index: int, response: str):
-        """Provide a response for a pending request."""
-        self.responses[request_index] = response
+        """
+        Provide a response for a pending request.
+        
+        The prompt leaves the queue; the next complete() of the same prompt
+        returns the response. An index not issued yet is kept for the
+        request that will receive it.
+        """
+        with self._room:
+            if request_index >= self._next_index:
+                self.responses[request_index] = response
+                return
+            if self._remove(request_index):
+                key = self._key_by_index.pop(request_index)
+                self._answers[key] = response
+                # Bound unclaimed answers like pending prompts
+                while len(self._answers) > self.max_pending:
+                    self._answers.popitem(last=False)
+    
+    def discard(self, request: LLMRequest):
+        """Drop a prompt that was answered outside the provider (e.g. pipeline.provide_response)."""
+        key = self._key(request)
+        with self._room:
+            idx = self._index_by_key.get(key)
+            if idx is not None and self._remove(idx):
+                del self._key_by_index[idx]
     
     def get_pending_prompts(self) -> List[Dict[str, Any]]:
         """Get all pending prompts for external processing."""
+        with self._room:
+            pending = list(self._pending.items())
         return [
             {
                 "index": i,
@@ -151,25 +478,226 @@ class ExternalProvider(LLMProvider):
                 "prompt": r.prompt,
                 "expected_format": r.expected_format
             }
-            for i, r in enumerate(self.pending_requests)
-            if i not in self.responses
+            for i, r in pending
         ]
     
+    def _remove(self, idx: int) -> bool:
+        """Drop an unanswered prompt and wake a waiting producer. Caller holds the lock."""
+        if self._pending.pop(idx, None) is None:
+            return False
+        del self._index_by_key[self._key_by_index[idx]]
+        self._room.notify()
+        return True
+    
+    @staticmethod
+    def _key(request: LLMRequest) -> str:
+        return cache_key("external", "", request)
+    
     def export_for_ide(self) -> str:
         """Export pending prompts as a document an IDE can process."""
-        output = "# LLM Processing Required\n\n"
-        output += "The following prompts need to be processed by an LLM.\n"
-        output += "Process each one and provide the response.\n\n"
+        parts = [
+            "# LLM Processing Required\n\n",
+            "The following prompts need to be processed by an LLM.\n",
+            "Process each one and provide the response.\n\n",
+        ]
         
         for item in self.get_pending_prompts():
-            output += f"## Request {item['index']}\n\n"
+            parts.append(f"## Request {item['index']}\n\n")
             if item['system']:
-                output += f"**System:** {item['system']}\n\n"
-            output += f"**Prompt:**\n```\n{item['prompt']}\n```\n\n"
-            output += f"**Expected format:** {item['expected_format']}\n\n"
-            output += "---\n\n"
+                parts.append(f"**System:** {item['system']}\n\n")
+            parts.append(f"**Prompt:**\n```\n{item['prompt']}\n```\n\n")
+            parts.append(f"**Expected format:** {item['expected_format']}\n\n")
+            parts.append("---\n\n")
+        
+        return "".join(parts)
+
+
+class SpoolProvider(LLMProvider):
+    """
+    External mode backed by a spool directory (see core.spool).
+    
+    Each prompt becomes its own file instead of an entry in an in-memory
+    queue, so several IDE sessions or worker processes can answer prompts
+    concurrently and answers survive restarts. A prompt is answered as soon
+    as its response file exists; until then complete() returns
+    EXTERNAL_PROCESSING_REQUIRED::<spool id>.
+    """
+    
+    name = "spool"
+    
+    def __init__(self, spool: Union[Spool, str] = ".s2r_spool"):
+        self.spool = spool if isinstance(spool, Spool) else Spool(spool)
+    
+    def is_available(self) -> bool:
+        return True
+    
+    def complete(self, request: LLMRequest) -> LLMResponse:
+        request_id = self.spool.request_id(request)
+        answer = self.spool.answer(request_id)
+        if answer is not None:
+            return LLMResponse(content=answer, success=True)
+        
+        self.spool.put(request, request_id)
+        return LLMResponse(
+            content="",
+            success=False,
+            error=f"EXTERNAL_PROCESSING_REQUIRED::{request_id}"
+        )
+    
+    def discard(self, request: LLMRequest):
+        """Drop a prompt that was answered outside the spool."""
+        self.spool.remove(self.spool.request_id(request))
+    
+    def get_pending_prompts(self) -> List[Dict[str, Any]]:
+        """Unanswered prompts, without their text (it stays in the request files)."""
+        return [
+            {"index": entry.id, "title": entry.title, "expected_format": entry.expected_format}
+            for entry in self.spool.pending(include_claimed=True)
+        ]
+    
+    def export_for_ide(self) -> str:
+        """List pending prompts by file instead of inlining them."""
+        parts = [
+            "# LLM Processing Required\n\n",
+            f"Prompts are spooled in `{self.spool.root}`. Answer each one by writing\n",
+            "`responses/<id>.txt` (or `python -m core.spool answer`).\n\n",
+        ]
+        for item in self.get_pending_prompts():
+            parts.append(f"- `requests/{item['index']}.json` - {item['title']}\n")
+        return "".join(parts)
+
+
+class BatchProvider(LLMProvider):
+    """
+    Offline batch mode provider.
+    
+    Like ExternalProvider, it collects requests instead of answering them -
+    but for bulk, non-interactive runs. Collected requests are written as one
+    JSONL batch (OpenAI batch input format); the results file is ingested
+    later and repeated requests are answered from it.
+    
+    Requests are identified by a content hash, so identical prompts from
+    different pipelines become one batch line.
+    """
+    
+    name = "batch"
+    
+    def __init__(self, model: str = "gpt-4-turbo-preview", endpoint: str = "/v1/chat/completions"):
+        self.model = model
+        self.endpoint = endpoint
+        self.pending: Dict[str, LLMRequest] = {}  # custom_id -> request
+        self.results: Dict[str, str] = {}  # custom_id -> content
+        self.failures: Dict[str, str] = {}  # custom_id -> error
+    
+    def is_available(self) -> bool:
+        return True
+    
+    def request_id(self, request: LLMRequest) -> str:
+        return cache_key(self.name, self.model, request)
+    
+    def complete(self, request: LLMRequest) -> LLMResponse:
+        custom_id = self.request_id(request)
+        if custom_id in self.results:
+            return LLMResponse(content=self.results[custom_id], success=True)
+        if custom_id in self.failures:
+            return LLMResponse(content="", success=False, error=self.failures[custom_id])
+        
+        self.pending.setdefault(custom_id, request)
+        return LLMResponse(
+            content="",
+            success=False,
+            error=f"EXTERNAL_PROCESSING_REQUIRED::{custom_id}"
+        )
+    
+    def write_batch(self, path: str) -> int:
+        """Write all pending requests as a JSONL batch. Returns the line count."""
+        with open(path, "w", encoding="utf-8") as f:
+            for custom_id, request in self.pending.items():
+                f.write(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": self.endpoint,
+                    "body": {
+                        "model": self.model,
+                        "messages": request.as_messages(),
+                        "max_tokens": request.max_tokens,
+                        "temperature": request.temperature
+                    }
+                }, ensure_ascii=False))
+                f.write("\n")
+        return len(self.pending)
+    
+    def ingest_results(self, path: str) -> int:
+        """
+        Load a JSONL results file. Returns the number of answered requests.
         
-        return output
+        Accepts OpenAI batch output, Anthropic message batch results, and the
+        simple {"custom_id": ..., "content": ...} form.
+        """
+        answered = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                custom_id = item["custom_id"]
+                content, error = _batch_result_content(item)
+                if content is not None:
+                    self.results[custom_id] = content
+                    self.failures.pop(custom_id, None)
+                    answered += 1
+                else:
+                    self.failures[custom_id] = error or "Batch request failed"
+                self.pending.pop(custom_id, None)
+        return answered
+
+
+def _batch_result_content(item: Dict[str, Any]):
+    """Extract (content, error) from one batch result line."""
+    if "content" in item:
+        return item["content"], None
+    
+    # OpenAI: {"response": {"status_code": 200, "body": {"choices": [...]}}, "error": null}
+    response = item.get("response")
+    if response:
+        body = response.get("body") or {}
+        if response.get("status_code", 200) == 200 and body.get("choices"):
+            return body["choices"][0]["message"]["content"], None
+        return None, json.dumps(body.get("error") or item.get("error") or body)
+    
+    # Anthropic: {"result": {"type": "succeeded", "message": {"content": [{"text": ...}]}}}
+    result = item.get("result")
+    if result:
+        if result.get("type") == "succeeded":
+            return "".join(block.get("text", "") for block in result["message"]["content"]), None
+        return None, json.dumps(result.get("error") or {"type": result.get("type")})
+    
+    return None, json.dumps(item.get("error") or "Missing result")
+
+
+def _stream_once(provider: LLMProvider, request: LLMRequest, on_chunk: Callable[[str], None]) -> LLMResponse:
+    """One streaming attempt; a failure after the first chunk is final."""
+    chunks: List[str] = []
+    stream = provider.stream(request)
+    try:
+        while True:
+            try:
+                chunk = next(stream)
+            except StopIteration as stop:
+                usage = stop.value or {}
+                break
+            chunks.append(chunk)
+            on_chunk(chunk)
+    except StreamError as e:
+        response = e.response
+    except Exception as e:
+        response = _error_response(e)
+        response.content = "".join(chunks)
+    else:
+        return LLMResponse(content="".join(chunks), success=True, usage=usage)
+    if chunks:
+        response.retryable = False
+    return response
 
 
 class LLMInterface:
@@ -182,20 +710,46 @@ class LLMInterface:
     3. Otherwise -> external mode (IDE is the LLM)
     """
     
-    def __init__(self, mode: str = "auto"):
+    def __init__(self, mode: str = "auto", cache: Optional[ResponseCache] = None,
+                 max_concurrency: int = 16, scheduler: Optional[RequestScheduler] = None,
+                 dedupe: bool = False, provider: Optional[LLMProvider] = None):
         """
         Initialize LLM interface.
         
         Args:
-            mode: "auto", "anthropic", "openai", or "external"
+            mode: "auto", "anthropic", "openai", "external", "batch", or "spool"
+            cache: Optional response cache consulted before the provider
+            max_concurrency: Maximum in-flight acomplete() calls
+            scheduler: Optional rate-limit/retry/failover scheduler. With a
+                       scheduler, other available API providers become fallbacks.
+            dedupe: Coalesce identical concurrent complete() calls into one
+                    provider request (used by batch runs)
+            provider: Explicit provider instance; overrides mode selection
         """
         self.mode = mode
-        self.provider = self._select_provider()
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.scheduler = scheduler
+        self.provider = provider or self._select_provider()
+        self.fallbacks: List[LLMProvider] = self._select_fallbacks() if scheduler else []
+        self.dedupe = dedupe
+        # One semaphore per event loop: asyncio primitives are bound to the loop that first uses them
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
     
     def _select_provider(self) -> LLMProvider:
         if self.mode == "external":
             return ExternalProvider()
         
+        if self.mode == "batch":
+            return BatchProvider()
+        
+        if self.mode == "spool":
+            return SpoolProvider(os.getenv("S2R_SPOOL_DIR", ".s2r_spool"))
+        
         if self.mode == "anthropic" or (self.mode == "auto" and os.getenv("ANTHROPIC_API_KEY")):
             provider = AnthropicProvider()
             if provider.is_available():
@@ -209,13 +763,119 @@ class LLMInterface:
         # Fallback to external mode
         return ExternalProvider()
     
+    def _select_fallbacks(self) -> List[LLMProvider]:
+        if not self.is_internal():
+            return []
+        candidates = [AnthropicProvider(), OpenAIProvider()]
+        return [p for p in candidates if p.is_available() and p.name != self.provider.name]
+    
     def complete(self, request: LLMRequest) -> LLMResponse:
-        """Process an LLM request."""
-        return self.provider.complete(request)
+        """Process an LLM request, serving repeats from the cache."""
+        key = self._cache_key(request)
+        if key:
+            content = self.cache.get(key)
+            if content is not None:
+                return LLMResponse(content=content, success=True, cached=True)
+        
+        if not self.dedupe:
+            return self._dispatch(request, key)
+        
+        # Identical request already in flight: wait for its answer
+        key = key or cache_key(self.provider.name, self.provider.model, request)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        
+        try:
+            response = self._dispatch(request, key if self.cache is not None else None)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+    
+    def _dispatch(self, request: LLMRequest, key: Optional[str]) -> LLMResponse:
+        if self.scheduler:
+            response = self.scheduler.run([self.provider] + self.fallbacks, request)
+        else:
+            response = self.provider.complete(request)
+        if key and response.success:
+            self.cache.put(key, response.content)
+        return response
+    
+    def stream(self, request: LLMRequest, on_chunk: Callable[[str], None]) -> LLMResponse:
+        """
+        Process a request, passing each chunk to on_chunk as it arrives.
+        
+        Returns the assembled response, like complete(). A cached response
+        is delivered as a single chunk. With a scheduler, streaming gets the
+        same rate limits, retries and failover as complete() - up to the
+        first chunk; a stream that fails after delivering chunks is not
+        retried, since on_chunk has already seen part of the answer. Streams
+        are not de-duplicated.
+        """
+        key = self._cache_key(request)
+        if key:
+            content = self.cache.get(key)
+            if content is not None:
+                on_chunk(content)
+                return LLMResponse(content=content, success=True, cached=True)
+        
+        def attempt(provider: LLMProvider, request: LLMRequest) -> LLMResponse:
+            return _stream_once(provider, request, on_chunk)
+        
+        if self.scheduler:
+            response = self.scheduler.run([self.provider] + self.fallbacks, request, attempt)
+        else:
+            response = attempt(self.provider, request)
+        if key and response.success:
+            self.cache.put(key, response.content)
+        return response
+    
+    async def acomplete(self, request: LLMRequest) -> LLMResponse:
+        """Async variant of complete(), bounded by max_concurrency."""
+        key = self._cache_key(request)
+        if key:
+            content = self.cache.get(key)
+            if content is not None:
+                return LLMResponse(content=content, success=True, cached=True)
+        
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        queued_at = time.monotonic()
+        async with semaphore:
+            waited = time.monotonic() - queued_at
+            if self.scheduler:
+                response = await self.scheduler.arun([self.provider] + self.fallbacks, request)
+            else:
+                response = await self.provider.acomplete(request)
+        response.queue_time += waited
+        
+        if key and response.success:
+            self.cache.put(key, response.content)
+        return response
+    
+    async def aclose(self):
+        """Close the provider's pooled async clients."""
+        await self.provider.aclose()
+    
+    def _cache_key(self, request: LLMRequest) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return cache_key(self.provider.name, self.provider.model, request)
     
     def is_internal(self) -> bool:
         """Check if we have an internal LLM available."""
-        return not isinstance(self.provider, ExternalProvider)
+        return not isinstance(self.provider, (ExternalProvider, BatchProvider, SpoolProvider))
     
     def get_mode(self) -> str:
         """Get current mode."""
@@ -223,28 +883,51 @@ class LLMInterface:
             return "anthropic"
         elif isinstance(self.provider, OpenAIProvider):
             return "openai"
-        else:
+        elif isinstance(self.provider, BatchProvider):
+            return "batch"
+        elif isinstance(self.provider, SpoolProvider):
+            return "spool"
+        elif isinstance(self.provider, ExternalProvider):
             return "external"
+        else:
+            # Other internal providers (replay, recording) name themselves
+            return self.provider.name
     
     def get_pending_prompts(self) -> List[Dict[str, Any]]:
-        """Get pending prompts (only in external mode)."""
-        if isinstance(self.provider, ExternalProvider):
+        """Get pending prompts (only in external and spool mode)."""
+        if isinstance(self.provider, (ExternalProvider, SpoolProvider)):
             return self.provider.get_pending_prompts()
         return []
     
+    def discard_pending(self, request: LLMRequest):
+        """Remove a prompt answered outside the provider from the external queue or spool."""
+        if isinstance(self.provider, (ExternalProvider, SpoolProvider)):
+            self.provider.discard(request)
+    
     def export_for_ide(self) -> str:
-        """Export for IDE processing (only in external mode)."""
-        if isinstance(self.provider, ExternalProvider):
+        """Export for IDE processing (only in external and spool mode)."""
+        if isinstance(self.provider, (ExternalProvider, SpoolProvider)):
             return self.provider.export_for_ide()
         return "# Internal LLM mode - no export needed"
 
 
-# Singleton for easy access
-_default_interface: Optional[LLMInterface] = None
+# One shared interface per mode for easy access
+_interfaces: Dict[str, LLMInterface] = {}
+_interfaces_lock = threading.Lock()
 
-def get_llm(mode: str = "auto") -> LLMInterface:
-    """Get the LLM interface."""
-    global _default_interface
-    if _default_interface is None or _default_interface.mode != mode:
-        _default_interface = LLMInterface(mode)
-    return _default_interface
+def get_llm(mode: str = "auto", cache: Optional[ResponseCache] = None) -> LLMInterface:
+    """
+    Get the shared LLM interface for a mode.
+    
+    Asking for a different mode no longer replaces the interface other
+    pipelines are using - each mode keeps its own. Shared interfaces have no
+    cache. Passing `cache` returns a new, unshared interface that uses it,
+    so callers of the shared one never see another caller's cache.
+    """
+    if cache is not None:
+        return LLMInterface(mode, cache=cache)
+    with _interfaces_lock:
+        interface = _interfaces.get(mode)
+        if interface is None:
+            interface = _interfaces[mode] = LLMInterface(mode)
+        return interface
@@ -3,14 +3,33 @@ Core Data Models for Statement-to-Reality System
 
 These are pure data structures. No logic. No LLM calls.
 They serve as the common language between all components.
+
+Batch runs hold tens of thousands of these in memory, so they are kept lean:
+- Slotted dataclasses (no per-instance __dict__) on Python 3.10+
+- Statement timestamps are formatted on first use, not on construction
+- Speaker, component type, language and framework strings are interned
+- to_dict()/from_dict() convert to and from JSON-ready dicts. Unlike
+  dataclasses.asdict they do not deep-copy: containers are copied one level
+  down, and strings are shared.
 """
 
+import sys
+import time
 from dataclasses import dataclass, field
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from enum import Enum
 from datetime import datetime
 
 
+# dataclass(slots=True) needs Python 3.10
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def _intern(value: Any) -> Any:
+    """sys.intern for strings; anything else (e.g. None from LLM JSON) is returned as is."""
+    return sys.intern(value) if type(value) is str else value
+
+
 class StatementType(Enum):
     FUNCTIONAL = "functional"
     NON_FUNCTIONAL = "non_functional"
@@ -20,17 +39,51 @@ class StatementType(Enum):
     META = "meta"
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Statement:
-    """A single statement from a conversation."""
+    """
+    A single statement from a conversation.
+
+    `timestamp` stays None until iso_timestamp() (or to_dict()) formats it
+    from `created`; read it through iso_timestamp(), not the field.
+    """
     content: str
     speaker: str = "human"
-    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    timestamp: Optional[str] = None  # ISO 8601; formatted from `created` on first iso_timestamp()
     statement_type: Optional[StatementType] = None
     context: Dict[str, Any] = field(default_factory=dict)
+    created: float = field(default_factory=time.time, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.speaker = _intern(self.speaker)
+    
+    def iso_timestamp(self) -> str:
+        if self.timestamp is None:
+            self.timestamp = datetime.fromtimestamp(self.created).isoformat()
+        return self.timestamp
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "content": self.content,
+            "speaker": self.speaker,
+            "timestamp": self.iso_timestamp(),
+            "statement_type": self.statement_type.value if self.statement_type else None,
+            "context": dict(self.context),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Statement":
+        statement_type = data.get("statement_type")
+        return cls(
+            content=data["content"],
+            speaker=data.get("speaker", "human"),
+            timestamp=data.get("timestamp"),
+            statement_type=StatementType(statement_type) if statement_type else None,
+            context=dict(data.get("context") or {}),
+        )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Conversation:
     """A collection of statements."""
     statements: List[Statement]
@@ -43,9 +96,24 @@ class Conversation:
             f"{s.speaker}: {s.content}" 
             for s in self.statements
         ])
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "statements": [statement.to_dict() for statement in self.statements],
+            "id": self.id,
+            "metadata": dict(self.metadata),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Conversation":
+        return cls(
+            statements=[Statement.from_dict(item) for item in data.get("statements", [])],
+            id=data.get("id", "conv_001"),
+            metadata=dict(data.get("metadata") or {}),
+        )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Requirements:
     """Extracted requirements from conversation."""
     functional: List[str] = field(default_factory=list)
@@ -59,9 +127,28 @@ class Requirements:
             self.functional, self.non_functional, 
             self.constraints, self.business_rules, self.entities
         ])
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "functional": list(self.functional),
+            "non_functional": list(self.non_functional),
+            "constraints": list(self.constraints),
+            "business_rules": list(self.business_rules),
+            "entities": list(self.entities),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Requirements":
+        return cls(
+            functional=list(data.get("functional", [])),
+            non_functional=list(data.get("non_functional", [])),
+            constraints=list(data.get("constraints", [])),
+            business_rules=list(data.get("business_rules", [])),
+            entities=list(data.get("entities", [])),
+        )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Component:
     """An architectural component."""
     name: str
@@ -70,9 +157,33 @@ class Component:
     interfaces: List[str] = field(default_factory=list)
     dependencies: List[str] = field(default_factory=list)
     properties: Dict[str, Any] = field(default_factory=dict)
+    
+    def __post_init__(self):
+        self.type = _intern(self.type)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "type": self.type,
+            "responsibilities": list(self.responsibilities),
+            "interfaces": list(self.interfaces),
+            "dependencies": list(self.dependencies),
+            "properties": dict(self.properties),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Component":
+        return cls(
+            name=data["name"],
+            type=data.get("type", "service"),
+            responsibilities=list(data.get("responsibilities", [])),
+            interfaces=list(data.get("interfaces", [])),
+            dependencies=list(data.get("dependencies", [])),
+            properties=dict(data.get("properties") or {}),
+        )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Architecture:
     """System architecture."""
     components: List[Component] = field(default_factory=list)
@@ -83,9 +194,28 @@ class Architecture:
     
     def component_names(self) -> List[str]:
         return [c.name for c in self.components]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "components": [component.to_dict() for component in self.components],
+            "patterns": list(self.patterns),
+            "relationships": {source: list(targets) for source, targets in self.relationships.items()},
+            "tech_stack": dict(self.tech_stack),
+            "quality_attributes": dict(self.quality_attributes),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Architecture":
+        return cls(
+            components=[Component.from_dict(item) for item in data.get("components", [])],
+            patterns=list(data.get("patterns", [])),
+            relationships={source: list(targets) for source, targets in (data.get("relationships") or {}).items()},
+            tech_stack=dict(data.get("tech_stack") or {}),
+            quality_attributes=dict(data.get("quality_attributes") or {}),
+        )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class GeneratedCode:
     """Generated code for a single language."""
     language: str
@@ -94,9 +224,44 @@ class GeneratedCode:
     entry_point: str
     run_command: str
     dependencies: List[str] = field(default_factory=list)
+    owners: Dict[str, str] = field(default_factory=dict)  # filename -> component (or "api") that generated it
+    
+    def __post_init__(self):
+        self.language = _intern(self.language)
+        self.framework = _intern(self.framework)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "language": self.language,
+            "framework": self.framework,
+            "files": dict(self.files),
+            "entry_point": self.entry_point,
+            "run_command": self.run_command,
+            "dependencies": list(self.dependencies),
+            "owners": dict(self.owners),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GeneratedCode":
+        return cls(
+            language=data["language"],
+            framework=data["framework"],
+            files=_copy_files(data.get("files")),
+            entry_point=data.get("entry_point", ""),
+            run_command=data.get("run_command", ""),
+            dependencies=list(data.get("dependencies", [])),
+            owners=dict(data.get("owners") or {}),
+        )
 
 
-@dataclass
+def _copy_files(files) -> Dict[str, str]:
+    # Plain dicts are copied; other mappings (e.g. lazily read by core.codec) are kept as they are
+    if files is None:
+        return {}
+    return dict(files) if isinstance(files, dict) else files
+
+
+@dataclass(**_SLOTS)
 class LLMRequest:
     """A request to be processed by an LLM."""
     prompt: str
@@ -104,6 +269,15 @@ class LLMRequest:
     expected_format: str = "json"  # json, text, code
     temperature: float = 0.7
     max_tokens: int = 4000
+    deadline: Optional[float] = None  # time.monotonic() by which the answer is needed
+    cache_prefix: str = ""  # Static leading part of `prompt`, shared across calls
+    metadata: Dict[str, Any] = field(default_factory=dict)  # e.g. the compaction report
+    
+    def split_prompt(self) -> Tuple[str, str]:
+        """Split the prompt into (cacheable prefix, dynamic suffix)."""
+        if self.cache_prefix and self.prompt.startswith(self.cache_prefix):
+            return self.cache_prefix, self.prompt[len(self.cache_prefix):]
+        return "", self.prompt
     
     def as_messages(self) -> List[Dict[str, str]]:
         """Convert to OpenAI/Anthropic message format."""
@@ -112,32 +286,65 @@ class LLMRequest:
             messages.append({"role": "system", "content": self.system_prompt})
         messages.append({"role": "user", "content": self.prompt})
         return messages
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready fields; `deadline` is left out (monotonic time of this process)."""
+        return {
+            "prompt": self.prompt,
+            "system_prompt": self.system_prompt,
+            "expected_format": self.expected_format,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "cache_prefix": self.cache_prefix,
+            "metadata": dict(self.metadata),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LLMRequest":
+        return cls(
+            prompt=data["prompt"],
+            system_prompt=data.get("system_prompt", ""),
+            expected_format=data.get("expected_format", "json"),
+            temperature=data.get("temperature", 0.7),
+            max_tokens=data.get("max_tokens", 4000),
+            cache_prefix=data.get("cache_prefix", ""),
+            metadata=dict(data.get("metadata") or {}),
+        )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class LLMResponse:
     """Response from an LLM."""
     content: str
     raw: Any = None
     success: bool = True
     error: Optional[str] = None
+    cached: bool = False  # Served from ResponseCache, no provider call
+    retryable: bool = False  # Transient failure (rate limit, timeout, overload)
+    usage: Dict[str, int] = field(default_factory=dict)  # input_tokens, output_tokens, cached_input_tokens
+    queue_time: float = 0.0  # Seconds waiting for rate-limit or concurrency capacity
+    retries: int = 0  # Attempts after the first
     
     def as_json(self) -> Dict:
-        """Parse content as JSON."""
-        import json
-        try:
-            # Handle markdown code blocks
-            text = self.content
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0]
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0]
-            return json.loads(text.strip())
-        except:
-            return {}
-
-
-@dataclass 
+        """Parse content as JSON ({} if no object can be extracted)."""
+        extraction = self.extract_json()
+        return extraction.data if extraction.ok and isinstance(extraction.data, dict) else {}
+    
+    def extract_json(self) -> "JSONExtraction":
+        """Parse content as JSON, keeping the error if it fails."""
+        from core.json_extract import extract_json
+        return extract_json(self.content)
+
+
+@dataclass(**_SLOTS)
+class PipelineEvent:
+    """Progress notification emitted while a pipeline runs."""
+    kind: str  # step_started, token, file, step_completed, step_failed, speculation_*, completed
+    step: str  # parse_requirements, infer_architecture, generate_code, pipeline
+    data: Any = None
+
+
+@dataclass(**_SLOTS)
 class PipelineResult:
     """Result of the full pipeline."""
     conversation: Conversation
@@ -147,3 +354,36 @@ class PipelineResult:
     success: bool = True
     errors: List[str] = field(default_factory=list)
     llm_requests: List[LLMRequest] = field(default_factory=list)  # For external LLM mode
+    run_id: Optional[str] = None  # Checkpoint id, when checkpointing is enabled
+    usage: Dict[str, Dict[str, int]] = field(default_factory=dict)  # step -> token counts
+    timings: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # step -> timing summary
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "conversation": self.conversation.to_dict() if self.conversation else None,
+            "requirements": self.requirements.to_dict(),
+            "architecture": self.architecture.to_dict(),
+            "code": {language: code.to_dict() for language, code in self.code.items()},
+            "success": self.success,
+            "errors": list(self.errors),
+            "llm_requests": [r.to_dict() if isinstance(r, LLMRequest) else dict(r) for r in self.llm_requests],
+            "run_id": self.run_id,
+            "usage": {step: dict(counts) for step, counts in self.usage.items()},
+            "timings": {step: dict(summary) for step, summary in self.timings.items()},
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PipelineResult":
+        conversation = data.get("conversation")
+        return cls(
+            conversation=Conversation.from_dict(conversation) if conversation else None,
+            requirements=Requirements.from_dict(data.get("requirements") or {}),
+            architecture=Architecture.from_dict(data.get("architecture") or {}),
+            code={language: GeneratedCode.from_dict(code) for language, code in (data.get("code") or {}).items()},
+            success=data.get("success", True),
+            errors=list(data.get("errors", [])),
+            llm_requests=list(data.get("llm_requests", [])),  # Prompt dicts, as get_pending_prompts() returns them
+            run_id=data.get("run_id"),
+            usage=dict(data.get("usage") or {}),
+            timings=dict(data.get("timings") or {}),
+        )
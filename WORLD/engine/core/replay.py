@@ -0,0 +1,193 @@
+"""
+Replay: Deterministic Providers for Benchmarks and Offline Runs
+
+Real providers make pipeline timings noisy: a slow run may be the network,
+the model, or our own orchestration. Replay separates the two.
+
+1. RecordingProvider wraps a real provider and appends every successful
+   response to a JSONL recording
+2. ReplayProvider serves those recordings (or synthesized responses) with
+   simulated latency drawn from seeded distributions
+
+Recordings are keyed by a hash of the request content, so they replay
+regardless of which provider produced them.
+
+Usage:
+    # Record once
+    llm = LLMInterface(provider=RecordingProvider(AnthropicProvider(), "todo.jsonl"))
+    StatementToRealityPipeline(llm=llm).process("Create a todo app")
+
+    # Replay as often as needed, with provider-like timing
+    replay = ReplayProvider.from_file("todo.jsonl", first_token_latency=(0.8, 0.3),
+                                      tokens_per_second=(60, 0.2), seed=7)
+    StatementToRealityPipeline(llm=LLMInterface(provider=replay)).process("Create a todo app")
+"""
+
+import json
+import math
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from core.cache import cache_key
+from core.models import LLMRequest, LLMResponse
+from core.llm_interface import LLMProvider, StreamError
+
+
+def recording_key(request: LLMRequest) -> str:
+    """Provider-independent key of a request."""
+    return cache_key("recording", "", request)
+
+
+class RecordingProvider(LLMProvider):
+    """Passes requests to `inner` and appends successful responses to a JSONL file."""
+
+    name = "recording"
+
+    def __init__(self, inner: LLMProvider, path: str):
+        self.inner = inner
+        self.model = inner.model
+        self.path = path
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        return self.inner.is_available()
+
+    def complete(self, request: LLMRequest) -> LLMResponse:
+        response = self.inner.complete(request)
+        if response.success:
+            line = json.dumps({
+                "key": recording_key(request),
+                "content": response.content,
+                "usage": response.usage,
+            }, ensure_ascii=False)
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        return response
+
+
+class ReplayProvider(LLMProvider):
+    """
+    Serves recorded responses with simulated timing.
+
+    Latency distributions are lognormal, given as (median, sigma); a sigma
+    of 0 makes them constant. With the same seed and the same sequence of
+    requests, the simulated delays are identical between runs.
+
+    Requests without a recording are answered by `responder` if given,
+    otherwise they fail with a non-retryable error.
+    """
+
+    name = "replay"
+
+    def __init__(
+        self,
+        recordings: Optional[Dict[str, str]] = None,
+        responder: Optional[Callable[[LLMRequest], str]] = None,
+        first_token_latency: Tuple[float, float] = (0.0, 0.0),
+        tokens_per_second: Tuple[float, float] = (0.0, 0.0),
+        seed: int = 0,
+        chunk_tokens: int = 16,
+        sleep: Callable[[float], None] = time.sleep,
+        model: str = "replay",
+    ):
+        """
+        Args:
+            recordings: recording_key(request) -> response content
+            responder: Synthesizes content for unrecorded requests
+            first_token_latency: (median seconds, sigma) before the first token
+            tokens_per_second: (median rate, sigma) of output; 0 means instant
+            seed: Seed for the latency and rate draws
+            chunk_tokens: Tokens per chunk when streaming
+            sleep: Sleep function (injectable for tests)
+        """
+        self.recordings = dict(recordings or {})
+        self.responder = responder
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = chunk_tokens
+        self.model = model
+        self.calls = 0
+        self.misses = 0
+        self._rng = random.Random(seed)
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "ReplayProvider":
+        """Load a RecordingProvider JSONL file."""
+        recordings = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    recordings[item["key"]] = item["content"]
+        return cls(recordings, **kwargs)
+
+    def is_available(self) -> bool:
+        return True
+
+    def complete(self, request: LLMRequest) -> LLMResponse:
+        content, error = self._lookup(request)
+        if error:
+            return LLMResponse(content="", success=False, error=error)
+        first_token, per_token = self._timing()
+        self._wait(first_token + per_token * _tokens(content))
+        return LLMResponse(content=content, success=True, usage=_usage(request, content))
+
+    def stream(self, request: LLMRequest) -> Iterator[str]:
+        content, error = self._lookup(request)
+        if error:
+            raise StreamError(LLMResponse(content="", success=False, error=error))
+        first_token, per_token = self._timing()
+        self._wait(first_token)
+        step = self.chunk_tokens * 4
+        for start in range(0, len(content), step):
+            chunk = content[start:start + step]
+            self._wait(per_token * _tokens(chunk))
+            yield chunk
+        return _usage(request, content)
+
+    def _lookup(self, request: LLMRequest) -> Tuple[str, Optional[str]]:
+        with self._lock:
+            self.calls += 1
+        content = self.recordings.get(recording_key(request))
+        if content is not None:
+            return content, None
+        with self._lock:
+            self.misses += 1
+        if self.responder is not None:
+            return self.responder(request), None
+        return "", "No recording for request"
+
+    def _wait(self, seconds: float):
+        if seconds > 0:
+            self._sleep(seconds)
+
+    def _timing(self) -> Tuple[float, float]:
+        """Draw (first token latency, seconds per token) for one call."""
+        with self._lock:
+            first_token = _lognormal(self._rng, *self.first_token_latency)
+            rate = _lognormal(self._rng, *self.tokens_per_second)
+        return first_token, (1.0 / rate if rate > 0 else 0.0)
+
+
+def _lognormal(rng: random.Random, median: float, sigma: float) -> float:
+    if median <= 0:
+        return 0.0
+    if sigma <= 0:
+        return median
+    return rng.lognormvariate(math.log(median), sigma)
+
+
+def _tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def _usage(request: LLMRequest, content: str) -> Dict[str, int]:
+    return {
+        "input_tokens": _tokens(request.system_prompt) + _tokens(request.prompt),
+        "output_tokens": _tokens(content),
+        "cached_input_tokens": 0,
+    }
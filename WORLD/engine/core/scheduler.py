@@ -0,0 +1,309 @@
+"""
+Request Scheduler: Rate Limits, Retries and Failover
+
+A single 429 or timeout used to fail the whole pipeline run - and the rerun
+paid for every earlier step again. The scheduler sits between LLMInterface
+and the providers and turns transient failures into waits:
+
+1. RATE LIMITS: Per-provider token buckets for requests/min and tokens/min
+2. RETRIES: Jittered exponential backoff for retryable errors
+3. DEADLINES: Never sleeps or calls past LLMRequest.deadline
+4. FAILOVER: A circuit breaker per provider; when one opens, requests go
+   to the next configured provider
+
+Non-retryable failures (bad request, external processing required) are
+returned immediately, unchanged.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.models import LLMRequest, LLMResponse
+
+
+@dataclass
+class RateLimit:
+    """Provider limits. None means unlimited."""
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+
+
+def estimate_request_tokens(request: LLMRequest) -> int:
+    """Rough token cost of a request: prompt (~4 chars/token) plus the completion budget."""
+    return (len(request.system_prompt) + len(request.prompt)) // 4 + request.max_tokens
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations.
+
+    reserve() always succeeds and returns how long the caller must wait
+    before using what it reserved. Reservations may drive the bucket into
+    debt, which keeps concurrent callers in FIFO order.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive retryable failures.
+
+    While open, the provider is skipped. After `reset_timeout` seconds one
+    trial request is let through (half-open); success closes the breaker.
+    Other callers are refused until the trial settles, or until it has been
+    outstanding for another `reset_timeout` (a trial that never reported back).
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_started: Optional[float] = None
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether the caller may use the provider; half-open, only the caller that gets the trial."""
+        with self._lock:
+            state = self.state
+            if state != "half_open":
+                return state == "closed"
+            now = self._clock()
+            if self.trial_started is not None and now - self.trial_started < self.reset_timeout:
+                return False
+            self.trial_started = now
+            return True
+
+    def release(self):
+        """Give back a trial that ended without a verdict on the provider (a non-retryable error)."""
+        with self._lock:
+            self.trial_started = None
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.trial_started = None
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                # A failed half-open trial re-opens for another full timeout
+                self.opened_at = self._clock()
+
+
+class RequestScheduler:
+    """
+    Schedules requests over one or more providers.
+
+    Usage:
+        scheduler = RequestScheduler(limits={
+            "anthropic": RateLimit(requests_per_minute=50, tokens_per_minute=40_000),
+            "openai": RateLimit(requests_per_minute=500),
+        })
+        llm = LLMInterface("auto", scheduler=scheduler)
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, RateLimit]] = None,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        rng: Optional[random.Random] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Args:
+            limits: Rate limits per provider name ("openai", "anthropic", ...)
+            max_retries: Retries per request after the first attempt
+            base_delay: First backoff delay in seconds (doubles per retry)
+            max_delay: Upper bound of a single backoff delay
+            failure_threshold: Consecutive failures that open a provider's breaker
+            reset_timeout: Seconds before an open breaker allows a trial request
+        """
+        self.limits = limits or {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._rng = rng or random.Random()
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets: Dict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    # =========================================================================
+    # Public API
+    # =========================================================================
+
+    def run(self, providers: List, request: LLMRequest,
+            call: Optional[Callable[[object, LLMRequest], LLMResponse]] = None) -> LLMResponse:
+        """
+        Complete a request, retrying and failing over as needed.
+
+        The response's queue_time is the time spent waiting for rate-limit
+        capacity; retries is the number of attempts after the first.
+
+        `call(provider, request)` makes one attempt; the default is
+        provider.complete. LLMInterface.stream passes one that streams, and
+        marks a failure after chunks were delivered as not retryable.
+        """
+        call = call or (lambda provider, request: provider.complete(request))
+        attempt = 0
+        queued = 0.0
+        while True:
+            provider, wait, failure = self._plan(providers, request)
+            if failure:
+                return _annotate(failure, queued, attempt)
+            if wait:
+                self._sleep(wait)
+                queued += wait
+
+            response = call(provider, request)
+            delay, final = self._settle(provider, request, response, attempt)
+            if final is not None:
+                return _annotate(final, queued, attempt)
+            self._sleep(delay)
+            attempt += 1
+
+    async def arun(self, providers: List, request: LLMRequest) -> LLMResponse:
+        """Async version of run(); waits without blocking the event loop."""
+        attempt = 0
+        queued = 0.0
+        while True:
+            provider, wait, failure = self._plan(providers, request)
+            if failure:
+                return _annotate(failure, queued, attempt)
+            if wait:
+                await asyncio.sleep(wait)
+                queued += wait
+
+            response = await provider.acomplete(request)
+            delay, final = self._settle(provider, request, response, attempt)
+            if final is not None:
+                return _annotate(final, queued, attempt)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def breaker(self, provider_name: str) -> CircuitBreaker:
+        with self._lock:
+            if provider_name not in self._breakers:
+                self._breakers[provider_name] = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout, self._clock
+                )
+            return self._breakers[provider_name]
+
+    # =========================================================================
+    # Internals
+    # =========================================================================
+
+    def _remaining(self, request: LLMRequest) -> Optional[float]:
+        if request.deadline is None:
+            return None
+        return request.deadline - self._clock()
+
+    def _plan(self, providers: List, request: LLMRequest):
+        """Pick a provider and reserve rate-limit capacity. Returns (provider, wait, failure)."""
+        remaining = self._remaining(request)
+        if remaining is not None and remaining <= 0:
+            return None, 0.0, LLMResponse(content="", success=False, error="Deadline exceeded")
+
+        provider = next((p for p in providers if self.breaker(p.name).allow()), None)
+        if provider is None:
+            return None, 0.0, LLMResponse(
+                content="", success=False, retryable=True,
+                error="All providers unavailable (circuit open)"
+            )
+
+        wait = self._reserve(provider.name, request)
+        if remaining is not None and wait >= remaining:
+            self.breaker(provider.name).release()
+            return None, 0.0, LLMResponse(
+                content="", success=False, retryable=True,
+                error=f"Rate limit wait of {wait:.1f}s exceeds deadline"
+            )
+        return provider, wait, None
+
+    def _reserve(self, provider_name: str, request: LLMRequest) -> float:
+        with self._lock:
+            if provider_name not in self._buckets:
+                limit = self.limits.get(provider_name, RateLimit())
+                self._buckets[provider_name] = (
+                    TokenBucket(limit.requests_per_minute, clock=self._clock)
+                    if limit.requests_per_minute else None,
+                    TokenBucket(limit.tokens_per_minute, clock=self._clock)
+                    if limit.tokens_per_minute else None,
+                )
+            requests_bucket, tokens_bucket = self._buckets[provider_name]
+
+        wait = 0.0
+        if requests_bucket:
+            wait = max(wait, requests_bucket.reserve(1))
+        if tokens_bucket:
+            wait = max(wait, tokens_bucket.reserve(estimate_request_tokens(request)))
+        return wait
+
+    def _settle(self, provider, request: LLMRequest, response: LLMResponse, attempt: int):
+        """Record the outcome. Returns (backoff delay, final response or None to retry)."""
+        breaker = self.breaker(provider.name)
+        if response.success:
+            breaker.record_success()
+            return 0.0, response
+        if not response.retryable:
+            breaker.release()
+            return 0.0, response
+
+        breaker.record_failure()
+        if attempt >= self.max_retries:
+            return 0.0, response
+
+        # Full jitter: uniform over [0, capped exponential]
+        delay = self._rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        remaining = self._remaining(request)
+        if remaining is not None and delay >= remaining:
+            return 0.0, response
+        return delay, None
+
+
+def _annotate(response: LLMResponse, queued: float, attempt: int) -> LLMResponse:
+    response.queue_time += queued
+    response.retries = attempt
+    return response
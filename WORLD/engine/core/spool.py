@@ -0,0 +1,293 @@
+"""
+Spool: File-Backed Prompt Exchange for External Mode
+
+ExternalProvider keeps pending prompts in memory: one process, one IDE
+session, and one export document holding every prompt. A spool directory
+moves the exchange to files instead:
+
+1. REQUESTS: One JSON file per prompt (requests/<id>.json), published
+   atomically - readers never see a half-written prompt
+2. INDEX: One JSON line per spooled or removed prompt (index.jsonl), so
+   readers pick up new prompts by reading only the lines they have not seen
+3. RESPONSES: One file per answer (responses/<id>.txt), written atomically
+   by whoever answered it
+4. CLAIMS: An exclusive-create marker (claims/<id>), so concurrent workers
+   do not answer the same prompt twice
+
+Prompt ids are content hashes: the same prompt from several pipelines is
+spooled once, and any number of processes can share a spool.
+
+Usage:
+    # Pipeline side (pipeline.SpoolSession resumes runs automatically)
+    llm = LLMInterface(provider=SpoolProvider(Spool("spool/")))
+
+    # Worker side: an IDE session, a script, another machine on a shared disk
+    spool = Spool("spool/")
+    for entry in spool.pending():
+        if spool.claim(entry.id, "worker-1"):
+            spool.respond(entry.id, answer(spool.request(entry.id)))
+
+Command line (from WORLD/engine):
+    python -m core.spool list spool/
+    python -m core.spool show spool/ <id>
+    python -m core.spool answer spool/ <id> response.json   # "-" reads stdin
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from core.cache import cache_key
+from core.models import LLMRequest
+
+
+INDEX = "index.jsonl"
+REQUESTS = "requests"
+RESPONSES = "responses"
+CLAIMS = "claims"
+
+
+@dataclass
+class SpoolEntry:
+    """One spooled prompt, as listed in the index."""
+    id: str
+    created: float
+    title: str = ""  # First line of the prompt instructions
+    expected_format: str = "json"
+
+
+class Spool:
+    """A spool directory. Safe to share between threads and processes."""
+
+    def __init__(self, root: str = ".s2r_spool"):
+        self.root = root
+        for sub in (REQUESTS, RESPONSES, CLAIMS):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+        self._index_path = os.path.join(root, INDEX)
+        self._entries: "OrderedDict[str, SpoolEntry]" = OrderedDict()
+        self._offset = 0  # Bytes of the index already read
+        self._responses_mtime = self._mtime(RESPONSES)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def request_id(request: LLMRequest) -> str:
+        return cache_key("spool", "", request)
+
+    # =========================================================================
+    # Pipeline side
+    # =========================================================================
+
+    def put(self, request: LLMRequest, request_id: Optional[str] = None) -> str:
+        """Spool a prompt unless it is spooled already. Returns its id."""
+        request_id = request_id or self.request_id(request)
+        if _publish(self._path(REQUESTS, request_id), json.dumps(request.to_dict(), ensure_ascii=False)):
+            instructions = request.cache_prefix or request.prompt
+            self._append({
+                "op": "put",
+                "id": request_id,
+                "created": time.time(),
+                "title": instructions.strip().split("\n", 1)[0][:100],
+                "expected_format": request.expected_format,
+            })
+        return request_id
+
+    def answer(self, request_id: str) -> Optional[str]:
+        """The response to a prompt, or None while it is unanswered."""
+        try:
+            with open(self._path(RESPONSES, request_id), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def answered(self) -> Set[str]:
+        """Ids of every answered prompt (one directory listing)."""
+        return {
+            name[:-len(".txt")] for name in os.listdir(os.path.join(self.root, RESPONSES))
+            if name.endswith(".txt") and not name.startswith(".")
+        }
+
+    def remove(self, request_id: str):
+        """Drop a prompt, its claim and its answer."""
+        for sub in (REQUESTS, RESPONSES, CLAIMS):
+            try:
+                os.unlink(self._path(sub, request_id))
+            except FileNotFoundError:
+                pass
+        self._append({"op": "remove", "id": request_id})
+
+    def wait(self, timeout: float, interval: float = 0.5) -> bool:
+        """
+        Block until a response file appears or `timeout` seconds pass.
+
+        Polls the modification time of the responses directory, so each
+        check is a single stat. Returns True if responses changed.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            mtime = self._mtime(RESPONSES)
+            if mtime != self._responses_mtime:
+                self._responses_mtime = mtime
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(interval, remaining))
+
+    # =========================================================================
+    # Worker side
+    # =========================================================================
+
+    def entries(self) -> List[SpoolEntry]:
+        """Every spooled prompt, oldest first."""
+        with self._lock:
+            self._refresh()
+            return list(self._entries.values())
+
+    def pending(self, include_claimed: bool = False) -> List[SpoolEntry]:
+        """Unanswered prompts, oldest first; claimed ones only if asked."""
+        answered = self.answered()
+        claimed = set() if include_claimed else set(os.listdir(os.path.join(self.root, CLAIMS)))
+        return [e for e in self.entries() if e.id not in answered and e.id not in claimed]
+
+    def request(self, request_id: str) -> LLMRequest:
+        with open(self._path(REQUESTS, request_id), encoding="utf-8") as f:
+            return LLMRequest.from_dict(json.load(f))
+
+    def claim(self, request_id: str, owner: str = "") -> bool:
+        """Reserve a prompt for one worker. False if another worker holds it."""
+        try:
+            fd = os.open(self._path(CLAIMS, request_id), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(owner)
+        return True
+
+    def release(self, request_id: str):
+        """Give up a claim without answering."""
+        try:
+            os.unlink(self._path(CLAIMS, request_id))
+        except FileNotFoundError:
+            pass
+
+    def respond(self, request_id: str, response: str):
+        """Atomically write the answer to a prompt."""
+        _write_atomic(self._path(RESPONSES, request_id), response)
+
+    # =========================================================================
+    # Files
+    # =========================================================================
+
+    def _path(self, sub: str, request_id: str) -> str:
+        if not request_id.isalnum():
+            raise ValueError(f"Invalid spool id: {request_id!r}")
+        suffix = {REQUESTS: ".json", RESPONSES: ".txt", CLAIMS: ""}[sub]
+        return os.path.join(self.root, sub, request_id + suffix)
+
+    def _mtime(self, sub: str) -> int:
+        return os.stat(os.path.join(self.root, sub)).st_mtime_ns
+
+    def _append(self, item: Dict):
+        # One write() per line: O_APPEND keeps concurrent writers' lines whole
+        with open(self._index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+    def _refresh(self):
+        """Apply index lines written since the last read. Caller holds the lock."""
+        try:
+            with open(self._index_path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b"\n") + 1  # Leave a line still being written for later
+        self._offset += end
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if item.pop("op") == "put":
+                self._entries[item["id"]] = SpoolEntry(**item)
+            else:
+                self._entries.pop(item["id"], None)
+
+
+def _write_atomic(path: str, text: str):
+    """Write via a temp file in the same directory and rename into place."""
+    directory = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _publish(path: str, text: str) -> bool:
+    """Atomically create `path` unless it exists. True if this call created it."""
+    directory = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.link(tmp, path)  # Fails if another process published first
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.unlink(tmp)
+
+
+# =============================================================================
+# Command line
+# =============================================================================
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.spool",
+                                     description="Answer spooled pipeline prompts")
+    commands = parser.add_subparsers(dest="command", required=True)
+    listing = commands.add_parser("list", help="List unanswered prompts")
+    listing.add_argument("root")
+    listing.add_argument("--all", action="store_true", help="Include claimed prompts")
+    show = commands.add_parser("show", help="Print one prompt")
+    show.add_argument("root")
+    show.add_argument("id")
+    answer = commands.add_parser("answer", help="Answer one prompt from a file")
+    answer.add_argument("root")
+    answer.add_argument("id")
+    answer.add_argument("file", help="Response file, or - for stdin")
+    args = parser.parse_args(argv)
+
+    spool = Spool(args.root)
+    if args.command == "list":
+        for entry in spool.pending(include_claimed=args.all):
+            print(f"{entry.id}  {entry.title}")
+    elif args.command == "show":
+        request = spool.request(args.id)
+        if request.system_prompt:
+            print(f"**System:** {request.system_prompt}\n")
+        print(f"**Prompt:**\n```\n{request.prompt}\n```\n")
+        print(f"**Expected format:** {request.expected_format}")
+    else:
+        if args.file == "-":
+            text = sys.stdin.read()
+        else:
+            with open(args.file, encoding="utf-8") as f:
+                text = f.read()
+        spool.respond(args.id, text)
+        spool.release(args.id)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""
+Fan-Out Generation: One Request per Component
+
+generate_full_application asks for the whole application in one response.
+That response grows with the architecture, and a single truncation loses
+everything.
+
+Fan-out mode asks for each component separately (generate_component_code)
+plus the API layer (generate_api_endpoints), runs the requests concurrently,
+and merges the returned `files` dicts into one GeneratedCode-shaped result.
+Latency becomes roughly that of the slowest component.
+
+Each component is asked to keep its files under a directory named after it.
+Files that several parts legitimately share (dependency manifests such as
+requirements.txt, package.json and go.mod, package __init__.py files) are
+merged; any other path written twice with different
+content is a collision.
+"""
+
+import asyncio
+import fnmatch
+import json
+import posixpath
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple, Any, Optional
+
+from core.models import Architecture, LLMRequest, LLMResponse
+from prompts.core_prompts import generate_component_code, generate_api_endpoints
+
+
+API_PART = "api"
+
+# Shared files merged line by line (one entry per line, order kept)
+LINE_MERGED_FILES = ("requirements*.txt", "go.sum", ".gitignore", ".dockerignore")
+# Shared files merged by appending each part's content once
+BLOCK_MERGED_FILES = ("__init__.py",)
+
+_GO_REQUIRE = re.compile(r"^require\s*\(\s*$")
+
+
+def merge_shared(filename: str, existing: str, content: str) -> Optional[str]:
+    """
+    Merge two versions of a shared file, or None if `filename` is not shared.
+
+    Line-merged files keep every distinct line, in first-seen order.
+    Block-merged files get `content` appended unless it is already in
+    `existing`. package.json objects are merged key by key and go.mod
+    require lists module by module; where both set a value (a name, a
+    version), `existing` wins. A manifest that does not parse is not merged.
+    """
+    basename = posixpath.basename(filename.replace("\\", "/"))
+    if any(fnmatch.fnmatch(basename, pattern) for pattern in LINE_MERGED_FILES):
+        lines = existing.splitlines()
+        seen = {line.strip() for line in lines}
+        for line in content.splitlines():
+            if line.strip() not in seen:
+                seen.add(line.strip())
+                lines.append(line)
+        return "\n".join(lines) + "\n"
+    if basename in BLOCK_MERGED_FILES:
+        if content.strip() in existing:
+            return existing
+        if not existing.strip():
+            return content
+        return existing.rstrip("\n") + "\n\n" + content
+    if basename == "package.json":
+        return _merge_package_json(existing, content)
+    if basename == "go.mod":
+        return _merge_go_mod(existing, content)
+    return None
+
+
+def _merge_package_json(existing: str, content: str) -> Optional[str]:
+    try:
+        first, second = json.loads(existing), json.loads(content)
+    except ValueError:
+        return None
+    if not isinstance(first, dict) or not isinstance(second, dict):
+        return None
+    return json.dumps(_merge_json(first, second), indent=2) + "\n"
+
+
+def _merge_json(first: Any, second: Any) -> Any:
+    if isinstance(first, dict) and isinstance(second, dict):
+        merged = dict(first)
+        for key, value in second.items():
+            merged[key] = _merge_json(first[key], value) if key in first else value
+        return merged
+    if isinstance(first, list) and isinstance(second, list):
+        return first + [item for item in second if item not in first]
+    return first
+
+
+def _parse_go_mod(text: str) -> Tuple[List[str], Dict[str, str]]:
+    """(directive lines other than require, {module path: version})."""
+    directives, requires = [], {}
+    in_block = False
+    for line in text.splitlines():
+        stripped = line.split("//", 1)[0].strip()
+        if in_block:
+            if stripped == ")":
+                in_block = False
+            elif stripped:
+                module, _, version = stripped.partition(" ")
+                requires.setdefault(module, version.strip())
+        elif _GO_REQUIRE.match(stripped):
+            in_block = True
+        elif stripped.startswith("require "):
+            module, _, version = stripped[len("require "):].strip().partition(" ")
+            requires.setdefault(module, version.strip())
+        elif stripped:
+            directives.append(stripped)
+    if in_block:
+        raise ValueError("Unterminated require block")
+    return directives, requires
+
+
+def _merge_go_mod(existing: str, content: str) -> Optional[str]:
+    try:
+        directives, requires = _parse_go_mod(existing)
+        other_directives, other_requires = _parse_go_mod(content)
+    except ValueError:
+        return None
+    keywords = {line.split()[0] for line in directives if line.split()[0] in ("module", "go", "toolchain")}
+    for line in other_directives:
+        if line.split()[0] not in keywords and line not in directives:
+            directives.append(line)
+    for module, version in other_requires.items():
+        requires.setdefault(module, version)
+    lines = list(directives)
+    if requires:
+        lines += ["", "require ("] + [f"\t{module} {version}" for module, version in requires.items()] + [")"]
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class FanOutResult:
+    """Merged output of a fan-out generation."""
+    files: Dict[str, str] = field(default_factory=dict)
+    owners: Dict[str, str] = field(default_factory=dict)  # filename -> part name
+    dependencies: List[str] = field(default_factory=list)
+    entry_point: str = ""
+    run_command: str = ""
+    collisions: Dict[str, List[str]] = field(default_factory=dict)  # filename -> parts
+    errors: List[str] = field(default_factory=list)
+    usage: Dict[str, int] = field(default_factory=dict)  # Token counts summed over parts
+
+    @property
+    def success(self) -> bool:
+        return not self.errors and not self.collisions
+
+    def as_code_data(self) -> Dict[str, Any]:
+        """Shape the merge like a generate_full_application response."""
+        data: Dict[str, Any] = {"files": self.files, "dependencies": self.dependencies, "owners": self.owners}
+        if self.entry_point:
+            data["entry_point"] = self.entry_point
+        if self.run_command:
+            data["run_command"] = self.run_command
+        return data
+
+    def error_message(self) -> str:
+        messages = list(self.errors)
+        for filename, parts in self.collisions.items():
+            messages.append(f"Path collision on '{filename}' between {', '.join(parts)}")
+        return "; ".join(messages)
+
+
+def build_requests(architecture: Architecture, language: str, framework: str,
+                   deadline: Optional[float] = None,
+                   token_budget: Optional[int] = None,
+                   parts: Optional[Set[str]] = None) -> List[Tuple[str, LLMRequest]]:
+    """One (part name, request) per component, plus the API layer - or only `parts`."""
+    requests = [
+        (component.name, generate_component_code(component, architecture, language, framework, token_budget))
+        for component in architecture.components
+        if parts is None or component.name in parts
+    ]
+    if parts is None or API_PART in parts:
+        requests.append((API_PART, generate_api_endpoints(architecture, language, framework)))
+    for part, request in requests:
+        request.deadline = deadline
+        request.metadata["part"] = part
+    return requests
+
+
+def merge_parts(parts: List[Tuple[str, LLMResponse]]) -> FanOutResult:
+    """
+    Merge per-part responses into one file set.
+
+    Two parts writing the same path with identical content is fine. Shared
+    files (see merge_shared) are merged and left without an owner. Any other
+    difference is a collision - neither version silently wins.
+    """
+    result = FanOutResult()
+    seen_dependencies = set()
+    shared = set()
+
+    for part, response in parts:
+        for name, count in response.usage.items():
+            result.usage[name] = result.usage.get(name, 0) + count
+        if not response.success:
+            result.errors.append(f"{part}: {response.error or 'generation failed'}")
+            continue
+
+        extraction = response.extract_json()
+        if not extraction.ok or not isinstance(extraction.data, dict):
+            result.errors.append(f"{part}: invalid JSON ({extraction.error or 'not an object'})")
+            continue
+        data = extraction.data
+        files, dependencies = data.get("files", {}), data.get("dependencies", [])
+        if not isinstance(files, dict) or not all(isinstance(c, str) for c in files.values()):
+            result.errors.append(f"{part}: 'files' must map paths to file contents")
+            continue
+        if not isinstance(dependencies, list) or not all(isinstance(d, str) for d in dependencies):
+            result.errors.append(f"{part}: 'dependencies' must be a list of strings")
+            continue
+        for filename, content in files.items():
+            if filename not in result.files:
+                result.files[filename] = content
+                result.owners[filename] = part
+                continue
+            if result.files[filename] == content:
+                continue
+            merged = merge_shared(filename, result.files[filename], content)
+            if merged is not None:
+                result.files[filename] = merged
+                shared.add(filename)
+            else:
+                result.collisions.setdefault(filename, [result.owners[filename]]).append(part)
+
+        for dependency in dependencies:
+            if dependency not in seen_dependencies:
+                seen_dependencies.add(dependency)
+                result.dependencies.append(dependency)
+
+        if part == API_PART:
+            result.entry_point = data.get("entry_point", "")
+            result.run_command = data.get("run_command", "")
+
+    for filename in shared:
+        del result.owners[filename]  # Shared between parts
+    return result
+
+
+def generate(llm, architecture: Architecture, language: str, framework: str,
+             max_workers: int = 8, deadline: Optional[float] = None,
+             token_budget: Optional[int] = None, parts: Optional[Set[str]] = None) -> FanOutResult:
+    """Run the fan-out requests on a bounded thread pool and merge them."""
+    requests = build_requests(architecture, language, framework, deadline, token_budget, parts)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(requests)))) as pool:
+        responses = list(pool.map(lambda item: llm.complete(item[1]), requests))
+    return merge_parts([(part, response) for (part, _), response in zip(requests, responses)])
+
+
+async def agenerate(llm, architecture: Architecture, language: str, framework: str,
+                    max_workers: int = 8, deadline: Optional[float] = None,
+                    token_budget: Optional[int] = None, parts: Optional[Set[str]] = None) -> FanOutResult:
+    """Async fan-out, bounded by max_workers on top of the interface's own limit."""
+    requests = build_requests(architecture, language, framework, deadline, token_budget, parts)
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+
+    async def run(request: LLMRequest) -> LLMResponse:
+        async with semaphore:
+            return await llm.acomplete(request)
+
+    responses = await asyncio.gather(*[run(request) for _, request in requests])
+    return merge_parts([(part, response) for (part, _), response in zip(requests, responses)])
@@ -0,0 +1,202 @@
+"""
+Incremental Regeneration: Only Rebuild What a Change Touches
+
+Editing one requirement used to rerun requirements -> architecture -> full
+application and regenerate every file. An incremental run compares the new
+requirements and architecture with the previous run and regenerates only
+the files owned by affected components:
+
+1. DIFF: Components are matched by name. A component has changed when its
+   type, responsibilities, interfaces, dependencies or relationships
+   differ. Added and removed components are listed separately. A change to
+   patterns, tech stack or quality attributes affects every component.
+2. AFFECTED: Changed and added components, plus components that depend on
+   (or have a relationship to) one whose interfaces changed, or that was
+   added or removed. Internal changes do not ripple to dependents.
+3. OWNERS: GeneratedCode.owners maps each file to the component that
+   generated it. Affected components are regenerated with one fan-out
+   request each. Their old files and the files of removed components are
+   dropped, and everything else is kept byte for byte.
+
+Partial regeneration needs recorded owners, i.e. a fan-out baseline. Code
+from a single generate_full_application request has none, and its layout
+need not match the per-component directories of fan-out, so it is
+regenerated in full. Files a fan-out merge left without an owner are
+shared. They are kept, and a regenerated part may replace them.
+
+Usage:
+    plan = plan_regeneration(old_architecture, new_architecture, old_code)
+    merged = fan_out.generate(llm, new_architecture, "python", "fastapi",
+                              parts=set(plan.regenerate))
+    result = combine(old_code, plan, merged)   # FanOutResult with every file
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+
+from core.models import Architecture, Component, GeneratedCode, Requirements
+from generators.fan_out import API_PART, FanOutResult, merge_shared
+
+
+REQUIREMENT_FIELDS = ("functional", "non_functional", "constraints", "business_rules", "entities")
+
+
+
+def diff_requirements(old: Requirements, new: Requirements) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Per requirement field, the items added and removed.
+
+    Empty when the requirements are the same; reordering is not a change.
+    """
+    diff = {}
+    for name in REQUIREMENT_FIELDS:
+        before, after = getattr(old, name), getattr(new, name)
+        added = [item for item in after if item not in before]
+        removed = [item for item in before if item not in after]
+        if added or removed:
+            diff[name] = {"added": added, "removed": removed}
+    return diff
+
+
+@dataclass
+class ArchitectureDiff:
+    """Component-level difference between two architectures."""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    interfaces_changed: List[str] = field(default_factory=list)  # Subset of changed
+    global_changed: bool = False  # Patterns, tech stack or quality attributes
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.changed or self.global_changed)
+
+
+def diff_architecture(old: Architecture, new: Architecture) -> ArchitectureDiff:
+    old_components = {c.name: c for c in old.components}
+    new_components = {c.name: c for c in new.components}
+    diff = ArchitectureDiff(
+        added=[name for name in new_components if name not in old_components],
+        removed=[name for name in old_components if name not in new_components],
+        global_changed=(
+            set(old.patterns) != set(new.patterns)
+            or old.tech_stack != new.tech_stack
+            or old.quality_attributes != new.quality_attributes
+        ),
+    )
+    for name, component in new_components.items():
+        previous = old_components.get(name)
+        if previous is None:
+            continue
+        if _signature(previous, old) != _signature(component, new):
+            diff.changed.append(name)
+        if set(previous.interfaces) != set(component.interfaces):
+            diff.interfaces_changed.append(name)
+    return diff
+
+
+def affected_components(diff: ArchitectureDiff, architecture: Architecture) -> Set[str]:
+    """Components of `architecture` whose code must be regenerated."""
+    if diff.global_changed:
+        return set(architecture.component_names())
+    affected = set(diff.changed) | set(diff.added)
+    ripple = set(diff.interfaces_changed) | set(diff.added) | set(diff.removed)
+    for component in architecture.components:
+        if set(_links(component, architecture)) & ripple:
+            affected.add(component.name)
+    return affected
+
+
+@dataclass
+class RegenerationPlan:
+    """What an incremental run regenerates, drops and keeps for one target."""
+    diff: ArchitectureDiff
+    regenerate: List[str] = field(default_factory=list)  # Fan-out parts: component names and "api"
+    dropped: List[str] = field(default_factory=list)  # Files replaced by the regenerated parts
+    kept: List[str] = field(default_factory=list)  # Files carried over unchanged
+    owners: Dict[str, str] = field(default_factory=dict)  # Owners of the previous files
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        return {"regenerate": self.regenerate, "dropped": self.dropped, "kept": self.kept}
+
+
+def plan_regeneration(old: Architecture, new: Architecture, code: GeneratedCode) -> RegenerationPlan:
+    """Decide which parts to regenerate for `code`, generated from `old`, now that it is `new`."""
+    diff = diff_architecture(old, new)
+    affected = affected_components(diff, new)
+    regenerate = [name for name in new.component_names() if name in affected]
+    if diff.global_changed or diff.added or diff.removed or diff.interfaces_changed:
+        regenerate.append(API_PART)
+
+    if not code.owners:
+        # No recorded owners (single-request code): regenerate every part
+        plan = RegenerationPlan(diff=diff, regenerate=new.component_names() + [API_PART])
+        plan.dropped = list(code.files)
+        return plan
+
+    replaced = set(regenerate) | set(diff.removed)
+    plan = RegenerationPlan(diff=diff, regenerate=regenerate, owners=dict(code.owners))
+    for path in code.files:
+        (plan.dropped if code.owners.get(path) in replaced else plan.kept).append(path)
+    return plan
+
+
+def combine(code: GeneratedCode, plan: RegenerationPlan, merged: FanOutResult) -> FanOutResult:
+    """
+    Kept files of `code` plus the regenerated parts in `merged`.
+
+    A regenerated file may replace a shared (unowned) file, and shared files
+    such as requirements.txt are merged (see fan_out.merge_shared). Replacing
+    any other file of a component that was not regenerated is a collision,
+    as in fan-out.
+    """
+    result = FanOutResult(
+        usage=dict(merged.usage),
+        errors=list(merged.errors),
+        collisions={path: list(parts) for path, parts in merged.collisions.items()},
+        entry_point=merged.entry_point or code.entry_point,
+        run_command=merged.run_command or code.run_command,
+    )
+    for path in plan.kept:
+        result.files[path] = code.files[path]
+        if path in plan.owners:
+            result.owners[path] = plan.owners[path]
+
+    for path, content in merged.files.items():
+        if path in result.files and result.files[path] != content:
+            shared = merge_shared(path, result.files[path], content)
+            if shared is not None:
+                result.files[path] = shared
+                result.owners.pop(path, None)
+                continue
+        owner = result.owners.get(path)
+        if owner is not None and result.files[path] != content:
+            result.collisions.setdefault(path, [owner]).append(merged.owners[path])
+            continue
+        result.files[path] = content
+        result.owners[path] = merged.owners[path]
+
+    result.dependencies = list(code.dependencies)
+    for dependency in merged.dependencies:
+        if dependency not in result.dependencies:
+            result.dependencies.append(dependency)
+    return result
+
+
+# =============================================================================
+# Helpers
+# =============================================================================
+
+def _links(component: Component, architecture: Architecture) -> List[str]:
+    return list(component.dependencies) + list(architecture.relationships.get(component.name, []))
+
+
+def _signature(component: Component, architecture: Architecture):
+    return (
+        component.type,
+        frozenset(component.responsibilities),
+        frozenset(component.interfaces),
+        frozenset(_links(component, architecture)),
+        json.dumps(component.properties, sort_keys=True, default=str),
+    )
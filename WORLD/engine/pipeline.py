@@ -15,15 +15,29 @@ The key insight: The intelligence comes from LLM processing.
 This pipeline orchestrates WHAT to ask, the LLM provides the intelligence.
 """
 
+import os
 import json
-from typing import Optional, Dict, List, Any
-from dataclasses import asdict
+import time
+import asyncio
+import uuid
+import heapq
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Optional, Dict, List, Any, Callable, Iterator, Tuple
 
 from core.models import (
     Statement, Conversation, Requirements, Architecture, Component,
-    GeneratedCode, PipelineResult, LLMRequest, LLMResponse
+    GeneratedCode, PipelineResult, PipelineEvent, LLMRequest, LLMResponse
 )
-from core.llm_interface import LLMInterface, get_llm
+from core.llm_interface import LLMInterface, BatchProvider, SpoolProvider, get_llm
+from core.cache import ResponseCache
+from core.json_stream import IncrementalJSONParser
+from core.json_extract import extract_json
+from core import checkpoint
+from core.checkpoint import CheckpointStore
+from core.instrumentation import Instrumentation, InstrumentedLLM, StepRecord, summarize
+from generators import fan_out, incremental
 from prompts.core_prompts import (
     parse_requirements,
     infer_architecture,
@@ -42,6 +56,18 @@ class StatementToRealityPipeline:
         pipeline = StatementToRealityPipeline()
         result = pipeline.process("Create a todo app with auth")
         
+    Usage (several targets from one architecture):
+        result = pipeline.process("Create a todo app", targets=[
+            ("python", "fastapi"), ("typescript", "express"), ("go", "gin")
+        ])
+        result.code["go"]
+        
+    Usage (incremental update of a checkpointed run):
+        pipeline = StatementToRealityPipeline(checkpoints=CheckpointStore())
+        result = pipeline.process("Create a todo app with auth")
+        result = pipeline.update(result.run_id, "Create a todo app with auth and tags")
+        pipeline.plans["python"].regenerate   # only the affected components
+        
     Usage (External mode with IDE):
         pipeline = StatementToRealityPipeline(mode="external")
         result = pipeline.process("Create a todo app with auth")
@@ -51,16 +77,53 @@ class StatementToRealityPipeline:
         result = pipeline.continue_processing()
     """
     
-    def __init__(self, mode: str = "auto"):
+    def __init__(self, mode: str = "auto", llm: Optional[LLMInterface] = None,
+                 generation: str = "single", max_workers: int = 8,
+                 on_event: Optional[Callable[[PipelineEvent], None]] = None,
+                 checkpoints: Optional[CheckpointStore] = None, run_id: Optional[str] = None,
+                 prompt_budget: Optional[int] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 speculative: bool = False):
         """
         Initialize pipeline.
         
         Args:
             mode: "auto" (try API, fallback to external), "external" (IDE mode), 
                   "anthropic", or "openai"
+            llm: Explicit LLM interface (e.g. one with a ResponseCache);
+                 overrides mode
+            generation: "single" (one generate_full_application request) or
+                        "fan_out" (one request per component, run concurrently)
+            max_workers: Concurrent requests in fan_out generation
+            on_event: Progress callback. When set, LLM steps stream their
+                      output and emit token/file events as it arrives.
+            checkpoints: Store that receives the pipeline state after every step
+            run_id: Checkpoint id for every run of this pipeline; if omitted,
+                    each process() gets a fresh one
+            prompt_budget: Token budget for the architecture in code generation
+                           prompts; larger architectures are compacted to fit
+            instrumentation: Hook receiving a StepRecord for every LLM call,
+                             parse/assembly stage and step
+            speculative: Opt-in. Stream the requirements and start
+                         architecture inference as soon as the functional
+                         requirements and entities are complete (internal
+                         mode, sync pipeline). The result is used only if the
+                         final requirements add nothing else, so the output
+                         never changes. It only pays off for functional-only
+                         input: any non-functional requirement, constraint or
+                         business rule discards it, and the run pays for one
+                         extra infer_architecture call. Leave it off unless
+                         your statements are mostly functional
+                         (bench_pipeline's speculative_realistic workload
+                         reports the discard rate and wasted calls).
         """
-        self.llm = get_llm(mode)
+        self.llm = llm or get_llm(mode)
         self.mode = self.llm.get_mode()
+        self.generation = generation
+        self.max_workers = max_workers
+        self.on_event = on_event
+        self.prompt_budget = prompt_budget
+        self.speculative = speculative
         
         # Pipeline state
         self.conversation: Optional[Conversation] = None
@@ -71,14 +134,101 @@ class StatementToRealityPipeline:
         # For external mode
         self.pending_step: Optional[str] = None
         self.pending_request: Optional[LLMRequest] = None
+        self.pending_target: Optional[Tuple[str, str]] = None  # (language, framework) of a pending generate_code
+        self.last_error: Optional[str] = None
+        
+        # time.monotonic() deadline stamped on every LLM request of a run
+        self.deadline: Optional[float] = None
+        
+        # Checkpointing
+        self.checkpoints = checkpoints
+        self.run_id = run_id
+        self._fixed_run_id = run_id
+        self.language = "python"
+        self.framework = "fastapi"
+        self.targets: List[Tuple[str, str]] = [("python", "fastapi")]
+        self.completed_steps: List[str] = []
+        self._new_session = False
+        self._saved: Optional[Dict[str, Any]] = None
+        
+        # Token counts per step (input, output, cached input)
+        self.usage: Dict[str, Dict[str, int]] = {}
+        self._usage_lock = threading.Lock()
+        
+        # Timing records of the current run, also forwarded to `instrumentation`
+        self.records: List[StepRecord] = []
+        self.hooks = Instrumentation([self.records.append])
+        if instrumentation is not None:
+            self.hooks.add(instrumentation)
+        
+        # Incremental updates: the previous run, and what was regenerated per language
+        self.baseline: Optional[PipelineResult] = None
+        self.plans: Dict[str, incremental.RegenerationPlan] = {}
+        
+        # Architecture inference started while requirements were streaming
+        self._speculation: Optional[_Speculation] = None
+        
+        # Set when a process_events() consumer stops early; checked between steps
+        self._cancelled = threading.Event()
     
-    def process(self, input_text: str, language: str = "python", framework: str = "fastapi") -> PipelineResult:
+    def process(self, input_text: str, language: str = "python", framework: str = "fastapi",
+                timeout: Optional[float] = None,
+                targets: Optional[List[Tuple[str, str]]] = None) -> PipelineResult:
         """
         Process a statement through the full pipeline.
         
         In internal mode: runs to completion.
         In external mode: runs until LLM processing needed, then pauses.
+        
+        timeout: Seconds for the whole run. Propagated to every LLM call as a
+                 deadline, so retries and rate-limit waits never overshoot it.
+        targets: (language, framework) pairs to generate code for. Requirements
+                 and architecture are computed once; code generation runs
+                 concurrently per target (one at a time in external mode).
+                 Defaults to [(language, framework)].
+        """
+        self._begin(input_text, language, framework, timeout, targets)
+        return self._run_steps(language, framework)
+    
+    def resume(self, run_id: str, timeout: Optional[float] = None) -> PipelineResult:
+        """
+        Continue a checkpointed run, skipping every step already completed.
+        
+        Requires a CheckpointStore. Language and framework come from the checkpoint.
+        """
+        language, framework = self._restore(run_id)
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self._new_session = True
+        return self._run_steps(language, framework)
+    
+    def update(self, run_id: str, input_text=None, requirements: Optional[Requirements] = None,
+               architecture: Optional[Architecture] = None,
+               timeout: Optional[float] = None) -> PipelineResult:
         """
+        Re-run a checkpointed run after its input changed, regenerating only what changed.
+        
+        Give the new statement (requirements are parsed again), edited
+        requirements, or an edited architecture. Requirements equal to the
+        previous ones keep the previous architecture. Otherwise the new
+        architecture is inferred with the previous one for reference. It is
+        then diffed against it, and only files of affected components are
+        regenerated (see generators.incremental). self.plans holds the
+        RegenerationPlan per language.
+        
+        Partial regeneration sends one request per affected component, so it
+        needs an internal LLM. In external mode code is regenerated in full.
+        """
+        self._begin_update(run_id, input_text, requirements, architecture, timeout)
+        return self._run_steps(self.language, self.framework)
+    
+    def _begin(self, input_text, language: str, framework: str, timeout: Optional[float],
+               targets: Optional[List[Tuple[str, str]]] = None, run_id: Optional[str] = None):
+        """Reset state for a fresh run (`run_id`: continue under an existing id, as update() does)."""
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.baseline = None
+        self.plans = {}
+        self._speculation = None
+        
         # Create conversation from input
         if isinstance(input_text, str):
             self.conversation = Conversation(
@@ -88,103 +238,543 @@ class StatementToRealityPipeline:
         else:
             self.conversation = input_text
         
+        self.requirements = None
+        self.architecture = None
+        self.code = {}
+        self._start_run(language, framework, targets, run_id)
+    
+    def _begin_update(self, run_id: str, input_text, requirements: Optional[Requirements],
+                      architecture: Optional[Architecture], timeout: Optional[float]):
+        """Load a checkpointed run as the baseline of an incremental update."""
+        self._restore(run_id)
+        baseline = PipelineResult(
+            conversation=self.conversation,
+            requirements=self.requirements or Requirements(),
+            architecture=self.architecture or Architecture(),
+            code=dict(self.code),
+            run_id=run_id
+        )
+        previous_requirements, saved = self.requirements, self._saved
+        self._begin(self.conversation if input_text is None else input_text,
+                    self.language, self.framework, timeout, self.targets, run_id)
+        self._saved = saved  # Same run: keep its creation time and session count
+        self.baseline = baseline
+        self.pending_step = None
+        self.pending_request = None
+        self.pending_target = None
+        if requirements is not None:
+            self.requirements = requirements
+        elif input_text is None:
+            self.requirements = previous_requirements
+        self.architecture = architecture
+    
+    def _run_steps(self, language: str, framework: str) -> PipelineResult:
+        while True:
+            if self._cancelled.is_set():
+                return self._fail("Cancelled")
+            result = self._advance(language, framework)
+            if result is not None:
+                return result
+    
+    def _advance(self, language: str, framework: str) -> Optional[PipelineResult]:
+        """
+        Run the next incomplete step.
+        
+        Returns the final PipelineResult once the run has finished or failed,
+        None while steps remain.
+        """
         # Step 1: Parse requirements
-        requirements_result = self._step_parse_requirements()
-        if not requirements_result.success:
-            return self._create_result(success=False, errors=[requirements_result.error or "Failed to parse requirements"])
+        if self.requirements is None:
+            requirements_result = self._step_parse_requirements()
+            if not requirements_result.success:
+                return self._fail(requirements_result.error or "Failed to parse requirements")
+            self._checkpoint("parse_requirements")
+            return None
         
         # Step 2: Infer architecture
-        architecture_result = self._step_infer_architecture()
-        if not architecture_result.success:
-            return self._create_result(success=False, errors=[architecture_result.error or "Failed to infer architecture"])
+        if self.architecture is None:
+            architecture_result = self._step_infer_architecture()
+            if not architecture_result.success:
+                return self._fail(architecture_result.error or "Failed to infer architecture")
+            self._checkpoint("infer_architecture")
+            return None
         
-        # Step 3: Generate code
-        code_result = self._step_generate_code(language, framework)
-        if not code_result.success:
-            return self._create_result(success=False, errors=[code_result.error or "Failed to generate code"])
+        # Step 3: Generate code, per target
+        missing = self._missing_targets()
+        if missing:
+            if len(missing) > 1 and self.llm.is_internal():
+                with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+                    results = list(pool.map(lambda target: self._step_generate_code(*target), missing))
+            else:
+                results = [self._step_generate_code(*missing[0])]
+            error = self._target_errors(missing, results)
+            if error:
+                return self._fail(error)
+            self._checkpoint("generate_code" if not self._missing_targets() else None)
+            return None
         
         return self._create_result(success=True)
     
+    def _missing_targets(self) -> List[Tuple[str, str]]:
+        return [target for target in self.targets if target[0] not in self.code]
+    
+    def _target_errors(self, targets: List[Tuple[str, str]], results: List[LLMResponse]) -> Optional[str]:
+        """Combined error of failed targets, or None. A single target keeps its error as is."""
+        failed = [(target, result) for target, result in zip(targets, results) if not result.success]
+        if not failed:
+            return None
+        if len(targets) == 1:
+            return failed[0][1].error or "Failed to generate code"
+        return "; ".join(f"{language}/{framework}: {result.error or 'Failed to generate code'}"
+                         for (language, framework), result in failed)
+    
+    # =========================================================================
+    # Checkpoints
+    # =========================================================================
+    
+    def _start_run(self, language: str, framework: str,
+                   targets: Optional[List[Tuple[str, str]]] = None, run_id: Optional[str] = None):
+        self.language = language
+        self.framework = framework
+        self.targets = [tuple(target) for target in targets] if targets else [(language, framework)]
+        languages = [language for language, _ in self.targets]
+        if len(set(languages)) != len(languages):
+            raise ValueError("Targets must use distinct languages (PipelineResult.code is keyed by language)")
+        self.completed_steps = []
+        self._new_session = True
+        self._saved = None
+        self.usage = {}
+        self.records.clear()
+        # A new run never writes over the checkpoint of the previous one
+        self.run_id = run_id or self._fixed_run_id
+        if self.checkpoints is not None and self.run_id is None:
+            self.run_id = uuid.uuid4().hex[:12]
+    
+    def _checkpoint(self, completed_step: Optional[str] = None, errors: Optional[List[str]] = None):
+        """Persist pipeline state after a step (no-op without a CheckpointStore)."""
+        if completed_step and completed_step not in self.completed_steps:
+            self.completed_steps.append(completed_step)
+        if completed_step and completed_step == self.pending_step:
+            # Answered after a resume (e.g. from batch results)
+            self.pending_step = None
+            self.pending_request = None
+            self.pending_target = None
+        if self.checkpoints is None or self.run_id is None:
+            return
+        self._saved = checkpoint.build_save(
+            self.run_id, self._saved, self.conversation, self.requirements,
+            self.architecture, self.code, self.language, self.framework,
+            self.completed_steps, self.pending_step, self.pending_request,
+            errors, new_session=self._new_session,
+            targets=self.targets, pending_target=self.pending_target
+        )
+        self._new_session = False
+        self.checkpoints.save(self.run_id, self._saved)
+    
+    def _restore(self, run_id: str) -> Tuple[str, str]:
+        if self.checkpoints is None:
+            raise ValueError("resume() requires a CheckpointStore")
+        saved = self.checkpoints.load(run_id)
+        if saved is None:
+            raise KeyError(f"No checkpoint for run {run_id!r}")
+        
+        state = saved["pipeline"]
+        self.run_id = run_id
+        self._saved = saved
+        self.language = state["language"]
+        self.framework = state["framework"]
+        self.completed_steps = list(state["completed_steps"])
+        self.conversation = checkpoint.decode_conversation(state["conversation"])
+        self.requirements = (checkpoint.decode_requirements(state["requirements"])
+                             if state["requirements"] else None)
+        self.architecture = (checkpoint.decode_architecture(state["architecture"])
+                             if state["architecture"] else None)
+        self.code = {lang: checkpoint.decode_code(data) for lang, data in state["code"].items()}
+        self.pending_step = state["pending_step"]
+        self.pending_request = (checkpoint.decode_request(state["pending_request"])
+                                if state["pending_request"] else None)
+        self.targets = [tuple(target) for target in state.get("targets") or [(self.language, self.framework)]]
+        self.pending_target = tuple(state["pending_target"]) if state.get("pending_target") else None
+        return self.language, self.framework
+    
+    def _fail(self, error: str) -> PipelineResult:
+        self._checkpoint(errors=[error])
+        return self._create_result(success=False, errors=[error])
+    
     def _step_parse_requirements(self) -> LLMResponse:
         """Step 1: Parse requirements from conversation."""
-        request = parse_requirements(self.conversation)
-        response = self.llm.complete(request)
-        
-        if response.success:
-            data = response.as_json()
-            self.requirements = Requirements(
-                functional=data.get("functional", []),
-                non_functional=data.get("non_functional", []),
-                constraints=data.get("constraints", []),
-                business_rules=data.get("business_rules", []),
-                entities=data.get("entities", [])
-            )
-        elif "EXTERNAL_PROCESSING_REQUIRED" in (response.error or ""):
-            self.pending_step = "parse_requirements"
-            self.pending_request = request
-        
-        return response
+        with self.hooks.step("parse_requirements", self.run_id):
+            request = parse_requirements(self.conversation)
+            parser = self._speculation_parser() if self.speculative and self.llm.is_internal() else None
+            response = self._complete("parse_requirements", request, parser=parser)
+            return self._handle_requirements(request, response)
     
     def _step_infer_architecture(self) -> LLMResponse:
         """Step 2: Infer architecture from requirements."""
         if not self.requirements:
             return LLMResponse(content="", success=False, error="No requirements to process")
         
-        request = infer_architecture(self.requirements)
-        response = self.llm.complete(request)
-        
-        if response.success:
-            data = response.as_json()
-            
-            # Parse components
-            components = []
-            for comp_data in data.get("components", []):
-                components.append(Component(
-                    name=comp_data.get("name", "Unknown"),
-                    type=comp_data.get("type", "service"),
-                    responsibilities=comp_data.get("responsibilities", []),
-                    interfaces=comp_data.get("interfaces", []),
-                    dependencies=comp_data.get("dependencies", [])
-                ))
-            
-            self.architecture = Architecture(
-                components=components,
-                patterns=data.get("patterns", []),
-                relationships=data.get("relationships", {}),
-                tech_stack=data.get("tech_stack", {}),
-                quality_attributes=data.get("quality_attributes", {})
-            )
-        elif "EXTERNAL_PROCESSING_REQUIRED" in (response.error or ""):
-            self.pending_step = "infer_architecture"
-            self.pending_request = request
+        if self._reuse_architecture():
+            return LLMResponse(content="", success=True)
         
-        return response
+        with self.hooks.step("infer_architecture", self.run_id):
+            speculative = self._speculative_architecture()
+            if speculative is not None:
+                return self._handle_architecture(*speculative)
+            request = infer_architecture(self.requirements, self._baseline_architecture())
+            response = self._complete("infer_architecture", request)
+            return self._handle_architecture(request, response)
     
     def _step_generate_code(self, language: str, framework: str) -> LLMResponse:
         """Step 3: Generate code from architecture."""
         if not self.architecture:
             return LLMResponse(content="", success=False, error="No architecture to process")
         
-        request = generate_full_application(self.architecture, language, framework)
-        response = self.llm.complete(request)
+        with self.hooks.step("generate_code", self.run_id):
+            plan = self._regeneration_plan(language, framework)
+            if plan is not None:
+                self._emit("step_started", "generate_code")
+                merged = fan_out.generate(self._fan_out_llm(), self.architecture, language, framework,
+                                          self.max_workers, self.deadline, self.prompt_budget,
+                                          set(plan.regenerate))
+                response = self._handle_incremental(plan, merged, language, framework)
+                self._emit_finished("generate_code", response)
+                return response
+            
+            if self._use_fan_out():
+                self._emit("step_started", "generate_code")
+                merged = fan_out.generate(self._fan_out_llm(), self.architecture, language, framework,
+                                          self.max_workers, self.deadline, self.prompt_budget)
+                response = self._handle_fan_out(merged, language, framework)
+                self._emit_finished("generate_code", response)
+                return response
+            
+            request = generate_full_application(self.architecture, language, framework, self.prompt_budget)
+            response = self._complete("generate_code", request, watch_files=True)
+            return self._handle_code(request, response, language, framework)
+    
+    # =========================================================================
+    # Streaming & Progress Events
+    # =========================================================================
+    
+    def _complete(self, step: str, request: LLMRequest, watch_files: bool = False,
+                  parser: Optional[IncrementalJSONParser] = None) -> LLMResponse:
+        """
+        Run one LLM call; stream it and emit progress events when observed.
+        
+        A `parser` also makes the call stream, and is fed every chunk.
+        """
+        request.deadline = self.deadline
+        if self.on_event is None and parser is None:
+            response = self.hooks.llm_call(step, "complete", request,
+                                           lambda: self.llm.complete(request), self.run_id)
+            self._record_usage(step, response.usage)
+            return response
         
+        self._emit("step_started", step)
+        parsers = [parser] if parser else []
+        if watch_files:
+            parsers.append(IncrementalJSONParser(
+                watch=[("files", "*")],
+                on_value=lambda path, content: self._emit(
+                    "file", step, {"path": path[1], "content": content}
+                )
+            ))
+        
+        def on_chunk(chunk: str):
+            self._emit("token", step, chunk)
+            for watcher in parsers:
+                watcher.feed(chunk)
+        
+        response = self.hooks.llm_call(step, "stream", request,
+                                       lambda: self.llm.stream(request, on_chunk), self.run_id)
+        self._record_usage(step, response.usage)
+        self._emit_finished(step, response)
+        return response
+    
+    def _fan_out_llm(self) -> InstrumentedLLM:
+        """The LLM interface as seen by fan-out: one record per part."""
+        return InstrumentedLLM(self.llm, self.hooks, "generate_code", self.run_id,
+                               name=lambda request: request.metadata.get("part", "complete"))
+    
+    def _record_usage(self, step: str, usage: Dict[str, int]):
+        with self._usage_lock:
+            totals = self.usage.setdefault(step, {})
+            for name, count in usage.items():
+                totals[name] = totals.get(name, 0) + count
+    
+    def _emit(self, kind: str, step: str, data: Any = None):
+        if self.on_event is not None:
+            self.on_event(PipelineEvent(kind=kind, step=step, data=data))
+    
+    def _emit_finished(self, step: str, response: LLMResponse):
         if response.success:
-            data = response.as_json()
-            
-            self.code[language] = GeneratedCode(
-                language=language,
-                framework=framework,
-                files=data.get("files", {}),
-                entry_point=data.get("entry_point", "main.py"),
-                run_command=data.get("run_command", "python main.py"),
-                dependencies=data.get("dependencies", [])
-            )
-        elif "EXTERNAL_PROCESSING_REQUIRED" in (response.error or ""):
-            self.pending_step = "generate_code"
-            self.pending_request = request
+            self._emit("step_completed", step)
+        else:
+            self._emit("step_failed", step, response.error)
+    
+    def process_events(self, input_text: str, language: str = "python",
+                       framework: str = "fastapi") -> Iterator[PipelineEvent]:
+        """
+        Run process() and yield progress events as they happen.
+        
+        The last event has kind "completed" and carries the PipelineResult.
+        A consumer that stops early does not wait for the run: it is
+        cancelled and stops after the step in progress, in the background.
+        
+        Usage:
+            for event in pipeline.process_events("Create a todo app"):
+                if event.kind == "file":
+                    show(event.data["path"], event.data["content"])
+        """
+        events: "queue.Queue[Any]" = queue.Queue()
+        callback = self.on_event
+        cancelled = self._cancelled = threading.Event()
+        
+        def forward(event: PipelineEvent):
+            if not cancelled.is_set():
+                events.put(event)
+            if callback is not None:
+                callback(event)
         
+        def run():
+            try:
+                result = self.process(input_text, language, framework)
+                events.put(PipelineEvent(kind="completed", step="pipeline", data=result))
+            except BaseException as e:
+                events.put(e)
+            finally:
+                self.on_event = callback
+                events.put(None)
+        
+        self.on_event = forward
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        finished = False
+        try:
+            while True:
+                item = events.get()
+                if item is None:
+                    finished = True
+                    break
+                if isinstance(item, BaseException):
+                    finished = True
+                    raise item
+                yield item
+        finally:
+            if finished:
+                worker.join()
+            else:
+                cancelled.set()  # The daemon thread winds down on its own
+    
+    # =========================================================================
+    # Step Results (shared by sync, async and external flows)
+    # =========================================================================
+    
+    def _handle_requirements(self, request: LLMRequest, response: LLMResponse) -> LLMResponse:
+        if not response.success:
+            self._mark_pending("parse_requirements", request, response)
+            return response
+        with self.hooks.stage("parse_requirements", "parse", self.run_id) as record:
+            data, error = self._parse_json_response(response.content)
+            record.success = error is None
+        if error:
+            return self._invalid_json("parse_requirements", response, error)
+        with self.hooks.stage("parse_requirements", "assemble", self.run_id):
+            self._apply_requirements(data)
+        return response
+    
+    def _handle_architecture(self, request: LLMRequest, response: LLMResponse) -> LLMResponse:
+        if not response.success:
+            self._mark_pending("infer_architecture", request, response)
+            return response
+        with self.hooks.stage("infer_architecture", "parse", self.run_id) as record:
+            data, error = self._parse_json_response(response.content)
+            record.success = error is None
+        if error:
+            return self._invalid_json("infer_architecture", response, error)
+        with self.hooks.stage("infer_architecture", "assemble", self.run_id):
+            self._apply_architecture(data)
+        return response
+    
+    def _handle_code(self, request: LLMRequest, response: LLMResponse,
+                     language: str, framework: str) -> LLMResponse:
+        if not response.success:
+            self._mark_pending("generate_code", request, response, (language, framework))
+            return response
+        with self.hooks.stage("generate_code", "parse", self.run_id) as record:
+            data, error = self._parse_json_response(response.content)
+            record.success = error is None
+        if error:
+            return self._invalid_json("generate_code", response, error)
+        with self.hooks.stage("generate_code", "assemble", self.run_id):
+            self._apply_code(data, language, framework)
         return response
     
+    def _invalid_json(self, step: str, response: LLMResponse, error: str) -> LLMResponse:
+        return LLMResponse(
+            content=response.content,
+            raw=response.raw,
+            success=False,
+            error=f"Invalid JSON from {step}: {error}"
+        )
+    
+    def _use_fan_out(self) -> bool:
+        # External mode answers one prompt at a time, so it always uses one request
+        return self.generation == "fan_out" and self.llm.is_internal()
+    
+    def _handle_fan_out(self, merged: fan_out.FanOutResult, language: str, framework: str,
+                        generated: Optional[Dict[str, str]] = None) -> LLMResponse:
+        """Apply merged fan-out output; `generated` limits the file events (default: every file)."""
+        self._record_usage("generate_code", merged.usage)
+        if not merged.success:
+            return LLMResponse(content="", success=False, error=merged.error_message())
+        with self.hooks.stage("generate_code", "assemble", self.run_id):
+            self._apply_code(merged.as_code_data(), language, framework)
+        for path, content in (merged.files if generated is None else generated).items():
+            self._emit("file", "generate_code", {"path": path, "content": content})
+        return LLMResponse(content="", success=True)
+    
+    # =========================================================================
+    # Incremental Updates
+    # =========================================================================
+    
+    def _baseline_architecture(self) -> Optional[Architecture]:
+        """The previous run's architecture, during an update."""
+        if self.baseline is not None and self.baseline.architecture.components:
+            return self.baseline.architecture
+        return None
+    
+    def _reuse_architecture(self) -> bool:
+        """During an update, unchanged requirements keep the previous architecture."""
+        previous = self._baseline_architecture()
+        if previous is None or incremental.diff_requirements(self.baseline.requirements, self.requirements):
+            return False
+        self.architecture = previous
+        return True
+    
+    def _regeneration_plan(self, language: str, framework: str) -> Optional[incremental.RegenerationPlan]:
+        """What to regenerate for a target during an update; None means generate it in full."""
+        previous = self._baseline_architecture()
+        code = self.baseline.code.get(language) if self.baseline is not None else None
+        if previous is None or code is None or code.framework != framework or not self.llm.is_internal():
+            return None
+        if not code.owners:
+            # Single-request code records no owners; its layout need not match fan-out's
+            return None
+        plan = incremental.plan_regeneration(previous, self.architecture, code)
+        self.plans[language] = plan
+        return plan
+    
+    def _handle_incremental(self, plan: incremental.RegenerationPlan, merged: fan_out.FanOutResult,
+                            language: str, framework: str) -> LLMResponse:
+        combined = incremental.combine(self.baseline.code[language], plan, merged)
+        return self._handle_fan_out(combined, language, framework, generated=merged.files)
+    
+    # =========================================================================
+    # Speculative Architecture
+    # =========================================================================
+    
+    def _speculation_parser(self) -> IncrementalJSONParser:
+        """Watches the requirements stream; starts inference once functional and entities close."""
+        seen: Dict[str, List[str]] = {}
+        
+        def on_value(path: Tuple, value: Any):
+            seen[path[0]] = value if isinstance(value, list) else []
+            if self._speculation is None and "functional" in seen and "entities" in seen:
+                self._speculate(Requirements(functional=seen["functional"], entities=seen["entities"]))
+        
+        return IncrementalJSONParser(watch=[("functional",), ("entities",)], on_value=on_value)
+    
+    def _speculate(self, basis: Requirements):
+        """Start infer_architecture from partial requirements in a background thread."""
+        request = infer_architecture(basis, self._baseline_architecture())
+        request.deadline = self.deadline
+        speculation = self._speculation = _Speculation(basis, request)
+        self._emit("speculation_started", "infer_architecture")
+        
+        def run():
+            try:
+                response = self.hooks.llm_call("infer_architecture", "speculative", request,
+                                               lambda: self.llm.complete(request), self.run_id)
+                self._record_usage("infer_architecture", response.usage)
+            except Exception as e:
+                response = LLMResponse(content="", success=False, error=str(e))
+            speculation.response = response
+            speculation.done.set()
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def _speculative_architecture(self) -> Optional[Tuple[LLMRequest, LLMResponse]]:
+        """
+        The speculative (request, response) if it still applies, else None.
+        
+        It applies only when the request built from the final requirements
+        is the one it sent: same functional requirements and entities, and
+        no non-functional requirements, constraints or business rules, which
+        it was inferred without. Otherwise it is discarded without waiting;
+        a call still in flight finishes in the background and is ignored.
+        """
+        speculation, self._speculation = self._speculation, None
+        if speculation is None:
+            return None
+        with self.hooks.stage("infer_architecture", "speculation", self.run_id) as record:
+            final = infer_architecture(self.requirements, self._baseline_architecture())
+            valid = (final.system_prompt == speculation.request.system_prompt
+                     and final.prompt == speculation.request.prompt)
+            if valid:
+                speculation.done.wait()
+            record.success = valid and speculation.response.success
+        self._emit("speculation_accepted" if record.success else "speculation_discarded",
+                   "infer_architecture")
+        return (speculation.request, speculation.response) if record.success else None
+    
+    def _mark_pending(self, step: str, request: LLMRequest, response: LLMResponse,
+                      target: Optional[Tuple[str, str]] = None):
+        if "EXTERNAL_PROCESSING_REQUIRED" in (response.error or ""):
+            self.pending_step = step
+            self.pending_request = request
+            self.pending_target = target
+    
+    def _apply_requirements(self, data: Dict):
+        self.requirements = Requirements(
+            functional=data.get("functional", []),
+            non_functional=data.get("non_functional", []),
+            constraints=data.get("constraints", []),
+            business_rules=data.get("business_rules", []),
+            entities=data.get("entities", [])
+        )
+    
+    def _apply_architecture(self, data: Dict):
+        components = []
+        for comp_data in data.get("components", []):
+            components.append(Component(
+                name=comp_data.get("name", "Unknown"),
+                type=comp_data.get("type") or "service",
+                responsibilities=comp_data.get("responsibilities", []),
+                interfaces=comp_data.get("interfaces", []),
+                dependencies=comp_data.get("dependencies", [])
+            ))
+        
+        self.architecture = Architecture(
+            components=components,
+            patterns=data.get("patterns", []),
+            relationships=data.get("relationships", {}),
+            tech_stack=data.get("tech_stack", {}),
+            quality_attributes=data.get("quality_attributes", {})
+        )
+    
+    def _apply_code(self, data: Dict, language: str, framework: str):
+        self.code[language] = GeneratedCode(
+            language=language,
+            framework=framework,
+            files=data.get("files", {}),
+            entry_point=data.get("entry_point", "main.py"),
+            run_command=data.get("run_command", "python main.py"),
+            dependencies=data.get("dependencies", []),
+            owners=data.get("owners", {})
+        )
+    
     def _create_result(self, success: bool, errors: List[str] = None) -> PipelineResult:
         """Create pipeline result."""
         return PipelineResult(
@@ -194,7 +784,10 @@ class StatementToRealityPipeline:
             code=self.code,
             success=success,
             errors=errors or [],
-            llm_requests=self.llm.get_pending_prompts() if hasattr(self.llm, 'get_pending_prompts') else []
+            llm_requests=self.llm.get_pending_prompts() if hasattr(self.llm, 'get_pending_prompts') else [],
+            run_id=self.run_id,
+            usage=self.usage,
+            timings=summarize(self.records)
         )
     
     # =========================================================================
@@ -221,99 +814,217 @@ class StatementToRealityPipeline:
         if not self.pending_step:
             return False
         
-        # Parse response based on step
+        # Parse response based on step; keep the step pending if unusable
+        data, error = self._parse_json_response(response_text)
+        if error:
+            self.last_error = f"Invalid JSON from {self.pending_step}: {error}"
+            return False
+        
         if self.pending_step == "parse_requirements":
-            data = self._parse_json_response(response_text)
-            self.requirements = Requirements(
-                functional=data.get("functional", []),
-                non_functional=data.get("non_functional", []),
-                constraints=data.get("constraints", []),
-                business_rules=data.get("business_rules", []),
-                entities=data.get("entities", [])
-            )
-            
+            self._apply_requirements(data)
         elif self.pending_step == "infer_architecture":
-            data = self._parse_json_response(response_text)
-            components = []
-            for comp_data in data.get("components", []):
-                components.append(Component(
-                    name=comp_data.get("name", "Unknown"),
-                    type=comp_data.get("type", "service"),
-                    responsibilities=comp_data.get("responsibilities", []),
-                    interfaces=comp_data.get("interfaces", []),
-                    dependencies=comp_data.get("dependencies", [])
-                ))
-            self.architecture = Architecture(
-                components=components,
-                patterns=data.get("patterns", []),
-                relationships=data.get("relationships", {}),
-                tech_stack=data.get("tech_stack", {}),
-                quality_attributes=data.get("quality_attributes", {})
-            )
-            
+            self._apply_architecture(data)
         elif self.pending_step == "generate_code":
-            data = self._parse_json_response(response_text)
-            self.code["python"] = GeneratedCode(
-                language="python",
-                framework="fastapi",
-                files=data.get("files", {}),
-                entry_point=data.get("entry_point", "main.py"),
-                run_command=data.get("run_command", "python main.py"),
-                dependencies=data.get("dependencies", [])
-            )
+            language, framework = self.pending_target or (self.language, self.framework)
+            self._apply_code(data, language, framework)
         
+        if self.pending_request is not None:
+            self.llm.discard_pending(self.pending_request)
+        completed = self.pending_step
+        if completed == "generate_code" and self._missing_targets():
+            completed = None  # Other targets still need code
         self.pending_step = None
         self.pending_request = None
+        self.pending_target = None
+        self.last_error = None
+        self._checkpoint(completed)
         return True
     
-    def _parse_json_response(self, text: str) -> Dict:
-        """Parse JSON from response text."""
-        try:
-            # Handle markdown code blocks
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0]
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0]
-            return json.loads(text.strip())
-        except:
-            return {}
+    def _parse_json_response(self, text: str) -> Tuple[Dict, Optional[str]]:
+        """Parse JSON from response text. Returns (data, error)."""
+        extraction = extract_json(text)
+        if not extraction.ok:
+            return {}, extraction.error
+        if not isinstance(extraction.data, dict):
+            return {}, f"Expected a JSON object, got {type(extraction.data).__name__}"
+        return extraction.data, None
     
     def export_for_ide(self) -> str:
         """Export current state for IDE processing."""
-        output = "# Statement-to-Reality Pipeline\n\n"
-        output += f"## Mode: {self.mode}\n\n"
+        parts = ["# Statement-to-Reality Pipeline\n\n", f"## Mode: {self.mode}\n\n"]
         
         if self.conversation:
-            output += "## Input Statement\n"
-            output += f"```\n{self.conversation.as_text()}\n```\n\n"
+            parts.append("## Input Statement\n")
+            parts.append(f"```\n{self.conversation.as_text()}\n```\n\n")
         
         if self.pending_request:
-            output += "## Current Step: " + self.pending_step + "\n\n"
-            output += "### System Prompt\n"
-            output += f"```\n{self.pending_request.system_prompt}\n```\n\n"
-            output += "### Prompt\n"
-            output += f"```\n{self.pending_request.prompt}\n```\n\n"
-            output += f"### Expected Format: {self.pending_request.expected_format}\n\n"
-            output += "---\n"
-            output += "Process the above prompt and provide the response.\n"
+            parts.append("## Current Step: " + self.pending_step + "\n\n")
+            parts.append("### System Prompt\n")
+            parts.append(f"```\n{self.pending_request.system_prompt}\n```\n\n")
+            parts.append("### Prompt\n")
+            parts.append(f"```\n{self.pending_request.prompt}\n```\n\n")
+            parts.append(f"### Expected Format: {self.pending_request.expected_format}\n\n")
+            parts.append("---\n")
+            parts.append("Process the above prompt and provide the response.\n")
         
         if self.requirements and not self.requirements.is_empty():
-            output += "## Extracted Requirements\n"
-            output += f"```json\n{json.dumps(asdict(self.requirements), indent=2)}\n```\n\n"
+            parts.append("## Extracted Requirements\n")
+            parts.append(f"```json\n{json.dumps(self.requirements.to_dict(), indent=2)}\n```\n\n")
         
         if self.architecture and self.architecture.components:
-            output += "## Architecture\n"
-            output += f"Components: {self.architecture.component_names()}\n"
-            output += f"Patterns: {self.architecture.patterns}\n\n"
+            parts.append("## Architecture\n")
+            parts.append(f"Components: {self.architecture.component_names()}\n")
+            parts.append(f"Patterns: {self.architecture.patterns}\n\n")
         
         if self.code:
-            output += "## Generated Code\n"
+            parts.append("## Generated Code\n")
             for lang, code in self.code.items():
-                output += f"### {lang}/{code.framework}\n"
-                output += f"Files: {list(code.files.keys())}\n"
-                output += f"Run: `{code.run_command}`\n\n"
+                parts.append(f"### {lang}/{code.framework}\n")
+                parts.append(f"Files: {list(code.files.keys())}\n")
+                parts.append(f"Run: `{code.run_command}`\n\n")
         
-        return output
+        return "".join(parts)
+
+
+class _Speculation:
+    """An infer_architecture call started before the requirements were final."""
+    
+    def __init__(self, basis: Requirements, request: LLMRequest):
+        self.basis = basis
+        self.request = request
+        self.response: Optional[LLMResponse] = None
+        self.done = threading.Event()
+
+
+class AsyncStatementToRealityPipeline(StatementToRealityPipeline):
+    """
+    Async pipeline for running many statements in one process.
+    
+    Every LLM step awaits LLMInterface.acomplete(), which uses the provider's
+    pooled async client and the interface's concurrency semaphore. Share one
+    LLMInterface between pipelines so they share the pool.
+    
+    Steps do not stream, so `speculative` has no effect here. The async steps
+    (_astep_*) sit next to the inherited sync ones, so sync helpers such as
+    continue_with_response() still work on an async pipeline - they block.
+    
+    Usage:
+        llm = LLMInterface("anthropic", max_concurrency=64)
+        results = await asyncio.gather(*[
+            AsyncStatementToRealityPipeline(llm=llm).process(s) for s in statements
+        ])
+        await llm.aclose()
+    """
+    
+    async def process(self, input_text: str, language: str = "python", framework: str = "fastapi",
+                      timeout: Optional[float] = None,
+                      targets: Optional[List[Tuple[str, str]]] = None) -> PipelineResult:
+        """Async version of StatementToRealityPipeline.process()."""
+        self._begin(input_text, language, framework, timeout, targets)
+        return await self._arun_steps(language, framework)
+    
+    async def resume(self, run_id: str, timeout: Optional[float] = None) -> PipelineResult:
+        """Async version of StatementToRealityPipeline.resume()."""
+        language, framework = self._restore(run_id)
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self._new_session = True
+        return await self._arun_steps(language, framework)
+    
+    async def update(self, run_id: str, input_text=None, requirements: Optional[Requirements] = None,
+                     architecture: Optional[Architecture] = None,
+                     timeout: Optional[float] = None) -> PipelineResult:
+        """Async version of StatementToRealityPipeline.update()."""
+        self._begin_update(run_id, input_text, requirements, architecture, timeout)
+        return await self._arun_steps(self.language, self.framework)
+    
+    async def _arun_steps(self, language: str, framework: str) -> PipelineResult:
+        while True:
+            result = await self._aadvance(language, framework)
+            if result is not None:
+                return result
+    
+    async def _aadvance(self, language: str, framework: str) -> Optional[PipelineResult]:
+        """Async version of _advance(): run the next incomplete step."""
+        if self.requirements is None:
+            requirements_result = await self._astep_parse_requirements()
+            if not requirements_result.success:
+                return self._fail(requirements_result.error or "Failed to parse requirements")
+            self._checkpoint("parse_requirements")
+            return None
+        
+        if self.architecture is None:
+            architecture_result = await self._astep_infer_architecture()
+            if not architecture_result.success:
+                return self._fail(architecture_result.error or "Failed to infer architecture")
+            self._checkpoint("infer_architecture")
+            return None
+        
+        missing = self._missing_targets()
+        if missing:
+            if not self.llm.is_internal():
+                missing = missing[:1]
+            results = await asyncio.gather(*[self._astep_generate_code(*target) for target in missing])
+            error = self._target_errors(missing, results)
+            if error:
+                return self._fail(error)
+            self._checkpoint("generate_code" if not self._missing_targets() else None)
+            return None
+        
+        return self._create_result(success=True)
+    
+    async def _astep_parse_requirements(self) -> LLMResponse:
+        with self.hooks.step("parse_requirements", self.run_id):
+            request = parse_requirements(self.conversation)
+            response = await self._acomplete("parse_requirements", request)
+            return self._handle_requirements(request, response)
+    
+    async def _astep_infer_architecture(self) -> LLMResponse:
+        if not self.requirements:
+            return LLMResponse(content="", success=False, error="No requirements to process")
+        
+        if self._reuse_architecture():
+            return LLMResponse(content="", success=True)
+        
+        with self.hooks.step("infer_architecture", self.run_id):
+            request = infer_architecture(self.requirements, self._baseline_architecture())
+            response = await self._acomplete("infer_architecture", request)
+            return self._handle_architecture(request, response)
+    
+    async def _astep_generate_code(self, language: str, framework: str) -> LLMResponse:
+        if not self.architecture:
+            return LLMResponse(content="", success=False, error="No architecture to process")
+        
+        with self.hooks.step("generate_code", self.run_id):
+            plan = self._regeneration_plan(language, framework)
+            if plan is not None:
+                self._emit("step_started", "generate_code")
+                merged = await fan_out.agenerate(self._fan_out_llm(), self.architecture, language,
+                                                 framework, self.max_workers, self.deadline,
+                                                 self.prompt_budget, set(plan.regenerate))
+                response = self._handle_incremental(plan, merged, language, framework)
+                self._emit_finished("generate_code", response)
+                return response
+            
+            if self._use_fan_out():
+                self._emit("step_started", "generate_code")
+                merged = await fan_out.agenerate(self._fan_out_llm(), self.architecture, language,
+                                                 framework, self.max_workers, self.deadline,
+                                                 self.prompt_budget)
+                response = self._handle_fan_out(merged, language, framework)
+                self._emit_finished("generate_code", response)
+                return response
+            
+            request = generate_full_application(self.architecture, language, framework, self.prompt_budget)
+            response = await self._acomplete("generate_code", request)
+            return self._handle_code(request, response, language, framework)
+    
+    async def _acomplete(self, step: str, request: LLMRequest) -> LLMResponse:
+        request.deadline = self.deadline
+        self._emit("step_started", step)
+        response = await InstrumentedLLM(self.llm, self.hooks, step, self.run_id).acomplete(request)
+        self._record_usage(step, response.usage)
+        self._emit_finished(step, response)
+        return response
 
 
 # =============================================================================
@@ -330,6 +1041,248 @@ def process_statement(statement: str, language: str = "python", framework: str =
     return pipeline.process(statement, language, framework)
 
 
+def process_batch(statements: List[str], concurrency: int = 8, mode: str = "auto",
+                  language: str = "python", framework: str = "fastapi",
+                  llm: Optional[LLMInterface] = None) -> Iterator[Tuple[int, PipelineResult]]:
+    """
+    Process many statements, yielding (index, result) as each run finishes.
+    
+    Every step of every statement is a node in a DAG (parse -> architecture
+    -> code per statement). Up to `concurrency` nodes run at once, so parsing
+    statement B overlaps code generation for statement A. Runs closest to
+    completion are scheduled first.
+    
+    All pipelines share one LLM interface. Unless one is given, it gets a
+    memory cache and in-flight de-duplication, so identical prompts across
+    the batch reach the provider once.
+    
+    A statement whose step raises yields an unsuccessful result carrying
+    the error; the other statements carry on.
+    
+    Usage:
+        for index, result in process_batch(specs, concurrency=16):
+            save(specs[index], result)
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    if llm is None:
+        llm = LLMInterface(
+            mode,
+            cache=ResponseCache(max_memory_entries=max(16, 3 * len(statements))),
+            dedupe=True
+        )
+    
+    pipelines = []
+    for statement in statements:
+        pipeline = StatementToRealityPipeline(llm=llm)
+        pipeline._begin(statement, language, framework, None)
+        pipelines.append(pipeline)
+    
+    completed_steps = [0] * len(pipelines)
+    ready = [(0, index) for index in range(len(pipelines))]
+    heapq.heapify(ready)
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        running: Dict[Future, int] = {}
+        while ready or running:
+            while ready and len(running) < concurrency:
+                _, index = heapq.heappop(ready)
+                running[pool.submit(pipelines[index]._advance, language, framework)] = index
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = pipelines[index]._fail(f"{type(e).__name__}: {e}")
+                if result is None:
+                    completed_steps[index] += 1
+                    heapq.heappush(ready, (-completed_steps[index], index))
+                else:
+                    yield index, result
+
+
+class OfflineBatch:
+    """
+    Runs many pipelines against a provider batch API instead of live calls.
+    
+    Each round, every waiting pipeline contributes its pending request to one
+    JSONL batch file; the results file resumes them all from their
+    checkpoints. A statement needs one round per pipeline step.
+    
+    State lives in `workdir`, so rounds may span process restarts.
+    
+    Usage:
+        batch = OfflineBatch("regen/")
+        batch.submit(statements)
+        while batch.waiting():
+            batch.write_requests("regen/batch.jsonl")
+            ...  # submit to the provider, or core.batch.run_local_batch()
+            finished = batch.ingest("regen/results.jsonl")
+    """
+    
+    def __init__(self, workdir: str, language: str = "python", framework: str = "fastapi",
+                 provider: Optional[BatchProvider] = None):
+        self.language = language
+        self.framework = framework
+        self.checkpoints = CheckpointStore(os.path.join(workdir, "checkpoints"))
+        self.provider = provider or BatchProvider()
+        self.llm = LLMInterface("batch", provider=self.provider)
+    
+    def submit(self, statements: List[str]) -> List[str]:
+        """Start a run per statement. Returns the run ids."""
+        run_ids = []
+        for statement in statements:
+            pipeline = StatementToRealityPipeline(llm=self.llm, checkpoints=self.checkpoints)
+            run_ids.append(pipeline.process(statement, self.language, self.framework).run_id)
+        return run_ids
+    
+    def waiting(self) -> List[str]:
+        """Run ids paused on a request that has not been answered yet."""
+        return [run_id for run_id, _ in _paused_runs(self.checkpoints)]
+    
+    def write_requests(self, path: str) -> int:
+        """Write one JSONL batch with the pending request of every waiting run."""
+        for run_id in self.waiting():
+            state = self.checkpoints.load(run_id)["pipeline"]
+            if state["pending_request"]:
+                # Re-registers requests pending from an earlier process
+                self.provider.complete(checkpoint.decode_request(state["pending_request"]))
+        return self.provider.write_batch(path)
+    
+    def ingest(self, results_path: str) -> Dict[str, PipelineResult]:
+        """
+        Load a results file and resume every waiting run.
+        
+        Returns run_id -> result for each resumed run. Runs needing another
+        round come back unsuccessful and are listed by waiting() again.
+        """
+        self.provider.ingest_results(results_path)
+        results = {}
+        for run_id in self.waiting():
+            pipeline = StatementToRealityPipeline(llm=self.llm, checkpoints=self.checkpoints)
+            results[run_id] = pipeline.resume(run_id)
+        return results
+
+
+class SpoolSession:
+    """
+    Runs pipelines whose prompts are answered through a spool directory.
+    
+    Every run pauses on its first prompt, which lands in the spool as its
+    own file. watch() polls the spool and resumes each run as soon as the
+    response file for its pending prompt appears, until every run has
+    finished. Checkpoints live in the spool directory too, so a restarted
+    session picks up the runs of the previous one.
+    
+    Usage:
+        session = SpoolSession("spool/")
+        session.submit(statements)
+        for run_id, result in session.watch(timeout=3600):
+            save(run_id, result)
+        
+        # Meanwhile, in any number of IDE sessions or worker processes:
+        #   python -m core.spool list spool/
+        #   python -m core.spool answer spool/ <id> response.json
+    """
+    
+    def __init__(self, spool_dir: str, language: str = "python", framework: str = "fastapi",
+                 poll_interval: float = 0.5):
+        self.language = language
+        self.framework = framework
+        self.poll_interval = poll_interval
+        self.provider = SpoolProvider(spool_dir)
+        self.spool = self.provider.spool
+        self.checkpoints = CheckpointStore(os.path.join(spool_dir, "checkpoints"))
+        self.llm = LLMInterface("spool", provider=self.provider)
+        self._waiting: Optional[Dict[str, str]] = None  # run_id -> spool id of its pending prompt
+    
+    def submit(self, statements: List[str]) -> List[str]:
+        """Start a run per statement. Returns the run ids."""
+        waiting = self._runs()
+        run_ids = []
+        for statement in statements:
+            pipeline = StatementToRealityPipeline(llm=self.llm, checkpoints=self.checkpoints)
+            result = pipeline.process(statement, self.language, self.framework)
+            self._track(waiting, pipeline, result)
+            run_ids.append(pipeline.run_id)
+        return run_ids
+    
+    def waiting(self) -> List[str]:
+        """Run ids paused on a prompt."""
+        return list(self._runs())
+    
+    def poll(self) -> Dict[str, PipelineResult]:
+        """
+        Resume every run whose pending prompt has been answered.
+        
+        A resumed run continues until it reaches a prompt nobody has answered
+        yet. Returns run_id -> result for the runs that finished.
+        """
+        waiting = self._runs()
+        finished = {}
+        progressed = True
+        while progressed:
+            progressed = False
+            answered = self.spool.answered()
+            for run_id, request_id in list(waiting.items()):
+                if request_id not in answered:
+                    continue
+                progressed = True
+                del waiting[run_id]
+                pipeline = StatementToRealityPipeline(llm=self.llm, checkpoints=self.checkpoints)
+                result = pipeline.resume(run_id)
+                if not self._track(waiting, pipeline, result):
+                    finished[run_id] = result
+        return finished
+    
+    def watch(self, timeout: Optional[float] = None) -> Iterator[Tuple[str, PipelineResult]]:
+        """
+        Yield (run_id, result) as runs finish.
+        
+        Stops when no run is waiting, or after `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            for run_id, result in self.poll().items():
+                yield run_id, result
+            if not self._runs():
+                return
+            remaining = deadline - time.monotonic() if deadline is not None else self.poll_interval
+            if remaining <= 0:
+                return
+            self.spool.wait(min(remaining, self.poll_interval), self.poll_interval)
+    
+    def _runs(self) -> Dict[str, str]:
+        """Waiting runs, loaded from the checkpoints on first use."""
+        if self._waiting is None:
+            self._waiting = {}
+            for run_id, saved in _paused_runs(self.checkpoints):
+                request = saved["pipeline"]["pending_request"]
+                if request:
+                    self._waiting[run_id] = self.spool.request_id(checkpoint.decode_request(request))
+        return self._waiting
+    
+    def _track(self, waiting: Dict[str, str], pipeline: StatementToRealityPipeline,
+               result: PipelineResult) -> bool:
+        """Record a run paused on a prompt. False if it finished (or failed) instead."""
+        paused = any(e.startswith("EXTERNAL_PROCESSING_REQUIRED") for e in result.errors)
+        if not paused or pipeline.pending_request is None:
+            return False
+        waiting[pipeline.run_id] = self.spool.request_id(pipeline.pending_request)
+        return True
+
+
+def _paused_runs(checkpoints: CheckpointStore) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(run_id, checkpoint) of every run paused on an unanswered request."""
+    for run_id in checkpoints.list_runs():
+        saved = checkpoints.load(run_id)
+        blockers = saved["context"]["blockers"] if saved else []
+        if any(b.startswith("EXTERNAL_PROCESSING_REQUIRED") for b in blockers):
+            yield run_id, saved
+
+
 def process_with_ide(statement: str) -> Dict[str, Any]:
     """
     Process statement in IDE mode - returns prompts for external processing.
@@ -357,8 +1310,8 @@ def continue_with_response(pipeline: StatementToRealityPipeline, response: str)
     # Try to continue to next step
     if not pipeline.architecture and pipeline.requirements:
         pipeline._step_infer_architecture()
-    elif not pipeline.code and pipeline.architecture:
-        pipeline._step_generate_code("python", "fastapi")
+    elif pipeline.architecture and pipeline._missing_targets():
+        pipeline._step_generate_code(*pipeline._missing_targets()[0])
     
     return {
         "pipeline": pipeline,
@@ -0,0 +1,204 @@
+"""
+Prompt Compaction: Fitting Architectures into a Token Budget
+
+The architecture is the largest payload in the code generation prompts.
+Pretty-printed, with every component's full detail repeated in every
+request, big architectures blow past context limits and inflate cost.
+
+Compaction shrinks the architecture JSON in stages, least lossy first,
+stopping as soon as it fits the budget:
+
+1. DEDUPE: No indentation, repeated list entries removed, relationships
+   that only repeat a component's dependencies dropped (always applied)
+2. SUMMARIZE UNRELATED: Components that neither depend on nor are used by
+   the focus component keep only their name and type (always applied when
+   generating one component)
+3. TRIM: At most a few responsibilities per component
+4. SUMMARIZE ALL: Every non-focus component keeps name, type and interfaces
+5. NAMES ONLY: Every non-focus component keeps name and type
+
+Each compaction returns a CompactionReport, which prompt builders attach to
+the request's metadata.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+CHARS_PER_TOKEN = 4
+MAX_RESPONSIBILITIES = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English and JSON)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def compact_json(data: Any) -> str:
+    """Serialize without indentation or spaces after separators."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+@dataclass
+class CompactionReport:
+    """What compaction did to one payload."""
+    original_tokens: int  # Pretty-printed (indent=2) size
+    tokens: int  # Size after compaction
+    budget: Optional[int] = None
+    stages: List[str] = field(default_factory=list)
+    summarized: List[str] = field(default_factory=list)  # Components reduced to a summary
+
+    @property
+    def fits(self) -> bool:
+        return self.budget is None or self.tokens <= self.budget
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "original_tokens": self.original_tokens,
+            "tokens": self.tokens,
+            "budget": self.budget,
+            "fits": self.fits,
+            "stages": self.stages,
+            "summarized": self.summarized,
+        }
+
+
+def compact_architecture(arch: Dict[str, Any], focus: Optional[str] = None,
+                         budget: Optional[int] = None) -> Tuple[str, CompactionReport]:
+    """
+    Compact an architecture payload ({"components": [...], ...}).
+
+    Args:
+        arch: Architecture as a JSON-ready dict; not modified
+        focus: Name of the component being generated - always kept in full
+        budget: Token budget for the serialized payload (None: dedupe only)
+
+    Returns (serialized JSON, report). If even the last stage is over budget
+    the smallest version is returned and report.fits is False.
+    """
+    report = CompactionReport(
+        original_tokens=estimate_tokens(json.dumps(arch, indent=2)),
+        tokens=0,
+        budget=budget,
+    )
+
+    data = _dedupe(arch)
+    report.stages.append("dedupe")
+    text = compact_json(data)
+
+    stages = [
+        ("summarize_unrelated", lambda d: _summarize(d, focus, _unrelated(d, focus), ("name", "type"))),
+        ("trim_responsibilities", lambda d: _trim_responsibilities(d, focus)),
+        ("summarize_all", lambda d: _summarize(d, focus, _others(d, focus), ("name", "type", "interfaces"))),
+        ("names_only", lambda d: _summarize(d, focus, _others(d, focus), ("name", "type"))),
+    ]
+    for name, stage in stages:
+        if name == "summarize_unrelated":
+            if focus is None:
+                continue
+        elif budget is None or estimate_tokens(text) <= budget:
+            break
+        data, summarized = stage(data)
+        report.stages.append(name)
+        for component in summarized:
+            if component not in report.summarized:
+                report.summarized.append(component)
+        text = compact_json(data)
+
+    report.tokens = estimate_tokens(text)
+    return text, report
+
+
+def related_components(arch: Dict[str, Any], focus: str) -> Set[str]:
+    """Components the focus depends on or is used by, via dependencies and relationships."""
+    related = set()
+    for component in arch.get("components", []):
+        if component["name"] == focus:
+            related.update(component.get("dependencies", []))
+        elif focus in component.get("dependencies", []):
+            related.add(component["name"])
+    for source, targets in arch.get("relationships", {}).items():
+        if source == focus:
+            related.update(targets)
+        elif focus in targets:
+            related.add(source)
+    related.discard(focus)
+    return related
+
+
+# =============================================================================
+# Stages
+# =============================================================================
+
+def _unique(items: List[Any]) -> List[Any]:
+    seen = set()
+    result = []
+    for item in items:
+        key = compact_json(item) if isinstance(item, (dict, list)) else item
+        if key not in seen:
+            seen.add(key)
+            result.append(item)
+    return result
+
+
+def _dedupe(arch: Dict[str, Any]) -> Dict[str, Any]:
+    data = dict(arch)
+    components = []
+    dependencies = {}
+    for component in arch.get("components", []):
+        component = {
+            key: _unique(value) if isinstance(value, list) else value
+            for key, value in component.items()
+        }
+        dependencies[component["name"]] = set(component.get("dependencies", []))
+        components.append(component)
+    data["components"] = components
+
+    if "relationships" in arch:
+        data["relationships"] = {
+            source: _unique(targets)
+            for source, targets in arch["relationships"].items()
+            if not (source in dependencies and set(targets) <= dependencies[source])
+        }
+    if "patterns" in arch:
+        data["patterns"] = _unique(arch["patterns"])
+    return data
+
+
+def _others(arch: Dict[str, Any], focus: Optional[str]) -> Set[str]:
+    return {c["name"] for c in arch.get("components", []) if c["name"] != focus}
+
+
+def _unrelated(arch: Dict[str, Any], focus: Optional[str]) -> Set[str]:
+    if focus is None:
+        return set()
+    return _others(arch, focus) - related_components(arch, focus)
+
+
+def _summarize(arch: Dict[str, Any], focus: Optional[str], names: Set[str],
+               keep: Tuple[str, ...]) -> Tuple[Dict[str, Any], List[str]]:
+    data = dict(arch)
+    components = []
+    summarized = []
+    for component in arch.get("components", []):
+        if component["name"] in names and component["name"] != focus:
+            reduced = {key: component[key] for key in keep if key in component}
+            if reduced != component:
+                summarized.append(component["name"])
+            component = reduced
+        components.append(component)
+    data["components"] = components
+    return data, summarized
+
+
+def _trim_responsibilities(arch: Dict[str, Any], focus: Optional[str]) -> Tuple[Dict[str, Any], List[str]]:
+    data = dict(arch)
+    components = []
+    for component in arch.get("components", []):
+        responsibilities = component.get("responsibilities")
+        if component["name"] != focus and responsibilities and len(responsibilities) > MAX_RESPONSIBILITIES:
+            component = dict(component, responsibilities=responsibilities[:MAX_RESPONSIBILITIES])
+        components.append(component)
+    data["components"] = components
+    return data, []
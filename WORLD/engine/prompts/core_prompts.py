@@ -7,12 +7,29 @@ Without these prompts being processed by an LLM, you just have scaffolding.
 Each function returns an LLMRequest that can be:
 1. Sent to an LLM API (internal mode)
 2. Presented to an IDE/human for processing (external mode)
+
+Every prompt is laid out static-first: instructions and the output schema
+come before the variable payload (conversation, requirements, architecture).
+That static part is the request's `cache_prefix`, which providers mark for
+prompt-prefix caching - the boilerplate is tokenized once, not per call.
 """
 
-from typing import List, Dict, Any
+import json
+from typing import List, Dict, Any, Optional
 from core.models import (
     LLMRequest, Conversation, Requirements, Architecture, Component
 )
+from prompts.compaction import compact_architecture, compact_json
+
+
+def _request(system_prompt: str, instructions: str, payload: str, **kwargs) -> LLMRequest:
+    """Build a request whose prompt is the static instructions followed by the payload."""
+    return LLMRequest(
+        system_prompt=system_prompt,
+        prompt=instructions + payload,
+        cache_prefix=instructions,
+        **kwargs
+    )
 
 
 # =============================================================================
@@ -24,16 +41,17 @@ def parse_requirements(conversation: Conversation) -> LLMRequest:
     Generate prompt to extract requirements from conversation.
     
     This is the first step: turning natural language into structured requirements.
+    
+    Functional requirements and entities come first in the schema, so a
+    streamed answer completes them early enough for speculative
+    architecture inference to start while the rest is still being written.
     """
-    return LLMRequest(
+    return _request(
         system_prompt="""You are an expert requirements analyst and software architect.
 Your job is to extract structured requirements from natural language conversations.
 Be thorough but precise. Extract only what is stated or clearly implied.""",
         
-        prompt=f"""Analyze this conversation and extract structured requirements for a software system.
-
-CONVERSATION:
-{conversation.as_text()}
+        instructions="""Analyze the conversation below and extract structured requirements for a software system.
 
 Extract and categorize into:
 
@@ -42,38 +60,42 @@ Extract and categorize into:
    - Features, capabilities, behaviors
    - User actions and system responses
 
-2. NON-FUNCTIONAL REQUIREMENTS  
+2. ENTITIES
+   - Key nouns that represent data/services
+   - Examples: User, Order, Payment, Product, Message
+   - These become components/services
+
+3. NON-FUNCTIONAL REQUIREMENTS  
    - How the system should PERFORM
    - Performance, scalability, security, reliability
    - Quality attributes
 
-3. CONSTRAINTS
+4. CONSTRAINTS
    - Technical limitations or mandates
    - Technology choices specified
    - Budget, timeline, compliance requirements
 
-4. BUSINESS RULES
+5. BUSINESS RULES
    - Domain-specific logic
    - Policies and regulations
    - Validation rules
 
-5. ENTITIES
-   - Key nouns that represent data/services
-   - Examples: User, Order, Payment, Product, Message
-   - These become components/services
-
-Return as JSON:
+Return as JSON, keys in this order:
 ```json
-{{
+{
   "functional": ["requirement 1", "requirement 2"],
+  "entities": ["Entity1", "Entity2"],
   "non_functional": ["requirement 1", "requirement 2"],
   "constraints": ["constraint 1", "constraint 2"],
-  "business_rules": ["rule 1", "rule 2"],
-  "entities": ["Entity1", "Entity2"]
-}}
+  "business_rules": ["rule 1", "rule 2"]
+}
 ```
 
-Be specific. Don't add requirements that aren't stated or implied.""",
+Be specific. Don't add requirements that aren't stated or implied.
+
+""",
+        payload=f"""CONVERSATION:
+{conversation.as_text()}""",
         
         expected_format="json",
         temperature=0.3  # Lower temperature for more precise extraction
@@ -84,13 +106,10 @@ def identify_statement_types(statements: List[str]) -> LLMRequest:
     """Generate prompt to categorize statements by type."""
     statements_text = "\n".join([f"{i}: {s}" for i, s in enumerate(statements)])
     
-    return LLMRequest(
+    return _request(
         system_prompt="You are an expert at analyzing natural language statements.",
         
-        prompt=f"""Categorize each statement by its primary type.
-
-STATEMENTS:
-{statements_text}
+        instructions="""Categorize each statement below by its primary type.
 
 CATEGORIES:
 - functional: Describes what the system should do
@@ -102,12 +121,16 @@ CATEGORIES:
 
 Return as JSON mapping statement index to category:
 ```json
-{{
+{
   "0": "functional",
   "1": "constraint",
   ...
-}}
-```""",
+}
+```
+
+""",
+        payload=f"""STATEMENTS:
+{statements_text}""",
         
         expected_format="json",
         temperature=0.2
@@ -118,11 +141,15 @@ Return as JSON mapping statement index to category:
 # ARCHITECTURE PROMPTS - Design system from requirements
 # =============================================================================
 
-def infer_architecture(requirements: Requirements) -> LLMRequest:
+def infer_architecture(requirements: Requirements, previous: Optional[Architecture] = None) -> LLMRequest:
     """
     Generate prompt to infer architecture from requirements.
     
     This is the core transformation: requirements -> architecture.
+    
+    With `previous` (incremental runs), the earlier architecture is appended
+    so components the changed requirements do not touch keep their names and
+    details - and their generated files stay valid.
     """
     reqs_json = {
         "functional": requirements.functional,
@@ -132,7 +159,7 @@ def infer_architecture(requirements: Requirements) -> LLMRequest:
         "entities": requirements.entities
     }
     
-    return LLMRequest(
+    return _request(
         system_prompt="""You are an expert software architect with deep knowledge of:
 - Microservices and distributed systems
 - API design and patterns
@@ -142,12 +169,7 @@ def infer_architecture(requirements: Requirements) -> LLMRequest:
 
 Design clean, maintainable, scalable architectures.""",
         
-        prompt=f"""Design a system architecture based on these requirements.
-
-REQUIREMENTS:
-```json
-{__import__('json').dumps(reqs_json, indent=2)}
-```
+        instructions="""Design a system architecture based on the requirements below.
 
 Design the architecture with:
 
@@ -173,39 +195,55 @@ Design the architecture with:
 
 Return as JSON:
 ```json
-{{
+{
   "components": [
-    {{
+    {
       "name": "ComponentName",
       "type": "service|api|database|gateway|queue",
       "responsibilities": ["responsibility 1", "responsibility 2"],
       "interfaces": ["method1", "method2"],
       "dependencies": ["OtherComponent"]
-    }}
+    }
   ],
   "patterns": ["Pattern1", "Pattern2"],
-  "relationships": {{
+  "relationships": {
     "ComponentA": ["ComponentB", "ComponentC"]
-  }},
-  "tech_stack": {{
+  },
+  "tech_stack": {
     "backend": ["Python", "FastAPI"],
     "database": ["PostgreSQL"],
     "infrastructure": ["Docker", "Kubernetes"]
-  }},
-  "quality_attributes": {{
+  },
+  "quality_attributes": {
     "scalability": "horizontal",
     "availability": "99.9%"
-  }}
-}}
+  }
+}
 ```
 
-Design for the requirements given. Don't over-engineer.""",
+Design for the requirements given. Don't over-engineer.
+
+""",
+        payload=f"""REQUIREMENTS:
+```json
+{json.dumps(reqs_json, indent=2)}
+```""" + (_previous_architecture(previous) if previous else ""),
         
         expected_format="json",
         temperature=0.5
     )
 
 
+def _previous_architecture(architecture: Architecture) -> str:
+    return f"""
+
+PREVIOUS ARCHITECTURE (for the previous version of these requirements).
+Keep every component the requirement changes do not affect exactly as it is:
+```json
+{compact_json(_architecture_json(architecture))}
+```"""
+
+
 def validate_architecture(architecture: Architecture, requirements: Requirements) -> LLMRequest:
     """Generate prompt to validate architecture against requirements."""
     arch_json = {
@@ -219,20 +257,10 @@ def validate_architecture(architecture: Architecture, requirements: Requirements
         "constraints": requirements.constraints
     }
     
-    return LLMRequest(
+    return _request(
         system_prompt="You are an expert architecture reviewer.",
         
-        prompt=f"""Validate this architecture against the requirements.
-
-ARCHITECTURE:
-```json
-{__import__('json').dumps(arch_json, indent=2)}
-```
-
-REQUIREMENTS:
-```json
-{__import__('json').dumps(reqs_json, indent=2)}
-```
+        instructions="""Validate the architecture below against the requirements.
 
 Check:
 1. Does every functional requirement have a component to handle it?
@@ -242,14 +270,25 @@ Check:
 
 Return as JSON:
 ```json
-{{
+{
   "valid": true|false,
   "score": 0.0-1.0,
   "covered_requirements": ["req1", "req2"],
   "uncovered_requirements": ["req3"],
   "issues": ["issue1", "issue2"],
   "suggestions": ["suggestion1"]
-}}
+}
+```
+
+""",
+        payload=f"""ARCHITECTURE:
+```json
+{json.dumps(arch_json, indent=2)}
+```
+
+REQUIREMENTS:
+```json
+{json.dumps(reqs_json, indent=2)}
 ```""",
         
         expected_format="json",
@@ -261,32 +300,60 @@ Return as JSON:
 # CODE GENERATION PROMPTS - Generate actual code
 # =============================================================================
 
+# Source file extension per language, for the file names in examples
+SOURCE_EXTENSIONS = {
+    "python": ".py", "typescript": ".ts", "javascript": ".js", "go": ".go", "java": ".java",
+    "kotlin": ".kt", "rust": ".rs", "ruby": ".rb", "csharp": ".cs", "php": ".php",
+}
+# Dependency manifests that fan-out merges across components (see generators.fan_out)
+MERGED_MANIFESTS = {
+    "python": "requirements.txt", "typescript": "package.json", "javascript": "package.json", "go": "go.mod",
+}
+
+
+def _architecture_json(architecture: Architecture) -> Dict[str, Any]:
+    return {
+        "components": [
+            {
+                "name": c.name,
+                "type": c.type,
+                "responsibilities": c.responsibilities,
+                "interfaces": c.interfaces,
+                "dependencies": c.dependencies
+            }
+            for c in architecture.components
+        ],
+        "patterns": architecture.patterns,
+        "relationships": architecture.relationships,
+        "tech_stack": architecture.tech_stack
+    }
+
+
 def generate_component_code(
     component: Component, 
     architecture: Architecture,
     language: str,
-    framework: str
+    framework: str,
+    token_budget: Optional[int] = None
 ) -> LLMRequest:
     """
     Generate prompt to create code for a specific component.
     
     This generates REAL, WORKING code - not scaffolds.
-    """
-    comp_json = {
-        "name": component.name,
-        "type": component.type,
-        "responsibilities": component.responsibilities,
-        "interfaces": component.interfaces,
-        "dependencies": component.dependencies
-    }
     
-    context = {
-        "other_components": [c.name for c in architecture.components if c.name != component.name],
-        "patterns": architecture.patterns,
-        "tech_stack": architecture.tech_stack
-    }
+    The architecture is compacted around the component: related components
+    stay in full, unrelated ones are summarized, and token_budget (if set)
+    caps the architecture payload.
+    """
+    arch_text, report = compact_architecture(
+        _architecture_json(architecture), focus=component.name, budget=token_budget
+    )
+    extension = SOURCE_EXTENSIONS.get(language.lower(), "")
+    manifest = MERGED_MANIFESTS.get(language.lower())
+    manifests = (f"A top-level {manifest} is merged across components." if manifest
+                 else "Leave top-level build files to the API layer.")
     
-    return LLMRequest(
+    return _request(
         system_prompt=f"""You are an expert {language} developer specializing in {framework}.
 Write clean, production-ready code. Include:
 - Proper error handling
@@ -294,17 +361,8 @@ Write clean, production-ready code. Include:
 - Documentation
 - Logging where appropriate""",
         
-        prompt=f"""Generate the complete code for this component.
-
-COMPONENT:
-```json
-{__import__('json').dumps(comp_json, indent=2)}
-```
-
-CONTEXT:
-```json
-{__import__('json').dumps(context, indent=2)}
-```
+        instructions=f"""Generate the complete code for the component named below.
+The architecture shows it in full, with the components around it.
 
 LANGUAGE: {language}
 FRAMEWORK: {framework}
@@ -320,21 +378,35 @@ The code should be:
 - Properly typed
 - With error handling
 
+Other components are generated separately into the same project. Put every
+file under a directory named after this component in snake_case (for
+example user_service/models{extension}), so paths do not clash.
+{manifests}
+
 Return as JSON:
 ```json
 {{
   "files": {{
-    "filename.py": "file content here",
-    "models.py": "models here"
+    "component_name/filename{extension}": "file content here",
+    "component_name/models{extension}": "models here"
   }},
   "dependencies": ["package1", "package2"]
 }}
 ```
 
-Write REAL implementations, not placeholders or TODOs.""",
+Write REAL implementations, not placeholders or TODOs.
+
+""",
+        payload=f"""COMPONENT: {component.name}
+
+ARCHITECTURE:
+```json
+{arch_text}
+```""",
         
         expected_format="json",
-        temperature=0.4
+        temperature=0.4,
+        metadata={"compaction": report.as_dict()}
     )
 
 
@@ -349,7 +421,7 @@ def generate_api_endpoints(
         for c in architecture.components
     ]
     
-    return LLMRequest(
+    return _request(
         system_prompt=f"""You are an expert API developer.
 Design clean, RESTful APIs with proper:
 - HTTP methods (GET, POST, PUT, DELETE)
@@ -358,12 +430,7 @@ Design clean, RESTful APIs with proper:
 - Validation
 - Error handling""",
         
-        prompt=f"""Generate API endpoints for this architecture.
-
-COMPONENTS:
-```json
-{__import__('json').dumps(components, indent=2)}
-```
+        instructions=f"""Generate API endpoints for the architecture components below.
 
 LANGUAGE: {language}
 FRAMEWORK: {framework}
@@ -387,7 +454,13 @@ Return as JSON:
 }}
 ```
 
-Make it complete and runnable.""",
+Make it complete and runnable.
+
+""",
+        payload=f"""COMPONENTS:
+```json
+{compact_json(components)}
+```""",
         
         expected_format="json",
         temperature=0.4
@@ -397,41 +470,24 @@ Make it complete and runnable.""",
 def generate_full_application(
     architecture: Architecture,
     language: str,
-    framework: str
+    framework: str,
+    token_budget: Optional[int] = None
 ) -> LLMRequest:
     """
     Generate prompt for complete application code.
     
     This is the big one - generates the entire application.
+    token_budget (if set) caps the architecture payload; see prompts.compaction.
     """
-    arch_json = {
-        "components": [
-            {
-                "name": c.name,
-                "type": c.type,
-                "responsibilities": c.responsibilities,
-                "interfaces": c.interfaces,
-                "dependencies": c.dependencies
-            }
-            for c in architecture.components
-        ],
-        "patterns": architecture.patterns,
-        "relationships": architecture.relationships,
-        "tech_stack": architecture.tech_stack
-    }
+    arch_text, report = compact_architecture(_architecture_json(architecture), budget=token_budget)
     
-    return LLMRequest(
+    return _request(
         system_prompt=f"""You are an expert full-stack developer.
 Generate complete, production-ready {language}/{framework} applications.
 Write real implementations, not scaffolds.
 Include proper error handling, validation, and documentation.""",
         
-        prompt=f"""Generate a complete {language} application using {framework}.
-
-ARCHITECTURE:
-```json
-{__import__('json').dumps(arch_json, indent=2)}
-```
+        instructions=f"""Generate a complete {language} application using {framework} for the architecture below.
 
 Generate ALL files needed for a working application:
 
@@ -466,10 +522,17 @@ Return as JSON:
 ```
 
 CRITICAL: Write COMPLETE, WORKING code. No placeholders. No TODOs.
-Each file should be fully implemented and runnable.""",
+Each file should be fully implemented and runnable.
+
+""",
+        payload=f"""ARCHITECTURE:
+```json
+{arch_text}
+```""",
         
         expected_format="json",
-        temperature=0.5
+        temperature=0.5,
+        metadata={"compaction": report.as_dict()}
     )
 
 
@@ -485,15 +548,10 @@ def suggest_improvements(architecture: Architecture) -> LLMRequest:
         "tech_stack": architecture.tech_stack
     }
     
-    return LLMRequest(
+    return _request(
         system_prompt="You are a senior architect reviewing designs.",
         
-        prompt=f"""Review this architecture and suggest improvements.
-
-ARCHITECTURE:
-```json
-{__import__('json').dumps(arch_summary, indent=2)}
-```
+        instructions="""Review the architecture below and suggest improvements.
 
 Consider:
 1. Scalability improvements
@@ -504,17 +562,23 @@ Consider:
 
 Return as JSON:
 ```json
-{{
+{
   "improvements": [
-    {{
+    {
       "area": "scalability",
       "suggestion": "Add caching layer",
       "priority": "high|medium|low"
-    }}
+    }
   ],
   "missing_components": ["CacheService", "RateLimiter"],
   "overall_score": 0.0-1.0
-}}
+}
+```
+
+""",
+        payload=f"""ARCHITECTURE:
+```json
+{json.dumps(arch_summary, indent=2)}
 ```""",
         
         expected_format="json",
@@ -533,15 +597,10 @@ def explain_architecture(architecture: Architecture) -> LLMRequest:
         "relationships": architecture.relationships
     }
     
-    return LLMRequest(
+    return _request(
         system_prompt="You are a technical writer explaining systems to developers.",
         
-        prompt=f"""Explain this architecture in clear, plain language.
-
-ARCHITECTURE:
-```json
-{__import__('json').dumps(arch_json, indent=2)}
-```
+        instructions="""Explain the architecture below in clear, plain language.
 
 Write:
 1. A brief overview (2-3 sentences)
@@ -549,7 +608,13 @@ Write:
 3. How data flows through the system
 4. Key design decisions and their rationale
 
-Return as plain text (not JSON) suitable for a README.""",
+Return as plain text (not JSON) suitable for a README.
+
+""",
+        payload=f"""ARCHITECTURE:
+```json
+{json.dumps(arch_json, indent=2)}
+```""",
         
         expected_format="text",
         temperature=0.7
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The engine's packages (core, generators, prompts) are imported top-level
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,29 @@
+from core.cache import ResponseCache
+
+
+def _disk(cache: ResponseCache):
+    return cache._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+
+def test_disk_limits_are_kept_with_running_totals(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_memory_entries=1,
+                          max_disk_entries=50, max_disk_bytes=1000)
+    for i in range(200):
+        cache.put(f"key{i}", "x" * (10 + i % 30))
+    cache.put("key199", "y")  # Replacing a row adjusts the byte total
+
+    rows, size = _disk(cache)
+    assert rows <= 50 and size <= 1000
+    assert (cache._disk_rows, cache._disk_bytes) == (rows, size)
+    assert cache.get("key199") == "y"
+    assert cache.get("key0") is None
+
+
+def test_expired_rows_leave_the_totals(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_memory_entries=1, ttl=60)
+    cache.put("old", "x" * 10)
+    cache._db.execute("UPDATE responses SET created = created - 120")
+    cache.put("new", "y" * 5)
+
+    assert _disk(cache) == (1, 5)
+    assert (cache._disk_rows, cache._disk_bytes) == (1, 5)
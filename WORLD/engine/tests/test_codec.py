@@ -0,0 +1,38 @@
+import json
+
+from core import codec
+from core.models import GeneratedCode
+
+
+def _code() -> GeneratedCode:
+    return GeneratedCode("python", "fastapi", {"main.py": "print('hi')\n", "app/ü.py": "x = 'ü'\n"},
+                         "main.py", "python main.py", ["fastapi"])
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "code.s2rb")
+    codec.dump(_code(), path)
+    assert open(path, "rb").read(4) == (codec.MAGIC if codec.msgpack is not None else codec.JSON_MAGIC)
+
+    loaded = codec.load(path)
+    assert isinstance(loaded.files, codec.LazyFiles)
+    assert dict(loaded.files) == _code().files
+    assert codec.load(path, lazy=False) == _code()
+
+
+def test_either_header_is_readable(monkeypatch):
+    data = codec.dumps(_code())
+    base = codec._PREFIX.size + codec._PREFIX.unpack_from(data, 0)[2]
+    encoded = data[codec._PREFIX.size:base]
+    header = codec.unpack(encoded) if data[:4] == codec.MAGIC else json.loads(encoded)
+    blobs = data[base:]
+
+    packed = codec.pack(header)
+    msgpack_doc = codec._PREFIX.pack(codec.MAGIC, codec.SCHEMA_VERSION, len(packed)) + packed + blobs
+    assert codec.loads(msgpack_doc) == _code()
+
+    monkeypatch.setattr(codec, "msgpack", None)
+    json_doc = codec.dumps(_code())
+    assert json_doc[:4] == codec.JSON_MAGIC
+    assert codec.loads(json_doc) == _code()
+    assert codec.loads(msgpack_doc) == _code()
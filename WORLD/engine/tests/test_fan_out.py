@@ -0,0 +1,104 @@
+import json
+
+from core.llm_interface import LLMInterface
+from core.models import Architecture, Component, LLMRequest, LLMResponse
+from core.replay import ReplayProvider
+from generators.fan_out import merge_parts, merge_shared
+from pipeline import StatementToRealityPipeline
+from prompts.core_prompts import generate_component_code
+
+
+def _response(data) -> LLMResponse:
+    return LLMResponse(content=json.dumps(data), success=True)
+
+
+def test_package_json_is_merged_key_by_key():
+    first = {"name": "app", "dependencies": {"express": "^4.18.0"}, "scripts": {"start": "node a.js"}}
+    second = {"name": "users", "dependencies": {"express": "^4.19.0", "pg": "^8.0.0"},
+              "scripts": {"test": "jest"}}
+
+    merged = json.loads(merge_shared("package.json", json.dumps(first), json.dumps(second)))
+    assert merged == {
+        "name": "app",
+        "dependencies": {"express": "^4.18.0", "pg": "^8.0.0"},
+        "scripts": {"start": "node a.js", "test": "jest"},
+    }
+    assert merge_shared("package.json", "{", json.dumps(second)) is None
+
+
+def test_go_mod_requires_are_merged():
+    first = "module example.com/app\n\ngo 1.21\n\nrequire github.com/gin-gonic/gin v1.9.1\n"
+    second = ("module example.com/users\n\ngo 1.22\n\nrequire (\n"
+              "\tgithub.com/gin-gonic/gin v1.9.0\n\tgithub.com/lib/pq v1.10.9 // indirect\n)\n")
+
+    merged = merge_shared("go.mod", first, second)
+    assert merged == ("module example.com/app\ngo 1.21\n\nrequire (\n"
+                      "\tgithub.com/gin-gonic/gin v1.9.1\n\tgithub.com/lib/pq v1.10.9\n)\n")
+    assert merge_shared("go.mod", first, "require (\n") is None
+
+
+def test_malformed_files_is_a_part_error():
+    result = merge_parts([
+        ("UserService", _response({"files": ["user_service/service.py"]})),
+        ("TodoService", _response({"files": {"todo_service/service.py": "t"}})),
+    ])
+    assert not result.success
+    assert result.errors == ["UserService: 'files' must map paths to file contents"]
+    assert result.files == {"todo_service/service.py": "t"}
+
+
+def test_merged_file_that_later_collides():
+    result = merge_parts([
+        ("A", _response({"files": {"package.json": '{"a": 1}'}})),
+        ("B", _response({"files": {"package.json": '{"b": 1}'}})),
+        ("C", _response({"files": {"package.json": "not json"}})),
+    ])
+    assert result.collisions == {"package.json": ["A", "C"]}
+    assert "package.json" not in result.owners
+
+
+def test_component_prompt_uses_target_language():
+    component = Component("UserService", "service")
+    request = generate_component_code(component, Architecture(components=[component]), "go", "gin")
+    assert "component_name/models.go" in request.prompt
+    assert "go.mod is merged" in request.prompt
+    assert ".py" not in request.prompt
+
+
+MANIFESTS = {
+    "typescript": lambda name: ("package.json", json.dumps({"name": name, "dependencies": {name: "^1.0.0"}})),
+    "go": lambda name: ("go.mod", f"module example.com/app\n\ngo 1.21\n\nrequire example.com/{name} v1.0.0\n"),
+}
+
+
+def _responder(request: LLMRequest) -> str:
+    instructions = request.cache_prefix or request.prompt
+    if instructions.startswith("Analyze the conversation"):
+        return json.dumps({"functional": ["Manage users", "Manage todos"], "entities": ["User", "Todo"]})
+    if instructions.startswith("Design a system architecture"):
+        return json.dumps({"components": [
+            {"name": "UserService", "type": "service"}, {"name": "TodoService", "type": "service"},
+        ]})
+    language = instructions.split("LANGUAGE: ", 1)[1].split("\n", 1)[0]
+    extension = {"typescript": ".ts", "go": ".go"}[language]
+    if instructions.startswith("Generate the complete code for the component"):
+        name = request.prompt[len(request.cache_prefix):].split("\n", 1)[0].split(": ", 1)[-1].lower()
+    else:
+        name = "api"
+    manifest, content = MANIFESTS[language](name)
+    return json.dumps({"files": {f"{name}/main{extension}": name, manifest: content}})
+
+
+def test_fan_out_to_non_python_targets():
+    llm = LLMInterface(provider=ReplayProvider(responder=_responder))
+    pipeline = StatementToRealityPipeline(llm=llm, generation="fan_out")
+    result = pipeline.process("Create a todo app with users",
+                              targets=[("typescript", "express"), ("go", "gin")])
+    assert result.success, result.errors
+
+    package = json.loads(result.code["typescript"].files["package.json"])
+    assert set(package["dependencies"]) == {"userservice", "todoservice", "api"}
+    go_mod = result.code["go"].files["go.mod"]
+    for name in ("userservice", "todoservice", "api"):
+        assert f"example.com/{name} v1.0.0" in go_mod
+    assert "go.mod" not in result.code["go"].owners
@@ -0,0 +1,82 @@
+import json
+
+from core.checkpoint import CheckpointStore
+from core.llm_interface import LLMInterface
+from core.models import Architecture, Component, GeneratedCode, LLMRequest
+from core.replay import ReplayProvider
+from generators import incremental
+from pipeline import StatementToRealityPipeline
+
+
+SINGLE_FILES = {
+    "main.py": "from models.user import User\nfrom routers.users import router\n",
+    "models/user.py": "class User: ...\n",
+    "routers/users.py": "router = None\n",
+}
+
+
+def _architecture(tags: bool) -> dict:
+    interfaces = ["create", "list"] + (["tag"] if tags else [])
+    return {
+        "components": [
+            {"name": "UserService", "type": "service", "interfaces": interfaces},
+            {"name": "TodoService", "type": "service", "interfaces": ["create"]},
+        ],
+    }
+
+
+def _responder(request: LLMRequest) -> str:
+    instructions = request.cache_prefix or request.prompt
+    tags = "tag" in request.prompt.lower()
+    if instructions.startswith("Analyze the conversation"):
+        functional = ["Manage users", "Manage todos"] + (["Tag todos"] if tags else [])
+        return json.dumps({"functional": functional, "entities": ["User", "Todo"]})
+    if instructions.startswith("Design a system architecture"):
+        return json.dumps(_architecture(tags))
+    if instructions.startswith("Generate the complete code for the component"):
+        raise AssertionError("single-request code must not be regenerated per component")
+    files = dict(SINGLE_FILES, **({"models/tag.py": "class Tag: ...\n"} if tags else {}))
+    return json.dumps({"files": files, "entry_point": "main.py", "run_command": "uvicorn main:app"})
+
+
+def test_unowned_baseline_is_regenerated_in_full(tmp_path):
+    llm = LLMInterface(provider=ReplayProvider(responder=_responder))
+    pipeline = StatementToRealityPipeline(llm=llm, checkpoints=CheckpointStore(str(tmp_path)))
+    first = pipeline.process("Create a todo app with users")
+    assert first.success, first.errors
+    assert not first.code["python"].owners
+
+    result = pipeline.update(first.run_id, "Create a todo app with users and tags")
+    assert result.success, result.errors
+    assert "python" not in pipeline.plans
+    assert set(result.code["python"].files) == set(SINGLE_FILES) | {"models/tag.py"}
+
+
+def test_plan_without_owners_regenerates_every_part():
+    old = Architecture.from_dict(_architecture(tags=False))
+    new = Architecture.from_dict(_architecture(tags=True))
+    code = GeneratedCode("python", "fastapi", dict(SINGLE_FILES), "main.py", "uvicorn main:app")
+
+    plan = incremental.plan_regeneration(old, new, code)
+    assert plan.regenerate == ["UserService", "TodoService", incremental.API_PART]
+    assert sorted(plan.dropped) == sorted(SINGLE_FILES)
+    assert plan.kept == []
+
+
+def test_plan_with_owners_keeps_unaffected_files():
+    old = Architecture.from_dict(_architecture(tags=False))
+    new = Architecture(
+        components=[Component("UserService", "service", interfaces=["create", "list"]),
+                    Component("TodoService", "service", interfaces=["create", "archive"])],
+    )
+    code = GeneratedCode(
+        "python", "fastapi",
+        {"user_service/service.py": "u", "todo_service/service.py": "t", "api/main.py": "a"},
+        "api/main.py", "uvicorn api.main:app",
+        owners={"user_service/service.py": "UserService", "todo_service/service.py": "TodoService",
+                "api/main.py": "api"},
+    )
+
+    plan = incremental.plan_regeneration(old, new, code)
+    assert plan.regenerate == ["TodoService", incremental.API_PART]
+    assert plan.kept == ["user_service/service.py"]
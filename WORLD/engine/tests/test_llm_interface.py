@@ -0,0 +1,13 @@
+from core.cache import ResponseCache
+from core.llm_interface import get_llm
+
+
+def test_get_llm_with_cache_leaves_shared_interface_alone():
+    shared = get_llm("external")
+    cache = ResponseCache()
+    cached = get_llm("external", cache=cache)
+
+    assert cached is not shared
+    assert cached.cache is cache
+    assert get_llm("external") is shared
+    assert shared.cache is None
@@ -0,0 +1,549 @@
+"""
+Security Hook Benchmark and Fuzz Harness
+========================================
+
+Generates a seeded corpus of realistic agent commands and adversarial
+inputs, then:
+
+1. Throughput: validations/sec and p50/p99/max latency for the full
+   uncached check (parse + policy), the hook path with a warm cache over a
+   repeated working set, and the parsing helpers (extract_commands,
+   split_command_segments).
+2. Differential: compares the argv of every simple command found by
+   shell_parser against a reference parser. The reference is bashlex when it
+   is installed, otherwise shlex (punctuation_chars). shlex cannot see
+   substitutions, heredocs, escapes, comments or compound commands; inputs
+   outside that subset are judged by bash itself (see bash_reference), which
+   runs them with every command stubbed out and logs what it would execute.
+   A command bash runs that the parser did not see is a mismatch.
+3. Properties that must hold for every generated input:
+   - no_exception:     validation never raises
+   - dangerous_blocked: a blocked payload stays blocked in any context
+                        (after ; && || | & or a newline, in $(...), backticks,
+                        subshells, groups, if/for bodies, heredocs, process
+                        substitution)
+   - quoted_allowed:   the same payload as a single-quoted echo argument is
+                        allowed
+   - malformed_blocked: unterminated quotes and substitutions are blocked
+   - conjunction:      "A && B" and "A; B" are allowed iff A and B both are
+   - cache_consistent: cached decisions equal uncached ones
+   - batch_consistent: validate_many equals validate_command per command
+
+Usage:
+    python bench_security.py
+    python bench_security.py --seed 7 --count 20000 --strict
+    python bench_security.py --no-bash    # shlex only, no bash processes
+
+Exits 1 if a property fails (or, with --strict, on any misparse).
+"""
+
+import argparse
+import os
+import random
+import re
+import select
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from policy import active_store
+from security import (
+    _validate_uncached,
+    extract_commands,
+    split_command_segments,
+    validate_command,
+    validate_many,
+)
+from shell_parser import ParseError, SimpleCommand, parse, simple_commands
+
+try:
+    import bashlex
+except ImportError:
+    bashlex = None
+
+
+# =============================================================================
+# Corpus
+# =============================================================================
+
+PATHS = ["src", "src/app.py", "tests", "README.md", "package.json", "dist", "build/out.js",
+         "node_modules/.cache", "~/proj/tmp", "./scripts/run.sh", "web/src/index.tsx", "logs/*.log"]
+WORDS = ["fix", "login", "api", "retry", "cache", "layout", "auth", "docs", "parser", "ui"]
+SCRIPTS = ["test", "build", "dev", "lint", "start"]
+
+REALISTIC = [
+    "git status", "git diff --stat", "git log --oneline -n {n}", 'git commit -m "{word}: update {word}"',
+    "git add {path}", "git checkout -b feature/{word}", "git push origin HEAD",
+    "npm test", "npm run {script}", "npm install {word}-utils", "npx vite build", "node {path}",
+    "ls -la {path}", "cat {path}", "head -n {n} {path}", "tail -n {n} {path}", "wc -l {path}",
+    "grep -rn '{word}' {path}", "find {path} -name '*.py'", "mkdir -p {path}", "touch {path}",
+    "cp {path} {path}", "mv {path} {path}.bak", "rm -rf {rm_path}", "rm -f {rm_path}",
+    "chmod +x {path}", "./init.sh", "pkill -f vite", "sleep {n}", "ps aux", "lsof -i :{port}",
+    "curl -s http://localhost:{port}/health", "python3 -m pytest -q {path}", "which node", "pwd",
+    "echo {word} > {path}", "printf '%s\\n' {word}",
+]
+HEREDOC = "cat > {path} <<'EOF'\n{word} = 1\nprint({word})\nEOF"
+RM_PATHS = ["node_modules", "dist", "build", ".cache", "coverage", "~/proj/dist", "/tmp/{word}",
+            "/home/dev/proj/{word}", "web/node_modules/.vite"]
+
+DANGEROUS = [
+    "rm -rf /", "rm -rf /etc", "rm -rf ~", "rm -rf /*", "rm -rf //usr", "rm -rf /tmp/../etc",
+    "rm -rf /{{etc,tmp}}", "rm -rf $HOME", "rm -rf ~/..", "rm -rf /home/*", "rm -- -rf /var",
+    "/bin/rm -rf /usr", "chmod 777 /", "chmod -R +x /", "chmod u+s a", "pkill -9 sshd",
+    "whoami", "sudo ls", "bash -c ls", "sh -c ls", "eval ls", "dd if=/dev/zero of=/dev/sda",
+    "init.sh", "/tmp/init.sh.evil",
+]
+CONTEXTS = [
+    "{p}", "ls; {p}", "ls;{p}", "ls && {p}", "ls &&{p}", "ls || {p}", "ls | {p}", "ls & {p}",
+    "ls\n{p}", "echo $({p})", "echo \"$({p})\"", "echo `{p}`", "({p})", "{{ {p}; }}",
+    "if ls; then {p}; fi", "for f in a b; do {p}; done", "while ls; do {p}; done",
+    "cat <<EOF\n$({p})\nEOF", "diff <({p}) a", "ls > >({p})", "x=$({p}) ls", "ls $(echo $({p}))",
+    "npm test 2>&1 | {p}", "! {p}", "case a in a) {p};; esac", "ls && ({p}) || ls",
+    # Quotes inside ${...} that a parser could end early, hiding the payload in a "comment"
+    "echo ${{x:-'}}'}} ; {p} ; #'", "echo ${{x:-'}}'}}\n{p}\n#'", "echo \"${{x:-'}}'}}\"; {p}",
+    "cat <<EOF\n${{x:-'}}'}}\nEOF\n{p}",
+]
+MALFORMED = ["echo 'unterminated", 'echo "unterminated', "echo $(ls", "echo `ls", "ls &&",
+             "ls |", "(ls", "if ls; then ls", "ls )", "ls ;; ls", "echo ${x", "| ls"]
+JUNK = " \t\n;&|<>()$`'\"\\{}*?~#!=-/.abcrmlsx0123"
+# Quotes, $'...', ${...} operators and comments interleaved around a hidden command
+QUOTE_ATOMS = ["'}'", "'{'", "'", '"', "}", "\\}", "\\'", "#", " #", "$'\\''", "$'}'", "$'\\'}'",
+               '$"}"', "\"'\"", "'\"'", "\"${y:-'}'}\"", "${y:-\"}\"}", "$(echo '}')", "`echo '#'`"]
+QUOTE_TEMPLATES = [
+    "echo ${{x:-{a}}} ; {c} ; #{b}", "echo ${{x:-{a}}}\n{c}\n#{b}", "echo \"${{x:-{a}}}\"; {c} #{b}",
+    "echo ${{x#{a}}}{b}; {c}", "echo ${{x/{a}/{b}}}; {c}", "echo $'{a}' ; {c} #{b}",
+    "echo {a}{b} ; {c}", "echo {a} # {b}\n{c}", "echo x#{a}; {c} #{b}", "cat <<EOF\n${{x:-{a}}}\nEOF\n{c}",
+    "echo $({c} ${{x:-{a}}}) #{b}", "echo ${{x:-${{y:-{a}}}}} ; {c}",
+]
+
+
+def fill(template: str, rng: random.Random) -> str:
+    def path() -> str:
+        return rng.choice(PATHS)
+
+    return template.format(
+        n=rng.randint(1, 200), word=rng.choice(WORDS), script=rng.choice(SCRIPTS),
+        port=rng.choice([3000, 5173, 8000, 8080]), path=path(),
+        rm_path=rng.choice(RM_PATHS).format(word=rng.choice(WORDS)),
+    )
+
+
+def realistic(rng: random.Random) -> str:
+    """One agent-style command: a simple command, a chain, a pipeline or a heredoc."""
+    roll = rng.random()
+    if roll < 0.05:
+        return fill(HEREDOC, rng)
+    parts = [fill(rng.choice(REALISTIC), rng) for _ in range(rng.choice([1, 1, 1, 2, 2, 3]))]
+    command = parts[0]
+    for part in parts[1:]:
+        command += rng.choice([" && ", "; ", " || ", " | "]) + part
+    if roll > 0.85:
+        command = f"cd {rng.choice(PATHS)} && {command} 2>&1 | tail -n {rng.randint(5, 50)}"
+    return command
+
+
+def quoting(rng: random.Random) -> str:
+    """A command whose quoting may or may not hide `touch` from a parser; bash decides."""
+    return rng.choice(QUOTE_TEMPLATES).format(
+        a=rng.choice(QUOTE_ATOMS), b=rng.choice(QUOTE_ATOMS), c=f"touch q{rng.randint(0, 9)}")
+
+
+def adversarial(rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.45:
+        return rng.choice(CONTEXTS).format(p=rng.choice(DANGEROUS).format())
+    if roll < 0.6:
+        return quoting(rng)
+    if roll < 0.75:
+        return rng.choice(MALFORMED)
+    if roll < 0.85:
+        depth = rng.randint(1, 60)
+        return "echo " + "$(" * depth + "ls" + ")" * depth
+    return "".join(rng.choice(JUNK) for _ in range(rng.randint(0, 120)))
+
+
+def corpus(count: int, seed: int) -> tuple[list[str], list[str]]:
+    rng = random.Random(seed)
+    return (
+        [realistic(rng) for _ in range(count)],
+        [adversarial(rng) for _ in range(count // 2)],
+    )
+
+
+# =============================================================================
+# Throughput
+# =============================================================================
+
+
+def latencies(call: Callable[[str], object], commands: list[str]) -> list[int]:
+    timings = []
+    clock = time.perf_counter_ns
+    for command in commands:
+        start = clock()
+        call(command)
+        timings.append(clock() - start)
+    return timings
+
+
+def summarize(name: str, timings: list[int]) -> str:
+    ordered = sorted(timings)
+    total_s = sum(ordered) / 1e9
+    p50 = ordered[len(ordered) // 2] / 1e3
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] / 1e3
+    return (f"{name:<22} {len(ordered) / total_s:12,.0f} {p50:9.1f} {p99:9.1f} "
+            f"{ordered[-1] / 1e3:10.1f}")
+
+
+def throughput(commands: list[str]) -> list[str]:
+    store = active_store()
+    policy = store.current()
+    store.cache.clear()
+    # A working set that fits the cache, repeated, as a long agent session reissues commands
+    hot = commands[:store.cache.maxsize // 2]
+    for command in hot:
+        validate_command(command)
+    rows = [
+        summarize("uncached validate", latencies(lambda c: _validate_uncached(c, policy), commands)),
+        summarize("validate (warm cache)", latencies(validate_command, hot * 4)),
+        summarize("extract_commands", latencies(extract_commands, commands)),
+        summarize("split_command_segments", latencies(split_command_segments, commands)),
+    ]
+    header = f"{'path':<22} {'validations/s':>12} {'p50 us':>9} {'p99 us':>9} {'max us':>10}"
+    return [header, "-" * len(header), *rows]
+
+
+# =============================================================================
+# Differential check
+# =============================================================================
+
+SEPARATORS = {";", "&&", "||", "|", "|&", "&", "\n"}
+REDIRECTS = {"<", ">", ">>", ">&", "<&", "&>", "&>>", ">|", "<>", "<<<"}
+RESERVED = {"if", "then", "else", "elif", "fi", "for", "while", "until", "do", "done", "case",
+            "esac", "function", "select", "!", "{", "}", "[[", "]]", "time", "coproc"}
+ASSIGNMENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+# shlex drops quoting, so a quoted run of operator characters looks like an operator
+QUOTED_PUNCTUATION = re.compile(r"(['\"])[();<>|&\n]*\1")
+OUTSIDE_SHLEX = set("$`\\#\r")
+
+
+def ours(command: str) -> list[list[str]] | None:
+    try:
+        tree = parse(command)
+    except ParseError:
+        return None
+    return [cmd.argv for cmd in simple_commands(tree) if cmd.words]
+
+
+def reference(command: str) -> list[list[str]] | None | bool:
+    """argv per simple command by the reference parser; None if it rejects, False if out of scope."""
+    if bashlex is not None:
+        return _bashlex_reference(command)
+    if OUTSIDE_SHLEX & set(command) or "<<" in command.replace("<<<", "") or QUOTED_PUNCTUATION.search(command):
+        return False
+    lexer = shlex.shlex(command, posix=True, punctuation_chars="();<>|&\n")
+    lexer.whitespace = " \t"
+    lexer.whitespace_split = True
+    lexer.commenters = ""
+    try:
+        tokens = list(lexer)
+    except ValueError:
+        return None
+
+    commands, words, expect_target, pending = [], [], False, ""
+    for token in tokens:
+        if expect_target:
+            expect_target = False
+        elif token in SEPARATORS:
+            if not words and token != "\n":
+                return None  # An operator with no command before it
+            if words:
+                commands.append(words)
+            words, pending = [], token
+            continue
+        elif token in REDIRECTS:
+            # A digit word written directly against the operator is an IO number
+            if words and words[-1].isdigit() and f"{words[-1]}{token}" in command:
+                words.pop()
+            expect_target = True
+        elif set(token) <= set("();<>|&\n"):
+            return False  # Subshells, ;; and other operators shlex cannot place
+        elif not words and token in RESERVED:
+            return False
+        elif not words and ASSIGNMENT.match(token):
+            continue
+        else:
+            words.append(token)
+        pending = ""
+    if expect_target or pending in ("&&", "||", "|", "|&"):
+        return None
+    if words:
+        commands.append(words)
+    return commands
+
+
+# bash as the oracle. BASH_ENV runs before restricted mode starts: it sends
+# xtrace to a pipe, makes every command name unknown (empty PATH, builtins
+# disabled) and answers unknown commands with a handler that does nothing.
+# Restricted mode then refuses command names containing "/" and output
+# redirections, so nothing is executed or written; xtrace has already logged
+# the expanded argv by then. Each input runs twice, with the stubs succeeding
+# and failing, so both sides of && and || are reached.
+BASH = shutil.which("bash")
+BASH_SETUP = """\
+command_not_found_handle() {{ (( ORACLE_STATUS )); }}
+PATH=/nonexistent
+PS4='+ '
+FUNCNEST=8
+BASH_XTRACEFD=$ORACLE_FD
+readonly PATH PS4 FUNCNEST BASH_XTRACEFD ORACLE_FD ORACLE_STATUS
+enable -n {builtins}
+set -x
+enable -n set enable
+"""
+BASH_TIMEOUT = 2.0
+MAX_TRACE = 1 << 14  # Bytes of trace kept; an endless loop has shown its commands by then
+TRACE_RECORD = re.compile(r"^\++ ", re.MULTILINE)
+NOT_TRACED = {"[[", "((", "for", "select", "case"}
+DYNAMIC = set("$`*?[{~\\")
+
+
+def bash_setup(directory: str) -> str | None:
+    """Write the BASH_ENV file into `directory`; None without a usable bash."""
+    if BASH is None:
+        return None
+    try:
+        listing = subprocess.run([BASH, "-c", "enable"], capture_output=True, text=True, timeout=5).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    builtins = [line.split()[-1] for line in listing.splitlines()]
+    path = os.path.join(directory, "bash_env")
+    with open(path, "w") as f:
+        f.write(BASH_SETUP.format(builtins=" ".join(b for b in builtins if b not in ("set", "enable"))))
+    return path
+
+
+def _trace(command: str, setup: str, directory: str, status: int) -> list[list[str]]:
+    """argv of every simple command bash reaches, stubs exiting with `status`."""
+    read_end, write_end = os.pipe()
+    env = {"BASH_ENV": setup, "ORACLE_FD": str(write_end), "ORACLE_STATUS": "1" if status == 0 else "0",
+           "HOME": directory}
+    process = subprocess.Popen(
+        [BASH, "-r", "-c", "--", command], cwd=directory, env=env, stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, pass_fds=(write_end,), start_new_session=True,
+    )
+    os.close(write_end)
+    chunks, size, deadline = [], 0, time.monotonic() + BASH_TIMEOUT
+    with os.fdopen(read_end, "rb", buffering=0) as trace:
+        while (remaining := deadline - time.monotonic()) > 0:
+            if select.select([trace], [], [], remaining)[0]:
+                chunk = trace.read(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > MAX_TRACE:
+                    break
+    try:
+        os.killpg(process.pid, signal.SIGKILL)  # Loops and background jobs still running
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+    records = []
+    # The first record is the setup's own "enable -n set enable"
+    for record in TRACE_RECORD.split(b"".join(chunks).decode(errors="replace"))[2:]:
+        if ASSIGNMENT.match(record):
+            continue  # xtrace writes assignments as records of their own, unquoted
+        try:
+            words = shlex.split(record.rstrip("\n"))
+        except ValueError:
+            continue
+        if words and words[0] not in NOT_TRACED:
+            records.append(words)
+    return records
+
+
+def bash_reference(command: str, setup: str, directory: str) -> str:
+    """How our parse compares with what bash runs: a differential() group name."""
+    if "\0" in command:
+        return "out_of_scope"
+    valid = subprocess.run([BASH, "-n", "-c", "--", command], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=BASH_TIMEOUT).returncode == 0
+    try:
+        tree = parse(command)
+    except ParseError:
+        return "rejects_valid" if valid else "agree"
+    if not valid:
+        return "accepts_invalid"
+
+    ran = _trace(command, setup, directory, 0) + _trace(command, setup, directory, 1)
+    commands = [cmd for cmd in simple_commands(tree) if cmd.words and cmd.argv[0] != "[["]
+    names = {cmd.argv[0] for cmd in commands}
+    if any(DYNAMIC & set(name) or not name.isprintable() for name in names):
+        return "out_of_scope"  # A name only bash can expand, or one xtrace writes as $'...'
+    for argv in ran:
+        # Each command bash runs is one the parser saw: same argv, or words only bash can expand
+        if not any(cmd.argv[0] == argv[0] and (_expands(cmd) or cmd.argv == argv) for cmd in commands):
+            return "mismatch"
+    return "agree"
+
+
+def _expands(cmd: SimpleCommand) -> bool:
+    return any(word.substitutions or DYNAMIC & set(word.value) or not word.value.isprintable()
+               for word in cmd.words)
+
+
+def _bashlex_reference(command: str) -> list[list[str]] | None:
+    try:
+        trees = bashlex.parse(command)
+    except Exception:  # bashlex raises its own error types, and some internal ones
+        return None
+    commands = []
+
+    def walk(node):
+        if node.kind == "command":
+            words = [part.word for part in node.parts if part.kind == "word"]
+            if words:
+                commands.append(words)
+        for child in getattr(node, "parts", None) or []:
+            walk(child)
+        for attr in ("list", "command", "output"):
+            child = getattr(node, attr, None)
+            if child is not None and hasattr(child, "kind"):
+                walk(child)
+
+    for tree in trees:
+        walk(tree)
+    return commands
+
+
+def differential(commands: list[str], use_bash: bool = True) -> dict[str, list[str]]:
+    """Group commands by how our parse compares with the reference, or with bash out of its scope."""
+    found: dict[str, list[str]] = {"agree": [], "mismatch": [], "accepts_invalid": [],
+                                   "rejects_valid": [], "out_of_scope": []}
+    with tempfile.TemporaryDirectory() as directory:
+        setup = bash_setup(directory) if use_bash else None
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+            groups = list(pool.map(lambda command: _compare(command, setup, directory), commands))
+    for command, group in zip(commands, groups):
+        found[group].append(command)
+    return found
+
+
+def _compare(command: str, setup: str | None, directory: str) -> str:
+    expected = reference(command)
+    if expected is False:
+        return bash_reference(command, setup, directory) if setup else "out_of_scope"
+    actual = ours(command)
+    if expected is None:
+        return "agree" if actual is None else "accepts_invalid"
+    if actual is None:
+        return "rejects_valid"
+    return "agree" if sorted(actual) == sorted(expected) else "mismatch"
+
+
+# =============================================================================
+# Properties
+# =============================================================================
+
+
+def properties(realistic_commands: list[str], adversarial_commands: list[str], rng: random.Random) -> dict[str, list[str]]:
+    failures: dict[str, list[str]] = {name: [] for name in (
+        "no_exception", "dangerous_blocked", "quoted_allowed", "malformed_blocked",
+        "conjunction", "cache_consistent", "batch_consistent")}
+    policy = active_store().current()
+
+    def allowed(command: str) -> bool:
+        return validate_command(command).allowed
+
+    for command in realistic_commands + adversarial_commands:
+        try:
+            uncached = _validate_uncached(command, policy)
+        except Exception as e:  # Any exception here is a finding
+            failures["no_exception"].append(f"{command!r}: {type(e).__name__}: {e}")
+            continue
+        if validate_command(command) != uncached:
+            failures["cache_consistent"].append(command)
+
+    for payload in DANGEROUS:
+        payload = payload.format()
+        if allowed(payload):
+            continue  # Allowed at this trust level; nothing to carry into contexts
+        for context in CONTEXTS:
+            command = context.format(p=payload)
+            if allowed(command):
+                failures["dangerous_blocked"].append(command)
+        if "'" not in payload and allowed("echo ok") and not allowed(f"echo '{payload}'"):
+            failures["quoted_allowed"].append(f"echo '{payload}'")
+
+    for command in MALFORMED:
+        if allowed(command):
+            failures["malformed_blocked"].append(command)
+
+    simple = [c for c in realistic_commands if "\n" not in c and not c.rstrip().endswith("&")]
+    for _ in range(min(2000, len(simple))):
+        a, b = rng.choice(simple), rng.choice(simple)
+        expected = allowed(a) and allowed(b)
+        for joined in (f"{a} && {b}", f"{a}; {b}"):
+            if allowed(joined) != expected:
+                failures["conjunction"].append(joined)
+
+    batch = realistic_commands[:500] + adversarial_commands[:500]
+    if validate_many(batch) != [validate_command(c) for c in batch]:
+        failures["batch_consistent"].append(f"{len(batch)} commands")
+    return failures
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+
+def report(title: str, groups: dict[str, list[str]], examples: int):
+    print(title)
+    for name, items in groups.items():
+        print(f"  {name:<20} {len(items)}")
+        for item in items[:examples] if name not in ("agree", "out_of_scope") else []:
+            print(f"      {item!r}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark and fuzz the Bash security hook")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed")
+    parser.add_argument("--count", type=int, default=5000, help="Realistic commands (adversarial: half)")
+    parser.add_argument("--examples", type=int, default=5, help="Failing examples to print per group")
+    parser.add_argument("--strict", action="store_true", help="Also fail on reference misparses")
+    parser.add_argument("--no-bash", action="store_true", help="Do not use bash as the oracle")
+    args = parser.parse_args(argv)
+
+    realistic_commands, adversarial_commands = corpus(args.count, args.seed)
+    mixed = realistic_commands + adversarial_commands
+    random.Random(args.seed).shuffle(mixed)
+    print(f"{len(realistic_commands)} realistic + {len(adversarial_commands)} adversarial commands, "
+          f"seed {args.seed}, policy {active_store().current().version}")
+    print()
+    print("\n".join(throughput(mixed)))
+    print()
+
+    use_bash = BASH is not None and not args.no_bash and bashlex is None
+    found = differential(mixed, use_bash)
+    oracle = "bashlex" if bashlex else "shlex, and bash out of its scope" if use_bash else "shlex"
+    report(f"Differential check against {oracle}", found, args.examples)
+    print()
+    failures = properties(realistic_commands, adversarial_commands, random.Random(args.seed))
+    report("Property failures", failures, args.examples)
+
+    failed = any(failures.values())
+    if args.strict:
+        failed = failed or bool(found["mismatch"] or found["accepts_invalid"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
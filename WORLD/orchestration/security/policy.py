@@ -0,0 +1,621 @@
+"""
+Security Policy
+===============
+
+Declarative Bash command policy for the security hook, read from
+policy.json and compiled once per build and trust level.
+
+The policy file has three parts:
+- commands: the base allowlist ("allow") and per-command rules ("rules")
+- trust_levels: one overlay per trust level (Supervised ... Commander)
+- builds: one overlay per build, optionally with its own per-trust-level
+  overlays, organized like WORLD/builds/*/build.json. A build must be
+  listed, even with an empty overlay; an unknown build blocks everything.
+
+Overlays apply in that order: trust level, build, build at trust level.
+"allow" adds commands, "deny" removes them, and "rules" overrides rule
+parameters per command.
+
+Compiling resolves the overlays into a dispatch table from command name to
+validator. Regexes are precompiled, and dangerous rm paths go into a prefix
+trie. Checking a command is one dictionary lookup plus at most one validator
+call.
+
+Selection (environment):
+    SECURITY_POLICY_FILE  policy file (default: policy.json next to this module)
+    AGENT_BUILD           build id (default: the file's "default")
+    AGENT_TRUST_LEVEL     trust level name or number (default: the file's "default")
+
+The file is reloaded when it changes on disk. If the policy cannot be loaded,
+every command is blocked. If a reload fails, the previous policy stays active.
+
+Each store keeps an LRU cache of decisions keyed by the exact command string
+and the policy version, so repeated commands (git status, npm test, ls) skip
+parsing and validation. A reload that changes the policy clears the cache.
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import posixpath
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple
+
+POLICY_FILE: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "policy.json")
+
+MAX_BRACE_EXPANSIONS = 256  # rm paths expanding to more alternatives are blocked
+DECISION_CACHE_SIZE = 1024  # Decisions kept per policy store
+MAX_CACHED_COMMAND = 4096   # Longer command strings are validated but not cached
+MAX_STORES = 32             # Policy stores kept; the least recently used is dropped
+
+
+class ValidationResult(NamedTuple):
+    """Result of validating a command."""
+
+    allowed: bool
+    reason: str = ""
+
+
+ALLOWED = ValidationResult(allowed=True)
+
+Validator = Callable[[list[str]], ValidationResult]
+
+
+class PolicyError(ValueError):
+    """The policy file is invalid or names an unknown build, trust level or validator."""
+
+
+class Policy:
+    """A compiled policy for one build and trust level."""
+
+    __slots__ = ("version", "build", "trust_level", "dispatch", "rules", "error")
+
+    def __init__(
+        self,
+        version: str,
+        build: str,
+        trust_level: str,
+        dispatch: dict[str, Validator | None],
+        rules: dict[str, Validator],
+        error: str = "",
+    ):
+        self.version = version
+        self.build = build
+        self.trust_level = trust_level
+        self.dispatch = dispatch  # Allowed command -> validator, None if none is needed
+        self.rules = rules  # Every compiled rule, including those of denied commands
+        self.error = error
+
+    @classmethod
+    def deny_all(cls, error: str) -> "Policy":
+        """The fail-safe policy used when no policy could be loaded."""
+        return cls(version="", build="", trust_level="", dispatch={}, rules={}, error=error)
+
+    @property
+    def allowed_commands(self) -> set[str]:
+        return set(self.dispatch)
+
+    @property
+    def validated_commands(self) -> set[str]:
+        return {name for name, validator in self.dispatch.items() if validator is not None}
+
+    def check(self, name: str, argv: list[str]) -> ValidationResult:
+        """
+        Validate one command.
+
+        Args:
+            name: Base command name (argv[0] without its path)
+            argv: The full parsed command
+
+        Returns:
+            ValidationResult with allowed status and reason if blocked
+        """
+        try:
+            validator = self.dispatch[name]
+        except KeyError:
+            if self.error:
+                return ValidationResult(
+                    allowed=False, reason=f"Security policy could not be loaded: {self.error}"
+                )
+            return ValidationResult(
+                allowed=False, reason=f"Command '{name}' is not in the allowed commands list"
+            )
+        return ALLOWED if validator is None else validator(argv)
+
+
+# =============================================================================
+# Loading
+# =============================================================================
+
+def load_policy(path: str = POLICY_FILE, build: str | None = None, trust_level: str | None = None) -> Policy:
+    """
+    Read and compile a policy file.
+
+    Args:
+        path: The policy file
+        build: Build id, or None for the file's default
+        trust_level: Trust level name or number, or None for the file's default
+
+    Returns:
+        The compiled policy
+
+    Raises:
+        OSError: The file cannot be read
+        PolicyError: The file is not a valid policy
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        document = json.loads(data)
+    except ValueError as e:
+        raise PolicyError(f"{path}: {e}") from None
+    return compile_policy(document, build, trust_level, hashlib.sha256(data).hexdigest()[:12])
+
+
+def compile_policy(
+    document: dict[str, Any], build: str | None, trust_level: str | None, digest: str = ""
+) -> Policy:
+    """Resolve the overlays of a policy document for one build and trust level."""
+    try:
+        default = document.get("default", {})
+        build = build or default.get("build", "")
+        trust = _trust_level(document.get("trust_levels", {}), trust_level or default.get("trust_level"))
+
+        base = document.get("commands", {})
+        allowed = set(base.get("allow", []))
+        rules = {name: dict(rule) for name, rule in base.get("rules", {}).items()}
+        build_overlay = _build(document.get("builds", {}), build)
+        overlays = (
+            document["trust_levels"][trust],
+            build_overlay,
+            build_overlay.get("trust_levels", {}).get(trust, {}),
+        )
+        for overlay in overlays:
+            allowed |= set(overlay.get("allow", []))
+            allowed -= set(overlay.get("deny", []))
+            for name, rule in overlay.get("rules", {}).items():
+                rules[name] = {**rules.get(name, {}), **rule}
+
+        compiled = {name: _compile_rule(name, rule) for name, rule in rules.items()}
+    except (AttributeError, KeyError, TypeError, re.error) as e:
+        raise PolicyError(f"Invalid policy: {e!r}") from None
+    dispatch = {name: compiled.get(name) for name in sorted(allowed)}
+    return Policy(f"{digest}:{build}:{trust}", build, trust, dispatch, compiled)
+
+
+def _build(builds: dict[str, Any], build: str) -> dict[str, Any]:
+    """The overlay of a build listed in the policy file; a typo must not fall back to the base policy."""
+    try:
+        return builds[build]
+    except KeyError:
+        raise PolicyError(f"Unknown build: {build!r}") from None
+
+
+def _trust_level(levels: dict[str, Any], value: Any) -> str:
+    """Trust level key for a name ("Commander", "commander") or number ("4")."""
+    text = str(value).strip().lower()
+    for name, level in levels.items():
+        if text == name.lower() or text == str(level.get("level")):
+            return name
+    raise PolicyError(f"Unknown trust level: {value!r}")
+
+
+class DecisionCache:
+    """
+    Bounded LRU cache of validation decisions, keyed by (command, policy version).
+
+    Counters (hits, misses, evictions, invalidations) survive clear(), so the
+    hit rate covers the whole session.
+    """
+
+    def __init__(self, maxsize: int = DECISION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[tuple[str, str], ValidationResult] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, command: str, version: str) -> ValidationResult | None:
+        key = (command, version)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, command: str, version: str, result: ValidationResult):
+        if self.maxsize <= 0 or len(command) > MAX_CACHED_COMMAND:
+            return
+        key = (command, version)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class PolicyStore:
+    """
+    A policy file compiled for one build and trust level, reloaded when it changes.
+
+    Each current() call stats the file (inode, mtime, size) and recompiles
+    only if it changed. The store's decision cache is cleared whenever the
+    compiled policy version changes.
+    """
+
+    def __init__(self, path: str = POLICY_FILE, build: str | None = None, trust_level: str | None = None):
+        self.path = path
+        self.build = build
+        self.trust_level = trust_level
+        self.error = ""  # Why the last load failed, if it did
+        self.reloads = 0
+        self._stamp: tuple[int, int, int] | None = None
+        self._policy: Policy | None = None
+        self._lock = threading.Lock()
+        self.cache = DecisionCache()
+
+    def current(self) -> Policy:
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp != self._stamp or self._policy is None:
+            self._reload(stamp)
+        return self._policy
+
+    def _reload(self, stamp: tuple[int, int, int] | None):
+        with self._lock:
+            if stamp == self._stamp and self._policy is not None:
+                return  # Another thread reloaded it
+            try:
+                policy = load_policy(self.path, self.build, self.trust_level)
+            except (OSError, PolicyError) as e:
+                self.error = str(e)
+                if self._policy is None:
+                    self._policy = Policy.deny_all(self.error)
+            else:
+                if self._policy is None or policy.version != self._policy.version:
+                    self.cache.clear()
+                self._policy = policy
+                self.error = ""
+                self.reloads += 1
+            self._stamp = stamp
+
+
+_stores: OrderedDict[tuple[str, str | None, str | None], PolicyStore] = OrderedDict()
+_stores_lock = threading.Lock()
+
+
+def policy_store(path: str | None = None, build: str | None = None, trust_level: str | None = None) -> PolicyStore:
+    """
+    The shared store for a policy file, build and trust level.
+
+    At most MAX_STORES are kept, so callers naming many selections (the
+    validation daemon's clients) cannot grow this without bound. An evicted
+    store is recreated on its next use, with an empty decision cache.
+    """
+    key = (path or POLICY_FILE, build or None, trust_level or None)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = PolicyStore(*key)
+            if len(_stores) > MAX_STORES:
+                _stores.popitem(last=False)
+        else:
+            _stores.move_to_end(key)
+    return store
+
+
+def active_store() -> PolicyStore:
+    """The store selected by SECURITY_POLICY_FILE, AGENT_BUILD and AGENT_TRUST_LEVEL."""
+    return policy_store(
+        os.environ.get("SECURITY_POLICY_FILE"),
+        os.environ.get("AGENT_BUILD"),
+        os.environ.get("AGENT_TRUST_LEVEL"),
+    )
+
+
+def active_policy() -> Policy:
+    return active_store().current()
+
+
+# =============================================================================
+# Validators
+# =============================================================================
+
+def _compile_rule(name: str, rule: dict[str, Any]) -> Validator:
+    kind = rule.get("validator")
+    if kind not in _VALIDATORS:
+        raise PolicyError(f"Unknown validator for {name!r}: {kind!r}")
+    return _VALIDATORS[kind](rule)
+
+
+def _pkill(rule: dict[str, Any]) -> Validator:
+    """pkill only for the listed (dev) process names."""
+    processes: frozenset[str] = frozenset(rule["processes"])
+    listed = set(processes)
+
+    def validate(tokens: list[str]) -> ValidationResult:
+        if not tokens:
+            return ValidationResult(allowed=False, reason="Empty pkill command")
+
+        # Separate flags from arguments
+        args = [token for token in tokens[1:] if not token.startswith("-")]
+        if not args:
+            return ValidationResult(allowed=False, reason="pkill requires a process name")
+
+        # The target is typically the last non-flag argument
+        target: str = args[-1]
+
+        # For -f flag (full command line match), extract the first word as process name
+        # e.g., "pkill -f 'node server.js'" -> target is "node server.js", process is "node"
+        if " " in target:
+            target = target.split()[0]
+
+        if target in processes:
+            return ALLOWED
+        return ValidationResult(
+            allowed=False,
+            reason=f"pkill only allowed for dev processes: {listed}",
+        )
+
+    return validate
+
+
+def _chmod(rule: dict[str, Any]) -> Validator:
+    """chmod only with a mode matching the rule (by default +x variants), no flags."""
+    mode_pattern = re.compile(rule["mode"])
+
+    def validate(tokens: list[str]) -> ValidationResult:
+        if not tokens or tokens[0] != "chmod":
+            return ValidationResult(allowed=False, reason="Not a chmod command")
+
+        mode: str | None = None
+        files: list[str] = []
+        for token in tokens[1:]:
+            if token.startswith("-"):
+                return ValidationResult(allowed=False, reason="chmod flags are not allowed")
+            elif mode is None:
+                mode = token
+            else:
+                files.append(token)
+
+        if mode is None:
+            return ValidationResult(allowed=False, reason="chmod requires a mode")
+        if not files:
+            return ValidationResult(allowed=False, reason="chmod requires at least one file")
+        if not mode_pattern.match(mode):
+            return ValidationResult(
+                allowed=False, reason=f"chmod only allowed with +x mode, got: {mode}"
+            )
+        return ALLOWED
+
+    return validate
+
+
+def _init_script(rule: dict[str, Any]) -> Validator:
+    """Only scripts whose path matches the rule (by default ./init.sh or */init.sh)."""
+    script_pattern = re.compile(rule["script"])
+
+    def validate(tokens: list[str]) -> ValidationResult:
+        if not tokens:
+            return ValidationResult(allowed=False, reason="Empty command")
+        script: str = tokens[0]
+        if script_pattern.search(script):
+            return ALLOWED
+        return ValidationResult(
+            allowed=False, reason=f"Only ./init.sh is allowed, got: {script}"
+        )
+
+    return validate
+
+
+def _rm(rule: dict[str, Any]) -> Validator:
+    """
+    rm anywhere except on, or directly under, a dangerous path.
+
+    Paths are normalized (repeated slashes, "." and ".." segments), brace
+    expansions are expanded, and glob components are matched against the
+    dangerous paths. With block_expansions, paths whose target depends on
+    variables, command substitution or ~user are blocked.
+    """
+    dangerous = _PathTrie(rule["dangerous_paths"])
+    block_expansions = bool(rule.get("block_expansions", True))
+
+    def validate(tokens: list[str]) -> ValidationResult:
+        if not tokens or tokens[0] != "rm":
+            return ValidationResult(allowed=False, reason="Not an rm command")
+
+        paths: list[str] = []
+        options_done = False
+        for token in tokens[1:]:
+            if options_done or not token.startswith("-"):
+                paths.append(token)
+            elif token == "--":
+                options_done = True
+        if not paths:
+            return ValidationResult(allowed=False, reason="rm requires at least one path")
+
+        for path in paths:
+            candidates = _expand_braces(path)
+            if candidates is None:
+                return ValidationResult(
+                    allowed=False, reason=f"rm on '{path}' expands to too many paths"
+                )
+            for candidate in candidates:
+                if block_expansions and _has_expansion(candidate):
+                    return ValidationResult(
+                        allowed=False,
+                        reason=f"rm on '{path}' is not allowed: the path depends on shell expansion",
+                    )
+                normalized = _normalize(candidate)
+
+                # Block rm /* patterns (removing everything in root)
+                if normalized.startswith("/*"):
+                    return ValidationResult(
+                        allowed=False, reason="rm on root wildcard is not allowed"
+                    )
+                for system_path, depth in dangerous.match(normalized):
+                    if depth == 0:
+                        return ValidationResult(
+                            allowed=False,
+                            reason=f"rm on system directory '{path}' is not allowed",
+                        )
+                    # Directly under a dangerous path: block /Users/name but allow
+                    # /Users/name/projects/my-project/node_modules. Paths under / are
+                    # covered by the other dangerous paths.
+                    if depth == 1 and system_path != "/":
+                        return ValidationResult(
+                            allowed=False,
+                            reason=f"rm too close to system directory '{system_path}' is not allowed",
+                        )
+        return ALLOWED
+
+    return validate
+
+
+_VALIDATORS: dict[str, Callable[[dict[str, Any]], Validator]] = {
+    "pkill": _pkill,
+    "chmod": _chmod,
+    "init_script": _init_script,
+    "rm": _rm,
+}
+
+
+# =============================================================================
+# Paths
+# =============================================================================
+
+_GLOB = re.compile(r"[*?\[]")
+_BRACE = re.compile(r"\{([^{}]*)\}")
+_SEQUENCE = re.compile(r"^(-?\d+|[A-Za-z])\.\.(-?\d+|[A-Za-z])(?:\.\.(-?\d+))?$")
+
+
+class _TrieNode:
+    __slots__ = ("children", "path")
+
+    def __init__(self):
+        self.children: dict[str, "_TrieNode"] = {}
+        self.path: str | None = None  # The dangerous path ending at this node
+
+
+class _PathTrie:
+    """Dangerous paths by component; matching is by prefix, glob components included."""
+
+    def __init__(self, paths: list[str]):
+        self.root = _TrieNode()
+        for path in paths:
+            node = self.root
+            for component in _components(_normalize(path)):
+                node = node.children.setdefault(component, _TrieNode())
+            node.path = path
+
+    def match(self, normalized: str) -> list[tuple[str, int]]:
+        """(dangerous path, components of `normalized` below it) for every dangerous prefix."""
+        components = _components(normalized)
+        hits: list[tuple[str, int]] = []
+        frontier = [self.root]
+        last = len(components) - 1
+        for i, component in enumerate(components):
+            if i > 0 and _GLOB.search(component):
+                frontier = [
+                    child for node in frontier for name, child in node.children.items()
+                    if fnmatch.fnmatchcase(name, component)
+                ]
+            else:
+                frontier = [node.children[component] for node in frontier if component in node.children]
+            if not frontier:
+                break
+            hits.extend((node.path, last - i) for node in frontier if node.path is not None)
+        return hits
+
+
+def _components(normalized: str) -> list[str]:
+    """Anchor ("/" or "~") plus path segments; relative paths have no components."""
+    if normalized.startswith("/"):
+        return ["/"] + [part for part in normalized.split("/") if part]
+    if normalized == "~" or normalized.startswith("~/"):
+        return ["~"] + [part for part in normalized[2:].split("/") if part]
+    return []
+
+
+def _normalize(path: str) -> str:
+    """Collapse repeated slashes, "." and ".." (".." stops at / and ~)."""
+    if path == "~" or path.startswith("~/"):
+        return ("~" + posixpath.normpath("/" + path[2:])).rstrip("/") or "~"
+    if path.startswith("/"):
+        return posixpath.normpath(re.sub(r"/+", "/", path))
+    return posixpath.normpath(path) if path else path
+
+
+def _has_expansion(path: str) -> bool:
+    return "$" in path or "`" in path or (path.startswith("~") and not (path == "~" or path.startswith("~/")))
+
+
+def _expand_braces(path: str) -> list[str] | None:
+    """Brace expansion ({a,b}, {1..3}, {a..c}); None if it yields too many paths."""
+    done: list[str] = []
+    pending = [path]
+    while pending:
+        current = pending.pop()
+        for match in _BRACE.finditer(current):
+            alternatives = _brace_alternatives(match.group(1))
+            if alternatives is not None:
+                head, tail = current[:match.start()], current[match.end():]
+                pending.extend(head + alternative + tail for alternative in alternatives)
+                break
+        else:
+            done.append(current)
+        if len(done) + len(pending) > MAX_BRACE_EXPANSIONS:
+            return None
+    return done
+
+
+def _brace_alternatives(body: str) -> list[str] | None:
+    if "," in body:
+        return body.split(",")
+    sequence = _SEQUENCE.match(body)
+    if not sequence:
+        return None
+    start, end, step = sequence.groups()
+    step_size = abs(int(step)) if step else 1
+    if start.lstrip("-").isdigit() and end.lstrip("-").isdigit():
+        first, last = int(start), int(end)
+        values = range(first, last + 1, step_size or 1) if first <= last else range(first, last - 1, -(step_size or 1))
+        return [str(value) for value in values][:MAX_BRACE_EXPANSIONS + 1]
+    if start.isalpha() and end.isalpha():
+        first, last = ord(start), ord(end)
+        values = range(first, last + 1, step_size or 1) if first <= last else range(first, last - 1, -(step_size or 1))
+        return [chr(value) for value in values]
+    return None
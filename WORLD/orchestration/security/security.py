@@ -4,246 +4,130 @@ Security Hooks for Autonomous Coding Agent
 
 Pre-tool-use hooks that validate bash commands for security.
 Uses an allowlist approach - only explicitly permitted commands can run.
+
+Each command string is parsed once (shell_parser.parse) into a tree of
+pipelines, lists, subshells and substitutions. Every simple command in the
+tree, including those inside $(...), backticks and heredocs, is checked
+against the allowlist, and sensitive commands are validated on their own
+argv.
+
+The allowlist and validator settings come from policy.json (see policy.py),
+per build and trust level, and are reloaded when the file changes.
+
+validate_many() checks a batch of commands against one policy version. With
+SECURITY_DAEMON_SOCKET set, the hook asks the shared validation daemon
+(validation_daemon.py) instead of validating in-process.
 """
 
 import os
-import re
-import shlex
-from typing import Any, NamedTuple
+from typing import Any
 
 from claude_agent_sdk import PreToolUseHookInput
 from claude_agent_sdk.types import HookContext, SyncHookJSONOutput
 
+from policy import ALLOWED, Policy, PolicyStore, ValidationResult, Validator, active_policy, active_store
+from shell_parser import ParseError, SimpleCommand, parse, pipelines, simple_commands
 
-class ValidationResult(NamedTuple):
-    """Result of validating a command."""
-
-    allowed: bool
-    reason: str = ""
-
-
-
-
-# Allowed commands for development tasks
-# Minimal set needed for the autonomous coding demo
-ALLOWED_COMMANDS: set[str] = {
-    # File inspection
-    "ls",
-    "cat",
-    "head",
-    "tail",
-    "wc",
-    "grep",
-    "find",
-    # File operations (agent uses SDK tools for most file ops, but these are needed occasionally)
-    "cp",
-    "mv",
-    "mkdir",
-    "rm",  # For cleanup; validated separately to prevent dangerous operations
-    "touch",
-    "chmod",  # For making scripts executable; validated separately
-    "unzip",  # For extracting archives (e.g., browser binaries for Playwright)
-    # Directory navigation
-    "pwd",
-    "cd",
-    # Text output
-    "echo",
-    "printf",
-    # HTTP/Network (for testing endpoints)
-    "curl",
-    # Environment inspection
-    "which",
-    "env",
-    # Python (for file creation scripts)
-    "python",
-    "python3",
-    # Node.js development
-    "npm",
-    "npx",
-    "node",
-    # Version control
-    "git",
-    # Process management
-    "ps",
-    "lsof",
-    "sleep",
-    "pkill",  # For killing dev servers; validated separately
-    # Script execution
-    "init.sh",  # Init scripts; validated separately
-}
-
-# Commands that need additional validation even when in the allowlist
-COMMANDS_NEEDING_EXTRA_VALIDATION: set[str] = {"pkill", "chmod", "init.sh", "rm"}
+
+def __getattr__(name: str) -> Any:
+    # The allowlist of the active policy, under the names it had as Python literals
+    if name == "ALLOWED_COMMANDS":
+        return active_policy().allowed_commands
+    if name == "COMMANDS_NEEDING_EXTRA_VALIDATION":
+        return active_policy().validated_commands
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def split_command_segments(command_string: str) -> list[str]:
     """
     Split a compound command into individual command segments.
 
-    Handles command chaining operators (&&, ||, ;). Pipes are handled separately
-    by extract_commands(), which parses tokens within each segment and treats
-    "|" as indicating a new command follows.
-
-    Note: Semicolon splitting uses a simple regex pattern that may not correctly
-    handle all edge cases with nested quotes. For security validation, this is
-    acceptable as malformed commands will fail parsing and be blocked.
+    Segments are the top-level pipelines of the command: the parts joined by
+    &&, ||, ; & and newlines. Pipes stay within a segment, and operators
+    inside quotes, subshells or substitutions do not split.
 
     Args:
         command_string: The full shell command
 
     Returns:
-        List of individual command segments
+        List of individual command segments. A command that cannot be
+        parsed is returned whole.
     """
-    # Split on && and || while preserving the ability to handle each segment
-    # This regex splits on && or || that aren't inside quotes
-    segments: list[str] = re.split(r"\s*(?:&&|\|\|)\s*", command_string)
-
-    # Further split on semicolons
-    result: list[str] = []
-    for segment in segments:
-        sub_segments: list[str] = re.split(r'(?<!["\'])\s*;\s*(?!["\'])', segment)
-        for sub in sub_segments:
-            sub = sub.strip()
-            if sub:
-                result.append(sub)
-
-    return result
+    try:
+        tree = parse(command_string)
+    except ParseError:
+        return [command_string.strip()] if command_string.strip() else []
+    return [pipeline.text for pipeline in pipelines(tree)]
 
 
 def extract_commands(command_string: str) -> list[str]:
     """
     Extract command names from a shell command string.
 
-    Handles pipes, command chaining (&&, ||, ;), and subshells.
-    Returns the base command names (without paths).
+    Handles pipes, command chaining (&&, ||, ;), subshells, command
+    substitution and heredocs. Returns the base command names (without
+    paths) of every command that would run.
 
     Args:
         command_string: The full shell command
 
     Returns:
-        List of command names found in the string
+        List of command names found in the string, or an empty list if the
+        command cannot be parsed (fail-safe)
     """
-    commands: list[str] = []
-
-    # shlex doesn't treat ; as a separator, so we need to pre-process
-    # Split on semicolons that aren't inside quotes (simple heuristic)
-    # This handles common cases like "echo hello; ls"
-    segments: list[str] = re.split(r'(?<!["\'])\s*;\s*(?!["\'])', command_string)
-
-    for segment in segments:
-        segment = segment.strip()
-        if not segment:
-            continue
-
-        try:
-            tokens: list[str] = shlex.split(segment)
-        except ValueError:
-            # Malformed command (unclosed quotes, etc.)
-            # Return empty to trigger block (fail-safe)
-            return []
-
-        if not tokens:
-            continue
-
-        # Track when we expect a command vs arguments
-        expect_command: bool = True
-
-        for token in tokens:
-            # Shell operators indicate a new command follows
-            if token in ("|", "||", "&&", "&"):
-                expect_command = True
-                continue
-
-            # Skip shell keywords that precede commands
-            if token in (
-                "if",
-                "then",
-                "else",
-                "elif",
-                "fi",
-                "for",
-                "while",
-                "until",
-                "do",
-                "done",
-                "case",
-                "esac",
-                "in",
-                "!",
-                "{",
-                "}",
-            ):
-                continue
-
-            # Skip flags/options
-            if token.startswith("-"):
-                continue
-
-            # Skip variable assignments (VAR=value)
-            if "=" in token and not token.startswith("="):
-                continue
-
-            if expect_command:
-                # Extract the base command name (handle paths like /usr/bin/python)
-                cmd: str = os.path.basename(token)
-                commands.append(cmd)
-                expect_command = False
-
-    return commands
+    try:
+        tree = parse(command_string)
+    except ParseError:
+        return []
+    return [command.name for command in simple_commands(tree) if command.words]
+
+
+def _first_argv(command_string: str) -> list[str]:
+    """Argv of the first command of a segment. Raises ParseError."""
+    for pipeline in pipelines(parse(command_string)):
+        command = pipeline.commands[0]
+        return command.argv if isinstance(command, SimpleCommand) else []
+    return []
+
+
+def _rule(name: str) -> Validator:
+    """The active policy's validator for a command, even if the command is denied."""
+    validator = active_policy().rules.get(name)
+    if validator is None:
+        return lambda tokens: ValidationResult(
+            allowed=False, reason=f"The security policy has no rule for {name}"
+        )
+    return validator
 
 
 def validate_pkill_command(command_string: str) -> ValidationResult:
     """
     Validate pkill commands - only allow killing dev-related processes.
 
-    Uses shlex to parse the command, avoiding regex bypass vulnerabilities.
-
     Args:
         command_string: The pkill command to validate
 
     Returns:
         ValidationResult with allowed status and reason if blocked
     """
-    # Allowed process names for pkill
-    allowed_process_names: set[str] = {
-        "node",
-        "npm",
-        "npx",
-        "vite",
-        "next",
-    }
-
     try:
-        tokens: list[str] = shlex.split(command_string)
-    except ValueError:
+        tokens: list[str] = _first_argv(command_string)
+    except ParseError:
         return ValidationResult(allowed=False, reason="Could not parse pkill command")
+    return validate_pkill_args(tokens)
 
-    if not tokens:
-        return ValidationResult(allowed=False, reason="Empty pkill command")
-
-    # Separate flags from arguments
-    args: list[str] = []
-    for token in tokens[1:]:
-        if not token.startswith("-"):
-            args.append(token)
-
-    if not args:
-        return ValidationResult(allowed=False, reason="pkill requires a process name")
 
-    # The target is typically the last non-flag argument
-    target: str = args[-1]
+def validate_pkill_args(tokens: list[str]) -> ValidationResult:
+    """
+    Validate the argv of a pkill command (see validate_pkill_command).
 
-    # For -f flag (full command line match), extract the first word as process name
-    # e.g., "pkill -f 'node server.js'" -> target is "node server.js", process is "node"
-    if " " in target:
-        target = target.split()[0]
+    Args:
+        tokens: The parsed command, tokens[0] being pkill
 
-    if target in allowed_process_names:
-        return ValidationResult(allowed=True)
-    return ValidationResult(
-        allowed=False,
-        reason=f"pkill only allowed for dev processes: {allowed_process_names}",
-    )
+    Returns:
+        ValidationResult with allowed status and reason if blocked
+    """
+    return _rule("pkill")(tokens)
 
 
 def validate_chmod_command(command_string: str) -> ValidationResult:
@@ -257,43 +141,23 @@ def validate_chmod_command(command_string: str) -> ValidationResult:
         ValidationResult with allowed status and reason if blocked
     """
     try:
-        tokens: list[str] = shlex.split(command_string)
-    except ValueError:
+        tokens: list[str] = _first_argv(command_string)
+    except ParseError:
         return ValidationResult(allowed=False, reason="Could not parse chmod command")
+    return validate_chmod_args(tokens)
 
-    if not tokens or tokens[0] != "chmod":
-        return ValidationResult(allowed=False, reason="Not a chmod command")
-
-    # Look for the mode argument
-    # Valid modes: +x, u+x, a+x, etc. (anything ending with +x for execute permission)
-    mode: str | None = None
-    files: list[str] = []
-
-    for token in tokens[1:]:
-        if token.startswith("-"):
-            # Skip flags like -R (we don't allow recursive chmod anyway)
-            return ValidationResult(allowed=False, reason="chmod flags are not allowed")
-        elif mode is None:
-            mode = token
-        else:
-            files.append(token)
-
-    if mode is None:
-        return ValidationResult(allowed=False, reason="chmod requires a mode")
 
-    if not files:
-        return ValidationResult(
-            allowed=False, reason="chmod requires at least one file"
-        )
+def validate_chmod_args(tokens: list[str]) -> ValidationResult:
+    """
+    Validate the argv of a chmod command (see validate_chmod_command).
 
-    # Only allow +x variants (making files executable)
-    # This matches: +x, u+x, g+x, o+x, a+x, ug+x, etc.
-    if not re.match(r"^[ugoa]*\+x$", mode):
-        return ValidationResult(
-            allowed=False, reason=f"chmod only allowed with +x mode, got: {mode}"
-        )
+    Args:
+        tokens: The parsed command, tokens[0] being chmod
 
-    return ValidationResult(allowed=True)
+    Returns:
+        ValidationResult with allowed status and reason if blocked
+    """
+    return _rule("chmod")(tokens)
 
 
 def validate_init_script(command_string: str) -> ValidationResult:
@@ -307,25 +171,25 @@ def validate_init_script(command_string: str) -> ValidationResult:
         ValidationResult with allowed status and reason if blocked
     """
     try:
-        tokens: list[str] = shlex.split(command_string)
-    except ValueError:
+        tokens: list[str] = _first_argv(command_string)
+    except ParseError:
         return ValidationResult(
             allowed=False, reason="Could not parse init script command"
         )
+    return validate_init_script_args(tokens)
 
-    if not tokens:
-        return ValidationResult(allowed=False, reason="Empty command")
 
-    # The command should be exactly ./init.sh (possibly with arguments)
-    script: str = tokens[0]
+def validate_init_script_args(tokens: list[str]) -> ValidationResult:
+    """
+    Validate the argv of an init script command (see validate_init_script).
 
-    # Allow ./init.sh or paths ending in /init.sh
-    if script == "./init.sh" or script.endswith("/init.sh"):
-        return ValidationResult(allowed=True)
+    Args:
+        tokens: The parsed command, tokens[0] being the script path
 
-    return ValidationResult(
-        allowed=False, reason=f"Only ./init.sh is allowed, got: {script}"
-    )
+    Returns:
+        ValidationResult with allowed status and reason if blocked
+    """
+    return _rule("init.sh")(tokens)
 
 
 def validate_rm_command(command_string: str) -> ValidationResult:
@@ -345,83 +209,24 @@ def validate_rm_command(command_string: str) -> ValidationResult:
     Returns:
         ValidationResult with allowed status and reason if blocked
     """
-    # Dangerous root paths that should never be deleted
-    dangerous_paths: set[str] = {
-        "/",
-        "/etc",
-        "/usr",
-        "/var",
-        "/bin",
-        "/sbin",
-        "/lib",
-        "/opt",
-        "/boot",
-        "/root",
-        "/home",
-        "/Users",
-        "/System",
-        "/Library",
-        "/Applications",
-        "/private",
-        "~",
-    }
-
     try:
-        tokens: list[str] = shlex.split(command_string)
-    except ValueError:
+        tokens: list[str] = _first_argv(command_string)
+    except ParseError:
         return ValidationResult(allowed=False, reason="Could not parse rm command")
+    return validate_rm_args(tokens)
+
+
+def validate_rm_args(tokens: list[str]) -> ValidationResult:
+    """
+    Validate the argv of an rm command (see validate_rm_command).
+
+    Args:
+        tokens: The parsed command, tokens[0] being rm
 
-    if not tokens or tokens[0] != "rm":
-        return ValidationResult(allowed=False, reason="Not an rm command")
-
-    # Collect flags and paths
-    flags: list[str] = []
-    paths: list[str] = []
-
-    for token in tokens[1:]:
-        if token.startswith("-"):
-            flags.append(token)
-        else:
-            paths.append(token)
-
-    if not paths:
-        return ValidationResult(allowed=False, reason="rm requires at least one path")
-
-    # Check each path for dangerous patterns
-    for path in paths:
-        # Normalize the path for comparison
-        # Special case: "/" should remain "/" after normalization (rstrip("/") on "/" returns "")
-        normalized = path.rstrip("/") or "/"
-
-        # Block exact matches to dangerous paths
-        if normalized in dangerous_paths:
-            return ValidationResult(
-                allowed=False,
-                reason=f"rm on system directory '{path}' is not allowed",
-            )
-
-        # Block paths that start with dangerous roots (but allow subdirs of project paths)
-        for dangerous in dangerous_paths:
-            if dangerous == "/":
-                continue  # Skip root, check separately
-            # Block if path IS the dangerous path or is directly under it without much depth
-            # e.g., block /Users but allow /Users/rasmus/projects/my-project/node_modules
-            if normalized == dangerous or (
-                normalized.startswith(dangerous + "/")
-                and normalized.count("/") <= dangerous.count("/") + 1
-            ):
-                return ValidationResult(
-                    allowed=False,
-                    reason=f"rm too close to system directory '{dangerous}' is not allowed",
-                )
-
-        # Block rm /* patterns (removing everything in root)
-        if path == "/*" or path.startswith("/*"):
-            return ValidationResult(
-                allowed=False, reason="rm on root wildcard is not allowed"
-            )
-
-    return ValidationResult(allowed=True)
+    Returns:
+        ValidationResult with allowed status and reason if blocked
+    """
+    return _rule("rm")(tokens)
 
 
 def get_command_for_validation(cmd: str, segments: list[str]) -> str:
@@ -442,6 +247,80 @@ def get_command_for_validation(cmd: str, segments: list[str]) -> str:
     return ""
 
 
+def validate_command(command_string: str) -> ValidationResult:
+    """
+    Validate a full Bash command string against the active policy.
+
+    Decisions are cached per (command string, policy version), so a repeated
+    command skips parsing and validation until the policy changes.
+
+    Args:
+        command_string: The full shell command
+
+    Returns:
+        ValidationResult for the first command that is blocked, or allowed
+    """
+    store = active_store()
+    return _validate(command_string, store, store.current())
+
+
+def validate_many(commands: list[str], store: PolicyStore | None = None) -> list[ValidationResult]:
+    """
+    Validate a batch of Bash command strings against one policy version.
+
+    Args:
+        commands: Full shell commands, validated independently
+        store: Policy store to use (default: the active one)
+
+    Returns:
+        One ValidationResult per command, in order
+    """
+    store = store or active_store()
+    policy = store.current()
+    return [_validate(command, store, policy) for command in commands]
+
+
+def _validate(command_string: str, store: PolicyStore, policy: Policy) -> ValidationResult:
+    cached = store.cache.get(command_string, policy.version)
+    if cached is not None:
+        return cached
+
+    result = _validate_uncached(command_string, policy)
+    if not policy.error:
+        store.cache.put(command_string, policy.version, result)
+    return result
+
+
+def _validate_uncached(command_string: str, policy: Policy) -> ValidationResult:
+    # Parse once; every validator below works on the same tree
+    try:
+        tree = parse(command_string)
+    except ParseError:
+        tree = None
+    commands: list[SimpleCommand] = (
+        [cmd for cmd in simple_commands(tree) if cmd.words] if tree else []
+    )
+
+    if not commands:
+        # Could not parse - fail safe by blocking
+        return ValidationResult(
+            allowed=False,
+            reason=f"Could not parse command for security validation: {command_string}",
+        )
+
+    # Check each command against the policy's dispatch table
+    for cmd in commands:
+        result = policy.check(cmd.name, cmd.argv)
+        if not result.allowed:
+            return result
+    return ALLOWED
+
+
+def cache_stats() -> dict[str, Any]:
+    """Hit-rate counters of the active policy's decision cache."""
+    return active_store().cache.stats()
+
+
 async def bash_security_hook(
     input_data: PreToolUseHookInput,
     tool_use_id: str | None = None,
@@ -450,7 +329,8 @@ async def bash_security_hook(
     """
     Pre-tool-use hook that validates bash commands using an allowlist.
 
-    Only commands in ALLOWED_COMMANDS are permitted.
+    Only commands allowed by the active policy (policy.json, for AGENT_BUILD
+    and AGENT_TRUST_LEVEL) are permitted.
 
     Args:
         input_data: Dict containing tool_name and tool_input
@@ -467,49 +347,18 @@ async def bash_security_hook(
     if not command:
         return {}
 
-    # Extract all commands from the command string
-    commands: list[str] = extract_commands(command)
-
-    if not commands:
-        # Could not parse - fail safe by blocking
-        return SyncHookJSONOutput(
-            decision="block",
-            reason=f"Could not parse command for security validation: {command}",
-        )
+    socket_path = os.environ.get("SECURITY_DAEMON_SOCKET")
+    if socket_path:
+        # Share the daemon's warm policy and cache; validate locally if it is down
+        from validation_daemon import DaemonError, shared_client
 
-    # Split into segments for per-command validation
-    segments: list[str] = split_command_segments(command)
-
-    # Check each command against the allowlist
-    for cmd in commands:
-        if cmd not in ALLOWED_COMMANDS:
-            return SyncHookJSONOutput(
-                decision="block",
-                reason=f"Command '{cmd}' is not in the allowed commands list",
-            )
-
-        # Additional validation for sensitive commands
-        if cmd in COMMANDS_NEEDING_EXTRA_VALIDATION:
-            # Find the specific segment containing this command
-            cmd_segment: str = get_command_for_validation(cmd, segments)
-            if not cmd_segment:
-                cmd_segment = command  # Fallback to full command
-
-            if cmd == "pkill":
-                result: ValidationResult = validate_pkill_command(cmd_segment)
-                if not result.allowed:
-                    return SyncHookJSONOutput(decision="block", reason=result.reason)
-            elif cmd == "chmod":
-                result = validate_chmod_command(cmd_segment)
-                if not result.allowed:
-                    return SyncHookJSONOutput(decision="block", reason=result.reason)
-            elif cmd == "init.sh":
-                result = validate_init_script(cmd_segment)
-                if not result.allowed:
-                    return SyncHookJSONOutput(decision="block", reason=result.reason)
-            elif cmd == "rm":
-                result = validate_rm_command(cmd_segment)
-                if not result.allowed:
-                    return SyncHookJSONOutput(decision="block", reason=result.reason)
+        try:
+            result = shared_client(socket_path).validate(command)
+        except DaemonError:
+            result = validate_command(command)
+    else:
+        result = validate_command(command)
+    if not result.allowed:
+        return SyncHookJSONOutput(decision="block", reason=result.reason)
 
     return {}
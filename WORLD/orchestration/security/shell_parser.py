@@ -0,0 +1,820 @@
+"""
+Shell Parser for Security Validation
+====================================
+
+Single-pass lexer and recursive-descent parser for the subset of bash that
+agents send to the Bash tool. A command string is read once, into a tree:
+
+    CommandList   items separated by ;  &  or newlines
+    AndOr         pipelines joined by && and ||
+    Pipeline      commands joined by | and |&, optionally negated with !
+    SimpleCommand assignments, argv words and redirects
+    Compound      ( ... ), { ...; }, if, while, until, for, select, case,
+                  function definitions
+
+Words are unquoted the way bash does it (single, double and $'...' quotes,
+backslashes). Parameter expansions are kept as written. Commands nested in
+$(...), backticks, <(...), >(...), arithmetic, ${...} and unquoted heredoc
+bodies are parsed too, and attached to the word that contains them, so
+simple_commands() sees every command that would run.
+
+Anything the parser does not understand raises ParseError. Callers block
+those commands (fail-safe).
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, NamedTuple
+
+MAX_DEPTH = 32  # Nested substitutions before a command is rejected
+
+RESERVED_WORDS: frozenset[str] = frozenset({
+    "if", "then", "elif", "else", "fi", "while", "until", "do", "done",
+    "for", "select", "in", "case", "esac", "function", "{", "}", "!",
+})
+
+REDIRECT_OPERATORS: frozenset[str] = frozenset({
+    "<", ">", ">>", "<<", "<<-", "<<<", "<&", ">&", "<>", ">|", "&>", "&>>",
+})
+
+_OPERATORS: frozenset[str] = frozenset({
+    ";;&", "<<-", "<<<", "&>>",
+    "&&", "||", "|&", ";;", ";&", "<<", ">>", "<&", ">&", "<>", ">|", "&>",
+    "|", "&", ";", "(", ")", "<", ">",
+})
+
+_PLAIN = re.compile(r"[^\s|&;()<>\\'\"$`]+")
+_DOUBLE_PLAIN = re.compile(r'[^"\\$`]+')
+_HEREDOC_PLAIN = re.compile(r"[^\\$`]+")
+_IO_NUMBER = re.compile(r"\d+(?=[<>])")
+_ASSIGNMENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(\[[^\]]*\])?\+?=")
+
+_ANSI_ESCAPES: dict[str, str] = {
+    "a": "\a", "b": "\b", "e": "\x1b", "E": "\x1b", "f": "\f", "n": "\n",
+    "r": "\r", "t": "\t", "v": "\v", "\\": "\\", "'": "'", '"': '"', "?": "?",
+}
+_ANSI_NUMERIC = (("x", 16, 2), ("u", 16, 4), ("U", 16, 8))
+
+
+class ParseError(ValueError):
+    """The command is not valid (or not supported) shell syntax."""
+
+
+# =============================================================================
+# Tree
+# =============================================================================
+
+@dataclass
+class Word:
+    """One shell word."""
+
+    value: str  # After quote removal; parameter expansions kept as written
+    raw: str  # As written in the source
+    quoted: bool = False  # Any part quoted or backslash-escaped
+    substitutions: list["CommandList"] = field(default_factory=list)
+
+
+@dataclass
+class Redirect:
+    """A redirection such as 2>&1, > file or << EOF."""
+
+    op: str
+    target: Word  # File, descriptor, here-string or heredoc delimiter
+    fd: str = ""  # Explicit descriptor, e.g. "2" in 2>&1
+    body: Word | None = None  # Heredoc contents
+
+
+@dataclass
+class SimpleCommand:
+    """Assignments, argv and redirects of one command."""
+
+    assignments: list[Word]
+    words: list[Word]
+    redirects: list[Redirect]
+    text: str  # Source of the command
+
+    @property
+    def argv(self) -> list[str]:
+        return [word.value for word in self.words]
+
+    @property
+    def name(self) -> str:
+        """Base command name (/usr/bin/python -> python), empty for bare assignments."""
+        return os.path.basename(self.words[0].value) if self.words else ""
+
+
+@dataclass
+class Compound:
+    """A subshell, group, loop, conditional, case or function definition."""
+
+    kind: str  # "subshell", "group", "if", "while", "until", "for", "select", "case", "function"
+    bodies: list["CommandList"]
+    words: list[Word]  # Loop variable and items, case subject and patterns, function name
+    redirects: list[Redirect]
+    text: str
+
+
+@dataclass
+class Pipeline:
+    commands: list[SimpleCommand | Compound]
+    negated: bool
+    text: str
+
+
+@dataclass
+class AndOr:
+    pipelines: list[Pipeline]
+    operators: list[str]  # "&&" or "||" between consecutive pipelines
+
+
+@dataclass
+class CommandList:
+    items: list[AndOr]
+    separators: list[str]  # ";", "&", "\n" or "" after each item
+
+
+def parse(command: str) -> CommandList:
+    """
+    Parse a command string.
+
+    Args:
+        command: The full shell command
+
+    Returns:
+        The command tree
+
+    Raises:
+        ParseError: Unterminated quotes or substitutions, syntax errors,
+            or constructs the parser does not support
+    """
+    try:
+        return _parse_source(command, 0)
+    except RecursionError:
+        raise ParseError("Command is nested too deeply") from None
+
+
+def simple_commands(node: CommandList | AndOr | Pipeline | SimpleCommand | Compound) -> Iterator[SimpleCommand]:
+    """
+    Every simple command in a tree, including nested ones.
+
+    Commands inside substitutions of a command's words and redirects come
+    before the command itself, as they run first.
+    """
+    if isinstance(node, CommandList):
+        for item in node.items:
+            yield from simple_commands(item)
+    elif isinstance(node, AndOr):
+        for pipeline in node.pipelines:
+            yield from simple_commands(pipeline)
+    elif isinstance(node, Pipeline):
+        for command in node.commands:
+            yield from simple_commands(command)
+    elif isinstance(node, SimpleCommand):
+        yield from _nested(node.assignments + node.words, node.redirects)
+        yield node
+    else:
+        yield from _nested(node.words, node.redirects)
+        for body in node.bodies:
+            yield from simple_commands(body)
+
+
+def pipelines(tree: CommandList) -> Iterator[Pipeline]:
+    """Top-level pipelines of a tree (not those nested in compounds or substitutions)."""
+    for item in tree.items:
+        yield from item.pipelines
+
+
+def _nested(words: list[Word], redirects: list[Redirect]) -> Iterator[SimpleCommand]:
+    for redirect in redirects:
+        words = words + [redirect.target] + ([redirect.body] if redirect.body else [])
+    for word in words:
+        for substitution in word.substitutions:
+            yield from simple_commands(substitution)
+
+
+def _parse_source(source: str, depth: int) -> CommandList:
+    if depth > MAX_DEPTH:
+        raise ParseError("Command substitutions are nested too deeply")
+    lexer = _Lexer(source, depth)
+    tree = _Parser(lexer).list_(stop_ops=(), stop_words=())
+    token = lexer.peek()
+    if token.kind != "eof":
+        raise ParseError(f"Unexpected {token.value!r}")
+    return tree
+
+
+# =============================================================================
+# Lexer
+# =============================================================================
+
+class _Token(NamedTuple):
+    kind: str  # "word", "op", "newline" or "eof"
+    value: str
+    start: int
+    end: int
+    word: Word | None = None
+    fd: str = ""
+
+
+class _Lexer:
+    """
+    Turns source text into tokens on demand.
+
+    The parser drives it one token at a time: heredoc bodies start after the
+    next newline, and $(...) is parsed by a nested parser on the same
+    cursor, so the source is read exactly once.
+    """
+
+    def __init__(self, source: str, depth: int):
+        self.source = source
+        self.end = len(source)
+        self.pos = 0
+        self.depth = depth
+        self.last_end = 0  # End of the last consumed token
+        self.heredocs: list[tuple[Redirect, bool]] = []  # Waiting for the next newline
+        self._peeked: _Token | None = None
+
+    def peek(self) -> _Token:
+        if self._peeked is None:
+            self._peeked = self._scan()
+        return self._peeked
+
+    def next(self) -> _Token:
+        token = self.peek()
+        self._peeked = None
+        self.last_end = token.end
+        return token
+
+    def _scan(self) -> _Token:
+        source, end = self.source, self.end
+        while self.pos < end:
+            char = source[self.pos]
+            if char == " " or char == "\t":
+                self.pos += 1
+            elif char == "\\" and source.startswith("\\\n", self.pos):
+                self.pos += 2  # Line continuation
+            elif char == "#":
+                newline = source.find("\n", self.pos)
+                self.pos = end if newline < 0 else newline
+            else:
+                break
+        start = self.pos
+        if start >= end:
+            if self.heredocs:
+                self._read_heredocs()
+            return _Token("eof", "", start, start)
+
+        char = source[start]
+        if char == "\n":
+            self.pos += 1
+            self._read_heredocs()
+            return _Token("newline", "\n", start, start + 1)
+
+        if char in "<>" and source.startswith("(", start + 1):
+            word = self._word()  # Process substitution
+            return _Token("word", word.value, start, self.pos, word)
+
+        fd = ""
+        match = _IO_NUMBER.match(source, start)
+        if match:
+            fd = match.group()
+            self.pos = match.end()
+            char = source[self.pos]
+
+        if char in "|&;()<>":
+            for length in (3, 2, 1):  # Longest match: "&&" over "&", "<<-" over "<<"
+                op = source[self.pos:self.pos + length]
+                if op in _OPERATORS:
+                    self.pos += length
+                    return _Token("op", op, start, self.pos, fd=fd)
+
+        word = self._word()
+        return _Token("word", word.value, start, self.pos, word)
+
+    # =========================================================================
+    # Words
+    # =========================================================================
+
+    def _word(self) -> Word:
+        source, end = self.source, self.end
+        start = self.pos
+        parts: list[str] = []
+        substitutions: list[CommandList] = []
+        quoted = False
+        while self.pos < end:
+            match = _PLAIN.match(source, self.pos)
+            if match:
+                parts.append(match.group())
+                self.pos = match.end()
+                continue
+            char = source[self.pos]
+            if char in "<>" and self.pos == start and source.startswith("(", self.pos + 1):
+                self.pos += 2
+                substitutions.append(self._substitution())
+                parts.append(source[start:self.pos])
+            elif char in " \t\n|&;()<>":
+                break
+            elif char == "\\":
+                if source.startswith("\\\n", self.pos):
+                    self.pos += 2
+                    continue
+                parts.append(source[self.pos + 1:self.pos + 2] or "\\")
+                self.pos += 2
+                quoted = True
+            elif char == "'":
+                close = source.find("'", self.pos + 1)
+                if close < 0:
+                    raise ParseError("Unterminated single quote")
+                parts.append(source[self.pos + 1:close])
+                self.pos = close + 1
+                quoted = True
+            elif char == '"':
+                self.pos += 1
+                self._double(parts, substitutions, '"')
+                quoted = True
+            elif char == "$":
+                quoted = self._dollar(parts, substitutions, in_double=False) or quoted
+            else:  # Backquote
+                self._backquote(parts, substitutions, in_double=False)
+        if self.pos == start:
+            raise ParseError(f"Unexpected {source[start]!r}")
+        return Word("".join(parts), source[start:self.pos], quoted, substitutions)
+
+    def _double(self, parts: list[str], substitutions: list["CommandList"], terminator: str | None):
+        """Double-quoted text up to `terminator`, or a heredoc body (terminator None) to the end."""
+        source, end = self.source, self.end
+        plain, escapable = (_DOUBLE_PLAIN, '$`"\\\n') if terminator else (_HEREDOC_PLAIN, "$`\\\n")
+        while True:
+            if self.pos >= end:
+                if terminator:
+                    raise ParseError("Unterminated double quote")
+                return
+            match = plain.match(source, self.pos)
+            if match:
+                parts.append(match.group())
+                self.pos = match.end()
+                continue
+            char = source[self.pos]
+            if char == terminator:
+                self.pos += 1
+                return
+            if char == "\\":
+                following = source[self.pos + 1:self.pos + 2]
+                if following and following in escapable:
+                    if following != "\n":
+                        parts.append(following)
+                    self.pos += 2
+                else:
+                    parts.append("\\")
+                    self.pos += 1
+            elif char == "$":
+                self._dollar(parts, substitutions, in_double=True)
+            else:
+                self._backquote(parts, substitutions, in_double=True)
+
+    def _dollar(self, parts: list[str], substitutions: list["CommandList"], in_double: bool) -> bool:
+        """Expansion starting at "$". Returns True if it was a quote ($'...' or $"...")."""
+        source = self.source
+        start = self.pos
+        following = source[start + 1:start + 2]
+        if following == "(":
+            if source.startswith("((", start + 1):
+                self.pos += 3
+                self._arithmetic(substitutions)
+            else:
+                self.pos += 2
+                substitutions.append(self._substitution())
+            parts.append(source[start:self.pos])
+        elif following == "{":
+            self.pos += 2
+            self._braced(substitutions, in_double)
+            parts.append(source[start:self.pos])
+        elif following == "'" and not in_double:
+            self.pos += 2
+            parts.append(self._ansi_c())
+            return True
+        elif following == '"' and not in_double:
+            self.pos += 2
+            self._double(parts, substitutions, '"')
+            return True
+        else:
+            parts.append("$")
+            self.pos += 1
+        return False
+
+    def _substitution(self) -> "CommandList":
+        """Commands of $(...), <(...) or >(...); the cursor is past the opening parenthesis."""
+        if self.depth >= MAX_DEPTH:
+            raise ParseError("Command substitutions are nested too deeply")
+        self.depth += 1
+        try:
+            tree = _Parser(self).list_(stop_ops=(")",), stop_words=())
+        finally:
+            self.depth -= 1
+        if self.next().value != ")":
+            raise ParseError("Unterminated command substitution")
+        return tree
+
+    def _backquote(self, parts: list[str], substitutions: list["CommandList"], in_double: bool):
+        source, end = self.source, self.end
+        start = self.pos
+        self.pos += 1
+        escapable = '$`\\"' if in_double else "$`\\"
+        inner: list[str] = []
+        while True:
+            if self.pos >= end:
+                raise ParseError("Unterminated backquote")
+            char = source[self.pos]
+            if char == "`":
+                self.pos += 1
+                break
+            if char == "\\" and source[self.pos + 1:self.pos + 2] in tuple(escapable):
+                inner.append(source[self.pos + 1])
+                self.pos += 2
+            else:
+                inner.append(char)
+                self.pos += 1
+        substitutions.append(_parse_source("".join(inner), self.depth + 1))
+        parts.append(source[start:self.pos])
+
+    def _arithmetic(self, substitutions: list["CommandList"]):
+        """$((...)); the cursor is past "$((". Nested substitutions still run."""
+        source, end = self.source, self.end
+        depth = 0
+        while True:
+            if self.pos >= end:
+                raise ParseError("Unterminated arithmetic expansion")
+            char = source[self.pos]
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                if depth == 0:
+                    if not source.startswith("))", self.pos):
+                        raise ParseError("Ambiguous $(( ... ) expression")
+                    self.pos += 2
+                    return
+                depth -= 1
+            elif char == "\\":
+                self.pos += 1
+            elif char == "$":
+                self._dollar([], substitutions, in_double=True)
+                continue
+            elif char == "`":
+                self._backquote([], substitutions, in_double=True)
+                continue
+            self.pos += 1
+
+    def _braced(self, substitutions: list["CommandList"], in_double: bool):
+        """${...}; the cursor is past "${".
+
+        Like bash, single quotes delimit a span when finding the closing brace, even
+        inside double quotes or a heredoc body, so ${x:-'}'} does not end at the first "}".
+        """
+        source, end = self.source, self.end
+        depth = 1
+        while depth:
+            if self.pos >= end:
+                raise ParseError("Unterminated parameter expansion")
+            char = source[self.pos]
+            if char == "\\":
+                self.pos += 2
+            elif char == "'":
+                close = source.find("'", self.pos + 1)
+                if close < 0:
+                    raise ParseError("Unterminated single quote")
+                self.pos = close + 1
+            elif char == '"':
+                self.pos += 1
+                self._double([], substitutions, '"')
+            elif char == "$":
+                self._dollar([], substitutions, in_double)
+            elif char == "`":
+                self._backquote([], substitutions, in_double=True)
+            else:
+                depth += {"{": 1, "}": -1}.get(char, 0)
+                self.pos += 1
+
+    def _ansi_c(self) -> str:
+        """$'...' with escapes decoded; the cursor is past "$'"."""
+        source, end = self.source, self.end
+        out: list[str] = []
+        while True:
+            if self.pos >= end:
+                raise ParseError("Unterminated $'...' quote")
+            char = source[self.pos]
+            self.pos += 1
+            if char == "'":
+                return "".join(out)
+            if char != "\\" or self.pos >= end:
+                out.append(char)
+                continue
+            escape = source[self.pos]
+            self.pos += 1
+            if escape in _ANSI_ESCAPES:
+                out.append(_ANSI_ESCAPES[escape])
+            elif escape in "01234567":
+                digits = escape + _take(source, self.pos, "01234567", 2)
+                self.pos += len(digits) - 1
+                out.append(chr(int(digits, 8) & 0xFF))
+            elif escape == "c" and self.pos < end:
+                out.append(chr(ord(source[self.pos]) & 0x1F))
+                self.pos += 1
+            else:
+                for prefix, base, width in _ANSI_NUMERIC:
+                    if escape == prefix:
+                        digits = _take(source, self.pos, "0123456789abcdefABCDEF", width)
+                        if digits:
+                            self.pos += len(digits)
+                            out.append(chr(int(digits, base)))
+                            break
+                else:
+                    out.append("\\" + escape)
+
+    # =========================================================================
+    # Heredocs
+    # =========================================================================
+
+    def _read_heredocs(self):
+        """Bodies of heredocs opened on the line just ended; the cursor is past the newline."""
+        source, end = self.source, self.end
+        for redirect, strip_tabs in self.heredocs:
+            delimiter = redirect.target.value
+            lines: list[str] = []
+            while self.pos < end:
+                newline = source.find("\n", self.pos)
+                line_end = end if newline < 0 else newline
+                line = source[self.pos:line_end]
+                self.pos = line_end + 1 if newline >= 0 else end
+                if strip_tabs:
+                    line = line.lstrip("\t")
+                if line == delimiter:
+                    break
+                lines.append(line)
+            body = "".join(line + "\n" for line in lines)
+            redirect.body = Word(body, body, redirect.target.quoted)
+            if not redirect.target.quoted:
+                # Unquoted delimiter: the body is expanded like a double-quoted string
+                lexer = _Lexer(body, self.depth + 1)
+                lexer._double([], redirect.body.substitutions, None)
+        self.heredocs.clear()
+
+
+def _take(source: str, start: int, allowed: str, limit: int) -> str:
+    end = start
+    while end < len(source) and end - start < limit and source[end] in allowed:
+        end += 1
+    return source[start:end]
+
+
+# =============================================================================
+# Parser
+# =============================================================================
+
+class _Parser:
+    _COMPOUNDS: dict[str, str] = {
+        "{": "_group", "if": "_if", "while": "_loop", "until": "_loop",
+        "for": "_for", "select": "_for", "case": "_case", "function": "_function",
+    }
+
+    def __init__(self, lexer: _Lexer):
+        self.lexer = lexer
+
+    def list_(self, stop_ops: tuple[str, ...], stop_words: tuple[str, ...]) -> CommandList:
+        """Items up to end of input, one of `stop_ops`, or one of `stop_words` in command position."""
+        lexer = self.lexer
+        tree = CommandList([], [])
+        while True:
+            self._newlines()
+            token = lexer.peek()
+            if token.kind == "eof" or (token.kind == "op" and token.value in stop_ops) \
+                    or self._keyword(token, stop_words):
+                return tree
+            tree.items.append(self._and_or())
+            token = lexer.peek()
+            if token.kind == "newline" or (token.kind == "op" and token.value in (";", "&")):
+                lexer.next()
+                tree.separators.append(token.value)
+            else:
+                tree.separators.append("")
+                return tree
+
+    def _and_or(self) -> AndOr:
+        lexer = self.lexer
+        node = AndOr([self._pipeline()], [])
+        while lexer.peek().kind == "op" and lexer.peek().value in ("&&", "||"):
+            node.operators.append(lexer.next().value)
+            self._newlines()
+            node.pipelines.append(self._pipeline())
+        return node
+
+    def _pipeline(self) -> Pipeline:
+        lexer = self.lexer
+        start = lexer.peek().start
+        negated = self._keyword(lexer.peek(), ("!",))
+        if negated:
+            lexer.next()
+        commands = [self._command()]
+        while lexer.peek().kind == "op" and lexer.peek().value in ("|", "|&"):
+            lexer.next()
+            self._newlines()
+            commands.append(self._command())
+        return Pipeline(commands, negated, lexer.source[start:lexer.last_end].strip())
+
+    def _command(self) -> SimpleCommand | Compound:
+        token = self.lexer.peek()
+        if token.kind == "op" and token.value == "(":
+            return self._subshell()
+        if token.kind == "word" and not token.word.quoted and token.value in RESERVED_WORDS:
+            parse = self._COMPOUNDS.get(token.value)
+            if parse is None:
+                raise ParseError(f"Unexpected {token.value!r}")
+            return getattr(self, parse)()
+        return self._simple()
+
+    def _simple(self) -> SimpleCommand | Compound:
+        lexer = self.lexer
+        start = lexer.peek().start
+        command = SimpleCommand([], [], [], "")
+        while True:
+            token = lexer.peek()
+            if token.kind == "word":
+                lexer.next()
+                if not command.words and _ASSIGNMENT.match(token.word.raw):
+                    command.assignments.append(token.word)
+                    continue
+                command.words.append(token.word)
+                if len(command.words) == 1 and not command.assignments and not command.redirects \
+                        and lexer.peek().kind == "op" and lexer.peek().value == "(":
+                    return self._function_body(start, token.word)
+            elif token.kind == "op" and token.value in REDIRECT_OPERATORS:
+                command.redirects.append(self._redirect())
+            else:
+                break
+        if not (command.words or command.assignments or command.redirects):
+            raise ParseError(f"Unexpected {token.value!r}" if token.value else "Unexpected end of command")
+        command.text = lexer.source[start:lexer.last_end].strip()
+        return command
+
+    def _redirect(self) -> Redirect:
+        lexer = self.lexer
+        op = lexer.next()
+        target = lexer.next()
+        if target.kind != "word":
+            raise ParseError(f"Missing target for {op.value!r}")
+        redirect = Redirect(op.value, target.word, op.fd)
+        if op.value in ("<<", "<<-"):
+            lexer.heredocs.append((redirect, op.value == "<<-"))
+        return redirect
+
+    def _redirects(self) -> list[Redirect]:
+        redirects = []
+        while self.lexer.peek().kind == "op" and self.lexer.peek().value in REDIRECT_OPERATORS:
+            redirects.append(self._redirect())
+        return redirects
+
+    # =========================================================================
+    # Compound commands
+    # =========================================================================
+
+    def _compound(self, kind: str, start: int, bodies: list[CommandList], words: list[Word]) -> Compound:
+        redirects = self._redirects()
+        text = self.lexer.source[start:self.lexer.last_end].strip()
+        return Compound(kind, bodies, words, redirects, text)
+
+    def _block(self, opener: str, stop_ops: tuple[str, ...] = (), stop_words: tuple[str, ...] = ()) -> CommandList:
+        """`opener` and the non-empty list after it, up to (not including) a stop token."""
+        self._expect(opener)
+        body = self.list_(stop_ops, stop_words)
+        if not body.items:
+            raise ParseError(f"Empty {opener!r} block")
+        return body
+
+    def _expect(self, value: str) -> _Token:
+        token = self.lexer.next()
+        if token.value != value or token.kind not in ("word", "op") or (token.word and token.word.quoted):
+            raise ParseError(f"Expected {value!r}")
+        return token
+
+    def _subshell(self) -> Compound:
+        start = self.lexer.peek().start
+        body = self._block("(", stop_ops=(")",))
+        self._expect(")")
+        return self._compound("subshell", start, [body], [])
+
+    def _group(self) -> Compound:
+        start = self.lexer.peek().start
+        body = self._block("{", stop_words=("}",))
+        self._expect("}")
+        return self._compound("group", start, [body], [])
+
+    def _if(self) -> Compound:
+        start = self.lexer.peek().start
+        branch_end = ("elif", "else", "fi")
+        bodies = [self._block("if", stop_words=("then",)), self._block("then", stop_words=branch_end)]
+        while self._keyword(self.lexer.peek(), ("elif",)):
+            bodies.append(self._block("elif", stop_words=("then",)))
+            bodies.append(self._block("then", stop_words=branch_end))
+        if self._keyword(self.lexer.peek(), ("else",)):
+            bodies.append(self._block("else", stop_words=("fi",)))
+        self._expect("fi")
+        return self._compound("if", start, bodies, [])
+
+    def _loop(self) -> Compound:
+        token = self.lexer.peek()
+        condition = self._block(token.value, stop_words=("do",))
+        body = self._block("do", stop_words=("done",))
+        self._expect("done")
+        return self._compound(token.value, token.start, [condition, body], [])
+
+    def _for(self) -> Compound:
+        lexer = self.lexer
+        keyword = lexer.next()
+        name = lexer.next()
+        if name.kind != "word":
+            raise ParseError(f"Unsupported {keyword.value!r} loop")
+        words = [name.word]
+        self._newlines()
+        if self._keyword(lexer.peek(), ("in",)):
+            lexer.next()
+            while lexer.peek().kind == "word":
+                words.append(lexer.next().word)
+        token = lexer.peek()
+        if token.kind == "newline" or (token.kind == "op" and token.value == ";"):
+            lexer.next()
+        self._newlines()
+        body = self._block("do", stop_words=("done",))
+        self._expect("done")
+        return self._compound(keyword.value, keyword.start, [body], words)
+
+    def _case(self) -> Compound:
+        lexer = self.lexer
+        keyword = lexer.next()
+        subject = lexer.next()
+        if subject.kind != "word":
+            raise ParseError("Expected a word after 'case'")
+        words, bodies = [subject.word], []
+        self._newlines()
+        self._expect("in")
+        while True:
+            self._newlines()
+            if self._keyword(lexer.peek(), ("esac",)):
+                break
+            if lexer.peek().kind == "op" and lexer.peek().value == "(":
+                lexer.next()
+            while True:
+                pattern = lexer.next()
+                if pattern.kind != "word":
+                    raise ParseError("Expected a case pattern")
+                words.append(pattern.word)
+                if lexer.peek().value != "|" or lexer.peek().kind != "op":
+                    break
+                lexer.next()
+            self._expect(")")
+            bodies.append(self.list_(stop_ops=(";;", ";&", ";;&"), stop_words=("esac",)))
+            token = lexer.peek()
+            if token.kind == "op" and token.value in (";;", ";&", ";;&"):
+                lexer.next()
+            elif not self._keyword(token, ("esac",)):
+                raise ParseError("Expected ';;' or 'esac'")
+        self._expect("esac")
+        return self._compound("case", keyword.start, bodies, words)
+
+    def _function(self) -> Compound:
+        lexer = self.lexer
+        start = lexer.next().start
+        name = lexer.next()
+        if name.kind != "word":
+            raise ParseError("Expected a function name")
+        if lexer.peek().kind == "op" and lexer.peek().value == "(":
+            return self._function_body(start, name.word)
+        self._newlines()
+        return self._wrap_function(start, name.word)
+
+    def _function_body(self, start: int, name: Word) -> Compound:
+        """`name ( ) compound-command`; the cursor is at "("."""
+        self._expect("(")
+        self._expect(")")
+        self._newlines()
+        return self._wrap_function(start, name)
+
+    def _wrap_function(self, start: int, name: Word) -> Compound:
+        body = self._command()
+        if not isinstance(body, Compound):
+            raise ParseError("Function body must be a compound command")
+        pipeline = Pipeline([body], False, body.text)
+        bodies = [CommandList([AndOr([pipeline], [])], [""])]
+        text = self.lexer.source[start:self.lexer.last_end].strip()
+        return Compound("function", bodies, [name], [], text)
+
+    # =========================================================================
+    # Helpers
+    # =========================================================================
+
+    def _newlines(self):
+        while self.lexer.peek().kind == "newline":
+            self.lexer.next()
+
+    @staticmethod
+    def _keyword(token: _Token, words: tuple[str, ...]) -> bool:
+        return token.kind == "word" and not token.word.quoted and token.value in words
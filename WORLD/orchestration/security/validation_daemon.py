@@ -0,0 +1,280 @@
+"""
+Security Validation Daemon
+==========================
+
+A local Unix-socket server that validates Bash commands for several agent
+processes with one warm, compiled policy and one shared decision cache.
+Agents then skip importing and compiling the policy themselves.
+
+Protocol: one JSON object per line in each direction.
+
+    -> {"id": 1, "commands": ["git status", "rm -rf /"]}
+    <- {"id": 1, "version": "...", "results": [{"allowed": true, "reason": ""},
+                                             {"allowed": false, "reason": "..."}]}
+    -> {"id": 2, "op": "stats"}
+    <- {"id": 2, "stats": {"hits": ..., "misses": ..., "hit_rate": ...}}
+
+A request may also carry "policy", "build" and "trust_level" to select the
+policy store. The client sends its own SECURITY_POLICY_FILE, AGENT_BUILD and
+AGENT_TRUST_LEVEL, so the daemon decides exactly as the agent would locally.
+The daemon only serves its own policy file (SECURITY_POLICY_FILE when it
+started, else policy.json); a request naming another file is rejected, and
+the client then validates locally.
+
+Usage:
+    python validation_daemon.py                 # serve on the default socket
+    python validation_daemon.py --socket PATH
+    python validation_daemon.py --stats         # query a running daemon
+
+With SECURITY_DAEMON_SOCKET set, bash_security_hook validates through the
+daemon. If the daemon cannot be reached, it validates locally instead.
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from typing import Any
+
+from policy import POLICY_FILE, ValidationResult, policy_store
+from security import validate_many
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f"security-validation-{os.getuid()}.sock")
+MAX_REQUEST_BYTES = 1 << 20  # Longer request lines are rejected
+CLIENT_TIMEOUT = 2.0  # Seconds to wait for the daemon before giving up
+
+
+class DaemonError(OSError):
+    """The validation daemon could not be reached or answered badly."""
+
+
+# =============================================================================
+# Server
+# =============================================================================
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_BYTES + 1)
+            if not line:
+                return
+            if len(line) > MAX_REQUEST_BYTES:
+                self._send({"error": f"Request exceeds {MAX_REQUEST_BYTES} bytes"})
+                return
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be a JSON object")
+                response = self.server.respond(request)
+            except ValueError as e:
+                response = {"error": str(e)}
+            self._send(response)
+
+    def _send(self, response: dict[str, Any]):
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+        self.wfile.flush()
+
+
+class ValidationServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Validates command batches for any number of connected agents."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str = DEFAULT_SOCKET):
+        _claim_socket(path)
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o600)  # Same-user agents only
+        self.path = path
+        self.policy = os.environ.get("SECURITY_POLICY_FILE") or POLICY_FILE
+        policy_store(
+            self.policy,
+            os.environ.get("AGENT_BUILD"),
+            os.environ.get("AGENT_TRUST_LEVEL"),
+        ).current()  # Compile the default policy before the first request
+
+    def respond(self, request: dict[str, Any]) -> dict[str, Any]:
+        response: dict[str, Any] = {"id": request.get("id")}
+        policy, build, trust_level = (request.get(key) for key in ("policy", "build", "trust_level"))
+        if not all(value is None or isinstance(value, str) for value in (policy, build, trust_level)):
+            raise ValueError("'policy', 'build' and 'trust_level' must be strings")
+        if policy and os.path.realpath(policy) != os.path.realpath(self.policy):
+            raise ValueError(f"This daemon only serves the policy file {self.policy}")
+        store = policy_store(self.policy, build, trust_level)
+        op = request.get("op", "validate")
+        if op == "stats":
+            response["stats"] = store.cache.stats()
+        elif op == "validate":
+            commands = request.get("commands")
+            if not isinstance(commands, list) or not all(isinstance(c, str) for c in commands):
+                raise ValueError("'commands' must be a list of strings")
+            response["version"] = store.current().version
+            response["results"] = [
+                {"allowed": r.allowed, "reason": r.reason} for r in validate_many(commands, store)
+            ]
+        else:
+            raise ValueError(f"Unknown op: {op!r}")
+        return response
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _claim_socket(path: str):
+    """Remove a stale socket file, or fail if a daemon is already listening."""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise DaemonError(f"A validation daemon is already listening on {path}")
+    finally:
+        probe.close()
+
+
+# =============================================================================
+# Client
+# =============================================================================
+
+
+class ValidationClient:
+    """
+    A persistent connection to the validation daemon.
+
+    Each call is one round trip. A dropped connection is retried once;
+    after that the call raises DaemonError.
+    """
+
+    def __init__(self, path: str = DEFAULT_SOCKET, timeout: float = CLIENT_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._sock: socket.socket | None = None
+        self._reader = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def validate(self, command: str) -> ValidationResult:
+        return self.validate_many([command])[0]
+
+    def validate_many(self, commands: list[str]) -> list[ValidationResult]:
+        response = self._request({"commands": list(commands)})
+        results = response.get("results")
+        if not isinstance(results, list) or len(results) != len(commands):
+            raise DaemonError(f"Malformed response from validation daemon: {response!r}")
+        return [ValidationResult(bool(r["allowed"]), str(r["reason"])) for r in results]
+
+    def stats(self) -> dict[str, Any]:
+        return self._request({"op": "stats"})["stats"]
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+    def __enter__(self) -> "ValidationClient":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request(self, request: dict[str, Any]) -> dict[str, Any]:
+        # Decide under the same policy selection this process would use locally
+        for key, env in (("policy", "SECURITY_POLICY_FILE"), ("build", "AGENT_BUILD"),
+                         ("trust_level", "AGENT_TRUST_LEVEL")):
+            if os.environ.get(env):
+                request[key] = os.environ[env]
+        with self._lock:
+            self._next_id += 1
+            request["id"] = self._next_id
+            payload = json.dumps(request).encode() + b"\n"
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(payload)
+                    line = self._reader.readline(MAX_REQUEST_BYTES + 1)
+                    if not line:
+                        raise ConnectionError("Validation daemon closed the connection")
+                    break
+                except OSError as e:
+                    self._disconnect()
+                    if attempt:
+                        raise DaemonError(f"Validation daemon unavailable at {self.path}: {e}") from e
+        try:
+            response = json.loads(line)
+        except ValueError as e:
+            raise DaemonError(f"Malformed response from validation daemon: {e}") from e
+        if "error" in response:
+            raise DaemonError(f"Validation daemon rejected the request: {response['error']}")
+        if response.get("id") != request["id"]:
+            raise DaemonError("Validation daemon answered out of order")
+        return response
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+
+    def _disconnect(self):
+        if self._sock is not None:
+            self._reader.close()
+            self._sock.close()
+        self._sock = None
+        self._reader = None
+
+
+_clients: dict[str, ValidationClient] = {}
+
+
+def shared_client(path: str = DEFAULT_SOCKET) -> ValidationClient:
+    """The process-wide client for a socket path."""
+    client = _clients.get(path)
+    if client is None:
+        client = _clients.setdefault(path, ValidationClient(path))
+    return client
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Shared Bash command validation daemon")
+    parser.add_argument("--socket", default=os.environ.get("SECURITY_DAEMON_SOCKET") or DEFAULT_SOCKET,
+                        help="Unix socket path")
+    parser.add_argument("--stats", action="store_true", help="Print a running daemon's cache stats")
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        with ValidationClient(args.socket) as client:
+            print(json.dumps(client.stats(), indent=2))
+        return 0
+
+    with ValidationServer(args.socket) as server:
+        print(f"Validating Bash commands on {args.socket}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())